@@ -7,6 +7,9 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
+    # Pages are built on first use (AppController.page_classes) and the report,
+    # receipt, chart and mail modules are imported inside functions or through
+    # utils.__getattr__, so every one of them is listed explicitly here.
     hiddenimports=[
         'reportlab',
         'reportlab.lib',
@@ -15,11 +18,17 @@ a = Analysis(
         'reportlab.lib.styles',
         'reportlab.platypus',
         'reportlab.lib.units',
+        'reportlab.pdfgen',
+        'reportlab.pdfgen.canvas',
         'openpyxl',
+        'openpyxl.cell',
         'openpyxl.styles',
+        'openpyxl.utils',
         'matplotlib',
+        'matplotlib.backends.backend_agg',
         'matplotlib.backends.backend_tkagg',
         'matplotlib.figure',
+        'numpy',
         'PIL',
         'PIL.Image',
         'email',
@@ -27,8 +36,16 @@ a = Analysis(
         'email.mime.text',
         'email.mime.multipart',
         'email.mime.application',
+        'smtplib',
+        'ssl',
+        'socket',
+        'cProfile',
+        'pstats',
         'models',
         'models.database',
+        'models.slot_index',
+        'models.connection_pool',
+        'models.event_bus',
         'controllers',
         'controllers.app_controller',
         'views',
@@ -44,12 +61,23 @@ a = Analysis(
         'views.settings_page',
         'views.reports_page',
         'views.admin_manage_page',
+        'views.diagnostics_page',
+        'views.paged_tree',
+        'views.live_search',
         'utils',
         'utils.config',
         'utils.helpers',
+        'utils.callbacks',
         'utils.pdf_generator',
         'utils.email_sender',
         'utils.excel_exporter',
+        'utils.charts',
+        'utils.pricing',
+        'utils.instrumentation',
+        'utils.plates',
+        'utils.checkout',
+        'utils.receipts',
+        'utils.report_generator',
     ],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP API for Smart Parking Management System
+Lets gate terminals, payment kiosks and plate cameras park, exit and pay
+without the Tk app. Connections are served by asyncio; every DB call runs on
+a bounded pool of worker threads, so a slow query never stalls the event loop
+and a burst of requests queues instead of opening ever more connections.
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8080] [--db PATH]
+                         [--workers 4] [--profile NAME] [--token TOKEN]
+
+Endpoints (JSON in and out; query parameters or a JSON body):
+    GET  /health
+    GET  /occupancy
+    GET  /quote?number=UAX123A           fee for the latest visit, up to now if still parked
+    GET  /vehicles?q=&from=&to=&limit=&before=   search_vehicles (before = last id of the previous page)
+    GET  /payments?q=&from=&to=&limit=&before=   search_payments
+    POST /park      {"number", "type", "user", "payment_method"}   409 if the plate is already parked
+    POST /exit      {"number"}
+    POST /payments  {"number", "amount", "payment_method", "user"}
+    POST /checkout  {"number", "user"}   exit if parked and pay the fee, in one transaction
+
+Plates are matched on their canonical key (utils.plates.plate_key), so
+"uax 123-a" exits the visit parked as "UAX123A".
+
+With --token (or PARKING_API_TOKEN) every request needs
+"Authorization: Bearer <token>".
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from models import DB
+from models.database import STORAGE_PROFILES, AlreadyParked
+from utils import config
+from utils.helpers import now_str
+from utils.pricing import stay_fee
+
+VEHICLE_FIELDS = ("id", "number", "type", "user", "slot_id", "entry_time", "exit_time", "payment_method")
+PAYMENT_FIELDS = ("id", "vehicle_number", "amount", "paid_at", "duration_hours", "generated_by",
+                  "receipt_path", "payment_method")
+MAX_BODY = 64 * 1024
+MAX_LIMIT = 1000
+
+
+class ApiError(Exception):
+    """A request that cannot be served; becomes a JSON error response"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ParkingApi:
+    """Endpoint handlers over a DB. Each runs on a DB worker thread and
+    takes the merged query/body parameters as a dict"""
+
+    def __init__(self, db, user="api"):
+        self.db = db
+        self.user = user  # recorded as the operator when a request names none
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/occupancy"): self.occupancy,
+            ("GET", "/quote"): self.quote,
+            ("GET", "/vehicles"): self.search_vehicles,
+            ("GET", "/payments"): self.search_payments,
+            ("POST", "/park"): self.park,
+            ("POST", "/exit"): self.exit,
+            ("POST", "/payments"): self.pay,
+            ("POST", "/checkout"): self.checkout,
+        }
+
+    def load_settings(self):
+        """Apply the hourly rates saved in the Settings page"""
+        settings = self.db.get_all_settings()
+        config.HOURLY_RATE_CAR = float(settings.get('car_rate', config.HOURLY_RATE_CAR))
+        config.HOURLY_RATE_MOTOR = float(settings.get('motor_rate', config.HOURLY_RATE_MOTOR))
+
+    @staticmethod
+    def _required(params, name):
+        value = str(params.get(name) or "").strip()
+        if not value:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' is required")
+        return value
+
+    @staticmethod
+    def _limit(params):
+        try:
+            return max(1, min(int(params.get("limit", 100)), MAX_LIMIT))
+        except (TypeError, ValueError):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "'limit' must be an integer")
+
+    def health(self, params):
+        return {"status": "ok", "time": now_str()}
+
+    def occupancy(self, params):
+        return self.db.get_occupancy_stats()
+
+    def _quote(self, number):
+        v = self.db.get_last_vehicle_record(number)
+        if not v:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no visit for {number}")
+        slot = self.db.get_slot_by_id(v[4]) if v[4] else None
+        amount, duration = stay_fee(v[5], v[6] or now_str(), v[2], slot[4] if slot else None)
+        return self._visit(v, amount, duration)
+
+    @staticmethod
+    def _visit(v, amount, duration):
+        return {"number": v[1], "type": v[2], "slot_id": v[4], "entry_time": v[5], "exit_time": v[6],
+                "parked": v[6] is None, "payment_method": v[7] or "cash",
+                "amount": amount, "duration_hours": duration}
+
+    def quote(self, params):
+        return self._quote(self._required(params, "number"))
+
+    def park(self, params):
+        number = self._required(params, "number")
+        vtype = self._required(params, "type")
+        payment_method = params.get("payment_method") or "cash"
+        entry_time = now_str()
+        # the slot is claimed by a guarded UPDATE in SQL, so gates in other threads or
+        # processes never share one; a gate that loses the race retries with another slot
+        try:
+            slot = self.db.park_in_free_slot(number, vtype, params.get("user") or self.user, entry_time, payment_method)
+        except AlreadyParked as e:
+            raise ApiError(HTTPStatus.CONFLICT, str(e))
+        if not slot:
+            raise ApiError(HTTPStatus.CONFLICT, f"no free slot for {vtype}")
+        return {"number": number, "type": vtype, "slot_id": slot[0], "slot": slot[1],
+                "entry_time": entry_time, "payment_method": payment_method}
+
+    def exit(self, params):
+        number = self._required(params, "number")
+        closed = self.db.close_visit(number, now_str())
+        if not closed:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"{number} is not parked")
+        return self._visit(*closed)
+
+    def pay(self, params):
+        number = self._required(params, "number")
+        visit = self._quote(number)
+        if params.get("amount") is None:
+            if visit["parked"]:
+                raise ApiError(HTTPStatus.CONFLICT, f"{number} has not exited; exit first or give an amount")
+            amount = visit["amount"]
+        else:
+            try:
+                amount = float(params["amount"])
+            except (TypeError, ValueError):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "'amount' must be a number")
+        payment_method = params.get("payment_method") or visit["payment_method"]
+        self.db.record_payment(visit["number"], amount, visit["duration_hours"], params.get("user") or self.user,
+                               "", payment_method)
+        return {"number": visit["number"], "amount": amount, "duration_hours": visit["duration_hours"],
+                "payment_method": payment_method}
+
+    def checkout(self, params):
+        number = self._required(params, "number")
+        checked_out = self.db.checkout(number, now_str(), params.get("user") or self.user)
+        if not checked_out:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no visit for {number}")
+        visit, amount, duration, _, _ = checked_out
+        return self._visit(visit, amount, duration)
+
+    @staticmethod
+    def _before(params):
+        try:
+            return None if params.get("before") in (None, "") else int(params["before"])
+        except (TypeError, ValueError):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "'before' must be an id")
+
+    def search_vehicles(self, params):
+        rows = self.db.search_vehicles(params.get("q", ""), params.get("from", ""), params.get("to", ""),
+                                       limit=self._limit(params), before_id=self._before(params))
+        return [dict(zip(VEHICLE_FIELDS, row)) for row in rows]
+
+    def search_payments(self, params):
+        rows = self.db.search_payments(params.get("q", ""), params.get("from", ""), params.get("to", ""),
+                                       limit=self._limit(params), before_id=self._before(params))
+        return [dict(zip(PAYMENT_FIELDS, row)) for row in rows]
+
+
+class ApiServer:
+    """Minimal HTTP/1.1 server (keep-alive, JSON bodies) on asyncio.
+
+    Handlers run on `workers` threads; once `workers * backlog` requests are
+    waiting, new ones are turned away with 503 instead of queueing forever.
+    """
+
+    def __init__(self, api, workers=4, backlog=16, token=None):
+        self.api = api
+        self.token = token
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        self.max_in_flight = workers * backlog
+        self.in_flight = 0  # only touched on the event loop thread
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"Smart Parking API listening on http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, target, headers, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # client went away or sent garbage; drop the connection
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        handler = self.api.routes.get((method, url.path))
+        if handler is None:
+            known = any(path == url.path for _, path in self.api.routes)
+            status = HTTPStatus.METHOD_NOT_ALLOWED if known else HTTPStatus.NOT_FOUND
+            return status, {"error": status.phrase}
+        if self.token and not hmac.compare_digest(headers.get("authorization", ""), f"Bearer {self.token}"):
+            return HTTPStatus.UNAUTHORIZED, {"error": "missing or wrong API token"}
+        params = dict(parse_qsl(url.query))
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {"error": "body is not valid JSON"}
+            if not isinstance(data, dict):
+                return HTTPStatus.BAD_REQUEST, {"error": "body must be a JSON object"}
+            params.update(data)
+        if self.in_flight >= self.max_in_flight:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "server busy, retry shortly"}
+        self.in_flight += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, handler, params)
+            return HTTPStatus.OK, result
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            print(f"API error ({method} {url.path}): {e}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Parking headless HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8080, help="port to bind (0 picks a free one)")
+    parser.add_argument("--db", default=config.DB_FILE, help="database file (default: the app database)")
+    parser.add_argument("--workers", type=int, default=4, help="DB worker threads (default: 4)")
+    parser.add_argument("--profile", choices=sorted(STORAGE_PROFILES), default=None,
+                        help=f"storage profile (default: {config.DB_PROFILE})")
+    parser.add_argument("--token", default=os.environ.get("PARKING_API_TOKEN"), help="require this bearer token")
+    args = parser.parse_args()
+
+    # one pooled reader per worker, so reads never wait on each other
+    db = DB(args.db, profile=args.profile, readers=args.workers)
+    api = ParkingApi(db)
+    api.load_settings()
+    server = ApiServer(api, workers=args.workers, token=args.token)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown(wait=True)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
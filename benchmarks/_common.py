@@ -0,0 +1,152 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+import contextlib
+
+# make the project packages importable when run as `python benchmarks/<script>.py`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@contextlib.contextmanager
+def temp_db(**kwargs):
+    """Yield a DB backed by a throwaway file (never the real database)"""
+    from models import DB
+    tmpdir = tempfile.mkdtemp(prefix="parking_bench_")
+    db = DB(os.path.join(tmpdir, "bench.db"), **kwargs)
+    try:
+        yield db
+    finally:
+        db.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def bulk_slots(db, count, occupied_ratio=0.0):
+    """Insert `count` slots in one transaction and resync the slot index"""
+    occupied = int(count * occupied_ratio)
+    rows = []
+    for i in range(count):
+        type_allowed = ("Car", "Motorcycle", "Both")[i % 3]
+        status = "occupied" if i < occupied else "free"
+        rows.append((f"S{i}", type_allowed, status, 1000.0))
+    with db.transaction() as cur:
+        cur.executemany("INSERT INTO slots(name,type_allowed,status,hourly_rate) VALUES(?,?,?,?)", rows)
+    db.slot_index.rebuild(db.conn.cursor())
+
+
+def timed(fn, repeat):
+    """Run fn `repeat` times and return the mean seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bulk_history(db, visits, open_visits=50, users=("admin", "gate1", "gate2")):
+    """Insert `visits` closed vehicle records plus `open_visits` still parked"""
+    from utils.helpers import to_epoch
+    entry, exit_, parked = "2025-01-01 08:00:00", "2025-01-01 10:30:00", "2025-01-02 08:00:00"
+    rows = []
+    for i in range(visits):
+        rows.append((f"UAX{i:07d}", f"UAX{i:07d}", "Car" if i % 4 else "Motorcycle", users[i % len(users)], 1,
+                     entry, exit_, "cash", to_epoch(entry), to_epoch(exit_)))
+    for i in range(open_visits):
+        rows.append((f"OPEN{i:05d}", f"OPEN{i:05d}", "Car", users[i % len(users)], 1, parked, None, "cash", to_epoch(parked), None))
+    with db.transaction() as cur:
+        cur.executemany("""
+            INSERT INTO vehicles(number,number_key,type,user,slot_id,entry_time,exit_time,payment_method,entry_ts,exit_ts)
+            VALUES(?,?,?,?,?,?,?,?,?,?)
+        """, rows)
+
+
+def bulk_payments(db, count, days=365, operators=("admin", "gate1", "gate2"), methods=("cash", "card", "digital")):
+    """Insert `count` payments spread over the last `days` days, then rebuild rollups"""
+    import calendar
+    import datetime
+    now = datetime.datetime.now()
+    rows = []
+    for i in range(count):
+        paid_at = (now - datetime.timedelta(seconds=(i * 7919) % (days * 86400))).replace(microsecond=0)
+        rows.append((f"UAX{i:07d}", f"UAX{i:07d}", 1000.0 + i % 5 * 500, paid_at.strftime("%Y-%m-%d %H:%M:%S"), 1.5,
+                     operators[i % len(operators)], "", methods[i % len(methods)], calendar.timegm(paid_at.timetuple())))
+    with db.transaction() as cur:
+        cur.executemany("""
+            INSERT INTO payments(vehicle_number,vehicle_key,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method,paid_ts)
+            VALUES(?,?,?,?,?,?,?,?,?)
+        """, rows)
+    db.rebuild_revenue_rollup()
+
+
+def synthetic_db(db, slots=200, users=50, months=3, visits_per_day=200, open_ratio=0.5, seed=0, progress=None):
+    """Fill an empty DB with a realistic history through the DB API itself.
+
+    Creates `users` operators, `slots` slots and `months` of visits (park,
+    exit, payment) from a fleet of returning plates; one transaction per day.
+    record_payments() stamps the current time, so each day's payments are
+    moved back to their exit times afterwards. Finally `open_ratio` of the
+    slots are left occupied by vehicles parked today.
+    """
+    import datetime
+    import random
+    from utils.helpers import to_epoch
+    from utils.pricing import stay_fee
+    rng = random.Random(seed)
+    letters = "ABCDEFGHJKLMNPRSTUVWXYZ"
+    fleet = [f"U{rng.choice('ABCDEFG')}{rng.choice(letters)} {rng.randint(100, 999)}{rng.choice(letters)}"
+             for _ in range(max(users * 20, 100))]
+    operators = ["admin"] + [f"user{n:03d}" for n in range(users)]
+    methods = ("cash", "card", "digital")
+    with db.transaction():
+        for name in operators[1:]:
+            db.create_user(name, "bench", f"Bench User {name[4:]}", "user", f"{name}@example.com")
+        for i in range(slots):
+            db.create_slot(f"S{i:04d}", ("Car", "Car", "Motorcycle", "Both")[i % 4], (0, 0, 0, 1500)[i % 4])
+
+    today = datetime.date.today()
+    first_day = today - datetime.timedelta(days=int(months * 30))
+    days = (today - first_day).days
+    for d in range(days):
+        day = datetime.datetime.combine(first_day + datetime.timedelta(days=d), datetime.time(6))
+        starts = sorted(rng.uniform(0, 14 * 3600) for _ in range(visits_per_day))
+        payments, paid_times = [], []
+        with db.transaction() as cur:
+            for start in starts:
+                number = rng.choice(fleet)
+                vtype = "Car" if rng.random() < 0.7 else "Motorcycle"
+                slot = db.get_free_slot_for_type(vtype)
+                if not slot:
+                    continue
+                entry = day + datetime.timedelta(seconds=int(start))
+                exit_ = entry + datetime.timedelta(seconds=rng.randint(15 * 60, 8 * 3600))
+                entry_time, exit_time = entry.strftime("%Y-%m-%d %H:%M:%S"), exit_.strftime("%Y-%m-%d %H:%M:%S")
+                user, method = rng.choice(operators), rng.choice(methods)
+                db.park_vehicle(number, vtype, user, slot[0], entry_time, method)
+                db.exit_vehicle(number, exit_time)
+                amount, duration = stay_fee(entry_time, exit_time, vtype, slot[2])
+                payments.append((number, amount, duration, user, "", method))
+                paid_times.append(exit_time)
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM payments")
+            last_id = cur.fetchone()[0]
+            db.record_payments(payments)
+            cur.executemany("UPDATE payments SET paid_at=?, paid_ts=? WHERE id=?",
+                            [(t, to_epoch(t), last_id + 1 + n) for n, t in enumerate(paid_times)])
+        if progress:
+            progress(d + 1, days)
+    db.rebuild_revenue_rollup()
+
+    now = datetime.datetime.now().replace(microsecond=0)
+    with db.transaction():
+        for n in range(int(slots * open_ratio)):
+            vtype = "Car" if n % 3 else "Motorcycle"
+            slot = db.get_free_slot_for_type(vtype)
+            if slot:
+                entry = (now - datetime.timedelta(minutes=rng.randint(5, 300))).strftime("%Y-%m-%d %H:%M:%S")
+                db.park_vehicle(f"OPEN {n:04d}", vtype, rng.choice(operators), slot[0], entry, rng.choice(methods))
+    return fleet
@@ -0,0 +1,48 @@
+"""
+Benchmark: dashboard refresh queries as vehicle history grows
+
+Compares the old refresh path (list_parked() filtered in Python) with
+list_active_vehicles / count_active_vehicles / count_vehicle_records. The
+open visits stay the same at every size, so the new path must stay flat as
+the history grows 100x; the run fails if it grows more than FLAT_LIMIT.
+
+Usage: python benchmarks/bench_active_vehicles.py   (exit code 1 if not flat)
+"""
+
+import sys
+
+from _common import temp_db, bulk_history, timed
+
+FLAT_LIMIT = 3.0  # largest / smallest history; linear growth would be ~100x
+
+
+def old_refresh(db):
+    parked = db.list_parked()
+    active = [v for v in parked if v[6] is None]
+    mine = [v for v in parked if v[3] == "gate1" and v[6] is None]
+    return active[:20], mine, len(parked), len(active)
+
+
+def new_refresh(db):
+    return (db.list_active_vehicles(limit=20), db.list_active_vehicles(user="gate1"),
+            db.count_vehicle_records(), db.count_active_vehicles())
+
+
+def main():
+    costs = []
+    for history in (10_000, 100_000, 1_000_000):
+        with temp_db() as db:
+            bulk_history(db, history)
+            repeat = 3 if history >= 1_000_000 else 10
+            old = timed(lambda: old_refresh(db), repeat)
+            new = timed(lambda: new_refresh(db), repeat * 10)
+            costs.append(new)
+            print(f"{history:>9} visits  list_parked+filter {old * 1e3:9.1f} ms  active queries {new * 1e3:7.2f} ms")
+    growth = costs[-1] / costs[0]
+    print(f"per-refresh cost, 1M vs 10k visits: x{growth:.1f} ({'flat' if growth <= FLAT_LIMIT else 'NOT flat'})")
+    if growth > FLAT_LIMIT:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: a day's receipts one at a time vs utils.receipts.bulk_receipts
+
+"one by one" follows PaymentsPage.generate_receipt_for: a fresh stylesheet,
+one PDF and one committed payment per vehicle. "bulk" computes every fee up
+front, renders in a process pool with cached styles, and records all the
+payments in one transaction.
+
+Usage: python benchmarks/bench_bulk_receipts.py [vehicles] [workers]   (default: 1000, cpu count)
+"""
+
+import os
+import sys
+import time
+
+from _common import temp_db, bulk_history
+
+
+def one_by_one(db, vehicles, directory):
+    from utils.pdf_generator import generate_pdf_receipt, _receipt_styles
+    from utils.pricing import stay_fee
+    start = time.perf_counter()
+    for v in vehicles:
+        _receipt_styles.cache_clear()  # the old code rebuilt the stylesheet on every call
+        slot = db.get_slot_by_id(v[4])
+        amount, duration = stay_fee(v[5], v[6], v[2], slot[4] if slot else None)
+        path = os.path.join(directory, f"single_{v[0]}.pdf")
+        generate_pdf_receipt(v, amount, duration, v[7] or "cash", "admin", path)
+        db.record_payment(v[1], amount, duration, "admin", path, v[7] or "cash")
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    from utils.receipts import bulk_receipts
+    for mode in ("one by one", "bulk, 1 worker", "bulk, pool"):
+        with temp_db() as db:
+            db.create_slot("A1", "Car", 1000)
+            bulk_history(db, count, open_visits=0)
+            vehicles = db.list_unpaid_exits()
+            directory = os.path.dirname(db.pool.path)
+            if mode == "one by one":
+                elapsed = one_by_one(db, vehicles, directory)
+                rate, used = count / elapsed, 1
+            else:
+                stats = bulk_receipts(db, vehicles, "admin", directory, workers=1 if "1 worker" in mode else workers)
+                assert not stats['failed'], stats['failed'][:3]
+                elapsed, rate, used = stats['seconds'], stats['per_second'], stats['workers']
+            paid = db.count_payments()
+            print(f"{mode:<15} {count} receipts in {elapsed:6.2f} s  ({rate:6.0f}/s, {used} workers, {paid} payments)")
+
+
+if __name__ == "__main__":
+    main()
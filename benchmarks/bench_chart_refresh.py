@@ -0,0 +1,106 @@
+"""
+Benchmark: 1000 consecutive dashboard chart refreshes
+
+"rebuild" is the old DashboardPage.update_revenue_chart: destroy the chart
+widgets, then build a new Figure and FigureCanvasTkAgg. "cached" runs the
+current update_revenue_chart, which keeps one ChartPanel per page: with
+"unchanged" data every refresh is skipped by the data version, and with
+"changed" data (a payment recorded before every refresh) the line and fill
+are updated in place. RSS is sampled every 100 refreshes; it should stay
+flat for the cached chart.
+
+With a display the charts live in a real Tk frame. Without one they
+render off screen through the Agg canvas. That still shows the figure
+rebuild cost, but not the Tk widget leak.
+
+Usage: python benchmarks/bench_chart_refresh.py [refreshes]   (default: 1000)
+"""
+
+import gc
+import os
+import sys
+import time
+import types
+
+from _common import temp_db, bulk_payments
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def legacy_refresh(page):
+    """The pre-cache update_revenue_chart"""
+    from utils.charts import Figure, FigureCanvasTkAgg
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    if page.chart_canvas_frame is not None:
+        for widget in page.chart_canvas_frame.winfo_children():
+            widget.destroy()
+    daily_data = page.app.db.get_daily_revenue(7)
+    fig = Figure(figsize=(6, 3), dpi=80, facecolor="#ffffff")
+    ax = fig.add_subplot(111)
+    dates = [d[0] for d in daily_data]
+    revenues = [d[1] for d in daily_data]
+    ax.plot(dates, revenues, marker='o', color="#1e88e5", linewidth=2, markersize=6)
+    ax.fill_between(dates, revenues, alpha=0.3, color="#1e88e5")
+    ax.tick_params(axis='x', rotation=45, labelsize=8)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    if page.chart_canvas_frame is not None:
+        canvas = FigureCanvasTkAgg(fig, master=page.chart_canvas_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+    else:
+        FigureCanvasAgg(fig).draw()
+
+
+def run(mode, db, refreshes, frame, root):
+    from views.dashboard_page import DashboardPage
+    page = types.SimpleNamespace(app=types.SimpleNamespace(db=db), chart=None, chart_canvas_frame=frame)
+    refresh = legacy_refresh if mode == "rebuild" else lambda p: DashboardPage.update_revenue_chart(p)
+    samples = []
+    elapsed = 0.0
+    for i in range(refreshes):
+        if mode != "cached, unchanged":
+            db.record_payment(f"BENCH{i}", 1000.0, 1.0, "admin", "", "cash")
+        start = time.perf_counter()
+        refresh(page)
+        if root is not None:
+            root.update()  # let draw_idle and widget destruction happen
+        elapsed += time.perf_counter() - start
+        if i % 100 == 99:
+            gc.collect()
+            samples.append(rss_mb())
+    return elapsed / refreshes, samples
+
+
+def main():
+    refreshes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    root = None
+    if os.environ.get("DISPLAY") or sys.platform == "win32":
+        import tkinter as tk
+        root = tk.Tk()
+    print(f"charts in {'a Tk window' if root else 'off-screen Agg canvases (no display)'}")
+    for mode in ("rebuild", "cached, unchanged", "cached, changed"):
+        with temp_db() as db:
+            bulk_payments(db, 5000, days=7)
+            frame = None
+            if root is not None:
+                import tkinter as tk
+                frame = tk.Frame(root)
+                frame.pack(fill="both", expand=True)
+            per_refresh, samples = run(mode, db, refreshes, frame, root)
+            if frame is not None:
+                frame.destroy()
+            print(f"{mode:<18} {per_refresh * 1e3:8.2f} ms/refresh  RSS MB every 100: "
+                  f"{' '.join(f'{s:.0f}' for s in samples)}  (growth {samples[-1] - samples[0]:+.1f} MB)")
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
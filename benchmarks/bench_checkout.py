@@ -0,0 +1,112 @@
+"""
+Benchmark: gate checkouts, the old step-by-step receipt flow vs CheckoutService
+
+Parks `count` vehicles (owners with email addresses), then checks them all
+out each way and reports checkouts per second:
+
+  old flow          what PaymentsPage.generate_receipt_for did: read the
+                    visit, exit_vehicle, read it again, read the slot,
+                    render the PDF, record_payment, read the owner; every
+                    step its own query or commit, the gate waiting throughout
+  checkout          CheckoutService.checkout: one DB transaction, then back
+                    to the gate; "gate" is the time the operator waits,
+                    "with receipts" runs until the background PDFs are done
+
+The DB work alone (no PDF) is also timed both ways. Email is left disabled
+(the default settings), so no receipt is actually mailed.
+
+Usage: python benchmarks/bench_checkout.py [count]   (default: 500)
+"""
+
+import importlib.util
+import os
+import sys
+import time
+
+from _common import temp_db
+
+
+def park_all(db, count):
+    db.create_user("owner", "x", "Vehicle Owner", "user", "owner@example.com")
+    for n in range(count):
+        db.create_slot(f"S{n}", "Car", 1000)
+    for n in range(count):
+        db.park_vehicle(f"UAX {n:05d}", "Car", "owner", n + 1, "2025-01-01 08:00:00")
+
+
+def old_flow(db, number, directory, render=True):
+    from utils.helpers import now_str
+    from utils.pricing import stay_fee
+    v = db.get_last_vehicle_record(number)
+    if not v[6]:
+        db.exit_vehicle(number, now_str())
+        v = db.get_last_vehicle_record(number)
+    slot = db.get_slot_by_id(v[4]) if v[4] else None
+    amount, duration = stay_fee(v[5], v[6], v[2], slot[4] if slot else None)
+    path = os.path.join(directory, f"old_{v[0]}.pdf")
+    if render:
+        from utils.pdf_generator import generate_pdf_receipt
+        generate_pdf_receipt(v, amount, duration, v[7] or "cash", "admin", path)
+    db.record_payment(v[1], amount, duration, "admin", path, v[7] or "cash")
+    db.get_user(v[3])
+
+
+def run(label, count, body):
+    with temp_db() as db:
+        park_all(db, count)
+        directory = os.path.dirname(db.pool.path)
+        numbers = [f"UAX {n:05d}" for n in range(count)]
+        gate, total = body(db, numbers, directory)
+        assert db.count_payments() == count
+        line = f"{label:<28}{count / gate:>10.0f}/s"
+        if total is not None:
+            line += f"   with receipts {count / total:>6.0f}/s"
+        print(line)
+
+
+def old(render):
+    def body(db, numbers, directory):
+        start = time.perf_counter()
+        for number in numbers:
+            old_flow(db, number, directory, render)
+        return time.perf_counter() - start, None
+    return body
+
+
+def service(render):
+    def body(db, numbers, directory):
+        from utils.checkout import CheckoutService
+        from utils.email_sender import MailQueue
+        from utils.helpers import now_str
+        if not render:
+            start = time.perf_counter()
+            for number in numbers:
+                db.checkout(number, now_str(), "admin")
+            return time.perf_counter() - start, None
+        checkouts = CheckoutService(db, MailQueue(db), directory)
+        errors = []
+        start = time.perf_counter()
+        for number in numbers:
+            checkouts.checkout(number, "admin", on_receipt=lambda result, error: error and errors.append(error))
+        gate = time.perf_counter() - start
+        checkouts.close()
+        total = time.perf_counter() - start
+        assert not errors, errors[:3]
+        return gate, total
+    return body
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{count} checkouts")
+    run("old flow, DB only", count, old(False))
+    run("DB.checkout, DB only", count, service(False))
+    if importlib.util.find_spec("reportlab") is None:
+        print("reportlab is not installed; skipping the runs with PDF receipts")
+        return
+    run("old flow with PDF", count, old(True))
+    run("CheckoutService (gate)", count, service(True))
+
+
+if __name__ == "__main__":
+    main()
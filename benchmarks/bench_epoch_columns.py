@@ -0,0 +1,119 @@
+"""
+Benchmark: analytics on TEXT datetimes vs the integer epoch columns
+
+Seeds `rows` vehicle visits and `rows` payments spread over a year, plus the
+old TEXT indexes so the "text" queries get their best plan, then times each
+analytic both ways:
+
+  visits in a month     COUNT(*) on an entry_time range vs entry_ts
+  average stay          julianday() arithmetic vs exit_ts - entry_ts
+  revenue in a month    SUM(amount) on a paid_at range vs paid_ts
+  revenue per day       GROUP BY DATE(paid_at) vs paid_ts / 86400 (rollup rebuild)
+  stay durations        hours_between() via strptime per row on the TEXT times vs
+                        pricing.load_stays() + stay_hours() on the epoch columns, the
+                        path tariff_what_if() and project_revenue() run for Reports
+
+Usage: python benchmarks/bench_epoch_columns.py [rows]   (default: 5000000)
+"""
+
+import calendar
+import datetime
+import random
+import sys
+import time
+
+from _common import temp_db
+from utils import pricing
+
+MONTH = ("2025-03-01", "2025-03-31 23:59:59")
+
+
+def seed(db, rows, seed=11):
+    rng = random.Random(seed)
+    start = calendar.timegm(datetime.datetime(2025, 1, 1).timetuple())
+    step = 365 * 86400 / rows  # visits arrive in time order, as they do in the app
+    fmt = "%Y-%m-%d %H:%M:%S"
+    as_text = lambda ts: time.strftime(fmt, time.gmtime(ts))
+    batch = 200_000
+    for first in range(0, rows, batch):
+        visits, payments = [], []
+        for i in range(first, min(rows, first + batch)):
+            entry = start + int(i * step) + rng.randrange(60)
+            exit_ = entry + rng.randrange(600, 12 * 3600)
+            visits.append((f"UAX{i:07d}", "Car" if i % 4 else "Motorcycle", "admin", 1,
+                           as_text(entry), as_text(exit_), entry, exit_))
+            payments.append((f"UAX{i:07d}", 1000.0 + i % 5 * 500, as_text(exit_), exit_, "admin", "cash"))
+        with db.transaction() as cur:
+            cur.executemany("INSERT INTO vehicles(number,type,user,slot_id,entry_time,exit_time,entry_ts,exit_ts)"
+                            " VALUES(?,?,?,?,?,?,?,?)", visits)
+            cur.executemany("INSERT INTO payments(vehicle_number,amount,paid_at,paid_ts,generated_by,payment_method)"
+                            " VALUES(?,?,?,?,?,?)", payments)
+    with db.transaction() as cur:
+        # the pre-migration TEXT indexes, for the "text" side
+        cur.execute("CREATE INDEX bench_entry_time ON vehicles(entry_time)")
+        cur.execute("CREATE INDEX bench_exit_time ON vehicles(exit_time, entry_time)")
+        cur.execute("CREATE INDEX bench_paid_at ON payments(paid_at, amount)")
+    db.conn.execute("ANALYZE")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def query(db, sql, params=()):
+    return lambda: db.conn.execute(sql, params).fetchall()
+
+
+def strptime_hours(start_iso, end_iso):
+    """helpers.hours_between before the epoch columns"""
+    fmt = "%Y-%m-%d %H:%M:%S"
+    return (datetime.datetime.strptime(end_iso, fmt) - datetime.datetime.strptime(start_iso, fmt)).total_seconds() / 3600.0
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    from utils.helpers import to_epoch
+    with temp_db() as db:
+        start = time.perf_counter()
+        seed(db, rows)
+        print(f"seeded {rows} visits + {rows} payments in {time.perf_counter() - start:.0f} s")
+        lo, hi = MONTH
+        ts_lo, ts_hi = to_epoch(lo), to_epoch(hi)
+        cases = [
+            ("visits in a month",
+             query(db, "SELECT COUNT(*) FROM vehicles WHERE entry_time >= ? AND entry_time <= ?", (lo, hi)),
+             query(db, "SELECT COUNT(*) FROM vehicles WHERE entry_ts >= ? AND entry_ts <= ?", (ts_lo, ts_hi))),
+            ("average stay",
+             query(db, "SELECT AVG((julianday(exit_time) - julianday(entry_time)) * 24) FROM vehicles"
+                       " WHERE exit_time IS NOT NULL"),
+             lambda: db.get_stay_stats()['avg_hours']),
+            ("revenue in a month",
+             query(db, "SELECT SUM(amount) FROM payments WHERE paid_at >= ? AND paid_at <= ?", (lo, hi)),
+             lambda: db._scan_revenue_stats(lo, hi)['total']),
+            ("revenue per day",
+             query(db, "SELECT DATE(paid_at), SUM(amount) FROM payments GROUP BY 1"),
+             query(db, "SELECT paid_ts / 86400, SUM(amount) FROM payments GROUP BY 1")),
+        ]
+        print(f"{'':<22}{'text':>10}{'epoch':>10}")
+        for name, text, epoch in cases:
+            text_s, _ = timed(text)
+            epoch_s, _ = timed(epoch)
+            print(f"{name:<22}{text_s:9.3f}s{epoch_s:9.3f}s   x{text_s / epoch_s:.1f}")
+
+        # a year of stays in one go, as the Reports what-if and projection load them
+        whole = ("2025-01-01", "2025-12-31 23:59:59")
+        pairs = db.conn.execute("SELECT entry_time, exit_time FROM vehicles WHERE exit_time >= ? AND exit_time <= ?",
+                                whole).fetchall()
+        strptime_s, expected = timed(lambda: [strptime_hours(a, b) for a, b in pairs])
+        epoch_s, got = timed(lambda: pricing.stay_hours(*pricing.load_stays(db, *whole)[:2]))
+        what_if_s, _ = timed(lambda: pricing.tariff_what_if(db, *whole, car_rate=2000.0))
+        assert sorted(got.tolist()) == sorted(expected)
+        print(f"{len(pairs)} stay durations: strptime per row {strptime_s:.2f} s,"
+              f" load_stays + stay_hours on the epoch columns {epoch_s:.2f} s"
+              f" (whole tariff_what_if {what_if_s:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
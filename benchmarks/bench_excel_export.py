@@ -0,0 +1,109 @@
+"""
+Benchmark: Excel export of the payments table, in-memory vs streaming
+
+"legacy" is the old path: list_payments() into a list and a full in-memory
+Workbook, with every cell walked again for column widths. "stream" is
+iter_payments() into export_rows_to_excel (write-only workbook). Each export
+runs in its own process; "growth" is its peak RSS minus the RSS right after
+opening the database. For the streaming path it is capped by the storage
+profile's mmap_size + cache_size, not by the number of rows.
+
+Usage: python benchmarks/bench_excel_export.py [rows ...]   (default: 100000 1000000)
+       legacy is skipped above 200k rows unless --legacy-all is given
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from _common import temp_db, bulk_payments
+
+HEADERS = ['ID', 'Vehicle', 'Amount', 'Paid At', 'Duration (hrs)', 'Generated By', 'Payment Method']
+
+
+def legacy_export(db, filepath):
+    """The pre-streaming export_to_excel, kept here for comparison"""
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment
+    data = [[p[0], p[1], p[2], p[3], p[4], p[5], p[7]] for p in db.list_payments()]
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for col, header in enumerate(HEADERS, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.alignment = Alignment(horizontal="center")
+    for row_idx, row_data in enumerate(data, 2):
+        for col_idx, value in enumerate(row_data, 1):
+            ws.cell(row=row_idx, column=col_idx, value=value)
+    for column in ws.columns:
+        max_length = max(len(str(cell.value)) for cell in column)
+        ws.column_dimensions[column[0].column_letter].width = min(max_length + 2, 50)
+    wb.save(filepath)
+
+
+def stream_export(db, filepath):
+    from utils.excel_exporter import export_rows_to_excel
+    rows = ((p[0], p[1], p[2], p[3], p[4], p[5], p[7]) for p in db.iter_payments())
+    export_rows_to_excel(rows, HEADERS, filepath)
+
+
+def peak_rss_kb():
+    """Peak RSS of this process (VmHWM on Linux: ru_maxrss survives exec from a bigger parent)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(mode, db_path, out_path):
+    from models import DB
+    db = DB(db_path)
+    base_kb = peak_rss_kb()
+    start = time.perf_counter()
+    (legacy_export if mode == "legacy" else stream_export)(db, out_path)
+    elapsed = time.perf_counter() - start
+    db.close()
+    peak_kb = peak_rss_kb()
+    print(f"{elapsed:.3f} {peak_kb} {peak_kb - base_kb}")
+
+
+def run(mode, db_path):
+    out_path = db_path + f".{mode}.xlsx"
+    result = subprocess.run([sys.executable, __file__, "--child", mode, db_path, out_path],
+                            capture_output=True, text=True, check=True)
+    elapsed, peak_kb, growth_kb = result.stdout.split()
+    size_mb = os.path.getsize(out_path) / 1e6
+    os.remove(out_path)
+    return float(elapsed), int(peak_kb) / 1024, int(growth_kb) / 1024, size_mb
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sizes = [int(a) for a in args] or [100_000, 1_000_000]
+    for rows in sizes:
+        with temp_db() as db:
+            bulk_payments(db, rows)
+            db.flush()
+            db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            db_path = db.pool.path
+            modes = ["stream"]
+            if rows <= 200_000 or "--legacy-all" in sys.argv:
+                modes.insert(0, "legacy")
+            for mode in modes:
+                elapsed, peak_mb, growth_mb, size_mb = run(mode, db_path)
+                print(f"{rows:>9} payments  {mode:<6} {elapsed:7.1f} s  peak RSS {peak_mb:5.0f} MB"
+                      f" (growth {growth_mb:5.0f} MB)  file {size_mb:5.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:5])
+    else:
+        main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: time to first paint of the Vehicles and Payments tables
+
+Compares the old refresh (every row inserted into the Treeview) with
+PagedTree.reset (one keyset page). Without a display only the DB fetch and
+row building are timed, which is the lower bound for the old path.
+
+Usage: python benchmarks/bench_paged_tree.py
+"""
+
+from _common import temp_db, bulk_history, bulk_payments, timed
+
+
+def make_tree():
+    """Return a hidden Treeview, or None when there is no display"""
+    import tkinter as tk
+    from tkinter import ttk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    cols = ("id", "number", "type", "user", "slot_id", "entry_time", "exit_time", "payment_method")
+    return ttk.Treeview(root, columns=cols, show="headings")
+
+
+def old_refresh(tree, rows):
+    if tree is None:
+        return [tuple(r) for r in rows]
+    tree.delete(*tree.get_children())
+    for row in rows:
+        tree.insert("", "end", values=row)
+    tree.update_idletasks()
+
+
+def main():
+    from views.paged_tree import PagedTree
+    tree = make_tree()
+    if tree is None:
+        print("no display: timing DB fetch + row building only")
+    for size in (10_000, 100_000, 1_000_000):
+        with temp_db() as db:
+            bulk_history(db, size, open_visits=0)
+            bulk_payments(db, size)
+            repeat = 1 if size >= 1_000_000 else 3
+            old_v = timed(lambda: old_refresh(tree, db.list_parked()), repeat)
+            old_p = timed(lambda: old_refresh(tree, [r[:7] for r in db.list_payments()]), repeat)
+            if tree is None:
+                new_v = timed(lambda: db.list_vehicles_page(limit=100), 50)
+                new_p = timed(lambda: [r[:7] for r in db.list_payments_page(limit=100)], 50)
+            else:
+                pager = PagedTree(tree)
+                new_v = timed(lambda: (pager.reset(db.list_vehicles_page), tree.update_idletasks()), 20)
+                new_p = timed(lambda: (pager.reset(db.list_payments_page), tree.update_idletasks()), 20)
+            print(f"{size:>9} rows  vehicles full {old_v * 1e3:9.1f} ms  paged {new_v * 1e3:6.2f} ms"
+                  f"  |  payments full {old_p * 1e3:9.1f} ms  paged {new_p * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
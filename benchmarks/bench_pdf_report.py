@@ -0,0 +1,58 @@
+"""
+Benchmark: full-history PDF reports with the streaming report engine
+
+Times utils.report_generator.build_report for a 200k-row payments report
+(pages per second, rows per second, file size). For reference it also times
+the old approach, one platypus Table over every row, on a smaller slice.
+
+Usage: python benchmarks/bench_pdf_report.py [rows] [platypus_rows]   (default: 200000 5000)
+"""
+
+import os
+import sys
+import time
+
+from _common import temp_db, bulk_payments
+
+
+def platypus_report(db, filepath, limit):
+    """The old export_pdf layout without the [:50] cut-off"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+    data = [['Vehicle', 'Amount', 'Duration (hrs)', 'Paid At']]
+    for p in db.list_payments()[:limit]:
+        data.append([p[1], f"{p[2]:.2f}", f"{p[4]:.2f}", p[3][:16]])
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    SimpleDocTemplate(filepath, pagesize=letter).build([table])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    platypus_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    from utils.report_generator import build_report
+    with temp_db() as db:
+        bulk_payments(db, rows)
+        out = os.path.join(os.path.dirname(db.pool.path), "report.pdf")
+
+        start = time.perf_counter()
+        done, pages = build_report(db, "payments", out)
+        elapsed = time.perf_counter() - start
+        print(f"stream engine: {done} rows, {pages} pages in {elapsed:.1f} s  "
+              f"({pages / elapsed:.0f} pages/s, {done / elapsed:.0f} rows/s, {os.path.getsize(out) / 1e6:.1f} MB)")
+
+        start = time.perf_counter()
+        platypus_report(db, out, platypus_rows)
+        elapsed = time.perf_counter() - start
+        print(f"single platypus Table: {platypus_rows} rows in {elapsed:.1f} s  ({platypus_rows / elapsed:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: plate lookups on the canonical key vs the plate as typed
+
+Seeds `rows` visits whose plates were typed inconsistently ("UAX 123A",
+"uax123a", "UAX-123A", ...), plus the old index on the typed number, then
+looks plates up as an operator would retype them:
+
+  typed number=?        the old exact match: indexed, but misses every visit
+                        typed differently from the lookup
+  normalized scan       matching every spelling without a key column:
+                        UPPER(REPLACE(...)) over the whole table
+  number_key=?          get_last_vehicle_record on the indexed key
+
+and reports how many of the lookups found the vehicle each way. An all-digit
+plate is also looked up as an int, the way ttk.Treeview hands it back.
+
+Usage: python benchmarks/bench_plate_keys.py [rows] [lookups]   (default: 1000000 200)
+"""
+
+import random
+import sys
+import time
+
+from _common import temp_db
+from utils.plates import plate_key
+
+LETTERS = "ABCDEFGHJKLMNPRSTUVWXYZ"
+SPELLINGS = (lambda p: p, lambda p: p.lower(), lambda p: p.replace(" ", ""),
+             lambda p: p.replace(" ", "-"), lambda p: p.lower().replace(" ", ""))
+
+
+def seed(db, rows, rng, chunk=200000):
+    from utils.helpers import to_epoch
+    entry, exit_ = "2025-01-01 08:00:00", "2025-01-01 10:00:00"
+    entry_ts, exit_ts = to_epoch(entry), to_epoch(exit_)
+    plates = []
+    for start in range(0, rows, chunk):
+        batch = []
+        for _ in range(start, min(rows, start + chunk)):
+            plate = f"U{rng.choice('ABCDEFG')}{rng.choice(LETTERS)} {rng.randint(100, 999)}{rng.choice(LETTERS)}"
+            number = rng.choice(SPELLINGS)(plate)
+            plates.append(plate)
+            batch.append((number, plate_key(number), "Car", "admin", 1, entry, exit_, "cash", entry_ts, exit_ts))
+        with db.transaction() as cur:
+            cur.executemany("""
+                INSERT INTO vehicles(number,number_key,type,user,slot_id,entry_time,exit_time,payment_method,entry_ts,exit_ts)
+                VALUES(?,?,?,?,?,?,?,?,?,?)
+            """, batch)
+    with db.transaction() as cur:
+        # the pre-migration index, for the "typed" side
+        cur.execute("CREATE INDEX bench_vehicles_number ON vehicles(number)")
+    db.conn.execute("ANALYZE")
+    return plates
+
+
+def run(label, lookup, numbers):
+    start = time.perf_counter()
+    found = sum(1 for number in numbers if lookup(number))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20}{elapsed / len(numbers) * 1e6:>12.1f} us{found:>8}/{len(numbers)} found")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(5)
+    with temp_db() as db:
+        start = time.perf_counter()
+        plates = seed(db, rows, rng)
+        print(f"seeded {rows} visits in {time.perf_counter() - start:.0f} s")
+        # the operator retypes a known plate in any spelling
+        numbers = [rng.choice(SPELLINGS)(rng.choice(plates)) for _ in range(lookups)]
+        typed = "SELECT id FROM vehicles WHERE number=? ORDER BY id DESC LIMIT 1"
+        normalized = ("SELECT id FROM vehicles WHERE UPPER(REPLACE(REPLACE(number, ' ', ''), '-', '')) = ?"
+                      " ORDER BY id DESC LIMIT 1")
+        print(f"{'':<20}{'per lookup':>15}{'hits':>15}")
+        run("typed number=?", lambda n: db.conn.execute(typed, (n,)).fetchone(), numbers)
+        run("normalized scan", lambda n: db.conn.execute(normalized, (plate_key(n),)).fetchone(), numbers[:max(1, lookups // 20)])
+        run("number_key=?", db.get_last_vehicle_record, numbers)
+        db.create_slot("N1", "Car", 1000)
+        db.park_in_free_slot("12345", "Car", "admin", "2025-01-01 08:00:00")
+        row = db.get_last_vehicle_record(12345)
+        assert row is not None and row[1] == "12345", row
+        print("all-digit plate looked up as an int: found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: substring plate search, LIKE scan vs the trigram FTS5 index
+
+Seeds N vehicle visits with varied plates (the search index is kept in step
+by its triggers, as in the app), then times search_vehicles for a full plate
+typed with different spacing, partial plates of 3-4 characters and a
+2-character term (too short for trigrams: falls back to LIKE). "LIKE scan"
+is the old query, every match from a full table scan; "first page" is
+search_vehicles(term, limit=50), "next page" its keyset continuation
+(before_id) and "all matches" search_vehicles(term) without a limit.
+Also reports what the index costs each park_vehicle.
+
+Usage: python benchmarks/bench_plate_search.py [rows ...]   (default: 1000000 10000000)
+"""
+
+import random
+import sys
+import time
+
+from _common import temp_db, timed
+from utils.plates import plate_key
+
+LETTERS = "ABCDEFGHJKLMNPRSTUVWXYZ"
+OLD_QUERY = ("SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles "
+             "WHERE 1=1 AND (number LIKE ? OR user LIKE ?) ORDER BY id DESC")
+
+
+def plate(rng):
+    return f"U{rng.choice('ABCDEFG')}{rng.choice(LETTERS)} {rng.randint(100, 999)}{rng.choice(LETTERS)}"
+
+
+def seed(db, rows, chunk=200000):
+    from utils.helpers import to_epoch
+    rng = random.Random(1)
+    entry, exit_ = "2025-01-01 08:00:00", "2025-01-01 10:00:00"
+    entry_ts, exit_ts = to_epoch(entry), to_epoch(exit_)
+    users = [f"user{n:03d}" for n in range(50)]
+    for start in range(0, rows, chunk):
+        plates = [plate(rng) for _ in range(start, min(rows, start + chunk))]
+        batch = [(number, plate_key(number), "Car", users[i % 50], 1, entry, exit_, "cash", entry_ts, exit_ts)
+                 for i, number in enumerate(plates, start)]
+        with db.transaction() as cur:
+            cur.executemany("""
+                INSERT INTO vehicles(number,number_key,type,user,slot_id,entry_time,exit_time,payment_method,entry_ts,exit_ts)
+                VALUES(?,?,?,?,?,?,?,?,?,?)
+            """, batch)
+
+
+def ms(fn, repeat):
+    return timed(fn, repeat) * 1000
+
+
+def run(rows):
+    with temp_db() as db:
+        db.create_slot("A1", "Car", 1000)
+        start = time.perf_counter()
+        seed(db, rows)
+        elapsed = time.perf_counter() - start
+        db.flush()
+        print(f"\n{rows:,} visits seeded in {elapsed:.0f} s ({rows / elapsed:,.0f} rows/s with the index triggers)")
+        known = db.conn.execute("SELECT number FROM vehicles WHERE id = ?", (rows // 2,)).fetchone()[0]
+        terms = [known, known.lower().replace(" ", "-"), known[1:5], known[4:7], known[:2]]
+        print(f"{'term':<12} {'matches':>8} {'LIKE scan':>11} {'first page':>11} {'next page':>10} {'all matches':>12}")
+        for term in terms:
+            key = plate_key(term)
+            like = ms(lambda: db.conn.execute(OLD_QUERY, (f"%{term}%", f"%{term}%")).fetchall(), 1)
+            matches = len(db.search_vehicles(term))
+            first = ms(lambda: db.search_vehicles(term, limit=50), 5)
+            page = db.search_vehicles(term, limit=50)
+            following = ms(lambda: db.search_vehicles(term, limit=50, before_id=page[-1][0]), 5) if len(page) == 50 else 0
+            everything = ms(lambda: db.search_vehicles(term), 1)
+            print(f"{term!r:<12} {matches:>8} {like:>9.1f}ms {first:>9.2f}ms {following:>8.2f}ms {everything:>10.1f}ms"
+                  f"{'  (LIKE fallback)' if len(key) < 3 else ''}")
+
+        def park_exit():
+            db.park_vehicle("BENCH 001A", "Car", "admin", 1, "2025-02-01 08:00:00")
+            db.exit_vehicle("BENCH 001A", "2025-02-01 09:00:00")
+        with_index = timed(park_exit, 500)
+        with db.transaction() as cur:
+            for name in ("insert", "update", "delete"):
+                cur.execute(f"DROP TRIGGER trg_vehicles_search_{name}")
+        without = timed(park_exit, 500)
+        print(f"park_vehicle + exit_vehicle: {with_index * 1e6:.0f} us with the index, {without * 1e6:.0f} us without")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000000, 10000000]
+    for rows in sizes:
+        run(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: scalar stay_fee() loop vs vectorised batch_fees()
+
+Prices `stays` synthetic stays (random entry times, 10 minutes to 12 hours,
+a mix of cars and motorcycles, some slots with custom rates) both ways and
+checks the two agree. Then loads the same stays into a temporary database
+and times tariff_what_if() end to end (query + parse + price).
+
+Usage: python benchmarks/bench_pricing.py [stays]   (default: 1000000)
+"""
+
+import datetime
+import random
+import sys
+import time
+
+from _common import temp_db
+
+
+def synthetic_stays(count, seed=7):
+    rng = random.Random(seed)
+    start = datetime.datetime(2025, 1, 1)
+    fmt = "%Y-%m-%d %H:%M:%S"
+    entries, exits, types, rates = [], [], [], []
+    for _ in range(count):
+        entry = start + datetime.timedelta(seconds=rng.randrange(365 * 86400))
+        entries.append(entry.strftime(fmt))
+        exits.append((entry + datetime.timedelta(seconds=rng.randrange(600, 12 * 3600))).strftime(fmt))
+        types.append("Car" if rng.random() < 0.7 else "Motorcycle")
+        rates.append(rng.choice((None, 0, 1500.0)))
+    return entries, exits, types, rates
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    from utils.pricing import stay_fee, batch_fees, tariff_what_if
+    entries, exits, types, rates = synthetic_stays(count)
+
+    start = time.perf_counter()
+    scalar = [stay_fee(*stay) for stay in zip(entries, exits, types, rates)]
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    amounts, durations = batch_fees(entries, exits, types, rates)
+    batch_s = time.perf_counter() - start
+
+    mismatches = sum(1 for (a, d), b, e in zip(scalar, amounts.tolist(), durations.tolist())
+                     if abs(a - b) > 0.005 or d != e)
+    print(f"{count} stays  scalar {scalar_s:6.2f} s ({count / scalar_s:9.0f}/s)"
+          f"  batch {batch_s:6.3f} s ({count / batch_s:10.0f}/s)  x{scalar_s / batch_s:.0f}"
+          f"  mismatches {mismatches}")
+
+    with temp_db() as db:
+        for name, rate in (("A1", 0), ("A2", 1500.0)):
+            db.create_slot(name, "Both", rate)
+        slot_ids = [s[0] for s in db.list_slots()]
+        with db.transaction() as cur:
+            cur.executemany("INSERT INTO vehicles(number,type,user,slot_id,entry_time,exit_time,payment_method)"
+                            " VALUES(?,?,?,?,?,?,?)",
+                            ((f"UAX{i:07d}", t, "admin", slot_ids[i % 2], e, x, "cash")
+                             for i, (e, x, t) in enumerate(zip(entries, exits, types))))
+        start = time.perf_counter()
+        result = tariff_what_if(db, car_rate=1200, motor_rate=600)
+        print(f"tariff_what_if over {result['stays']} stays from the database: {time.perf_counter() - start:.2f} s"
+              f"  ({result['change_pct']:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Benchmark: revenue totals and daily chart from revenue_daily vs raw payments
+
+Usage: python benchmarks/bench_revenue_rollup.py
+"""
+
+from _common import temp_db, bulk_payments, timed
+
+
+RAW_DAILY = """
+    SELECT DATE(paid_at) as date, SUM(amount) as revenue
+    FROM payments
+    WHERE paid_at >= DATE('now', '-' || ? || ' days')
+    GROUP BY DATE(paid_at)
+    ORDER BY date
+"""
+
+
+def main():
+    for count in (100_000, 1_000_000):
+        with temp_db() as db:
+            bulk_payments(db, count)
+            assert db.get_revenue_stats() == db._scan_revenue_stats()
+            raw_daily = lambda: db.conn.execute(RAW_DAILY, (30,)).fetchall()
+            assert raw_daily() == db.get_daily_revenue(30)
+
+            scan = timed(db._scan_revenue_stats, 5)
+            rollup = timed(db.get_revenue_stats, 50)
+            print(f"{count:>9} payments  total: payments {scan * 1e3:8.2f} ms  rollup {rollup * 1e3:6.3f} ms")
+            scan = timed(raw_daily, 5)
+            rollup = timed(lambda: db.get_daily_revenue(30), 50)
+            print(f"{'':>9}           30-day chart: payments {scan * 1e3:8.2f} ms  rollup {rollup * 1e3:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Benchmark: free-slot allocation and occupancy stats through SlotIndex vs SQL
+
+Usage: python benchmarks/bench_slot_index.py
+"""
+
+from _common import temp_db, bulk_slots, timed
+
+
+def run(slot_count, repeat=2000):
+    with temp_db() as db:
+        # almost every slot taken: the worst case for the scan
+        bulk_slots(db, slot_count, occupied_ratio=0.99)
+        sql = timed(lambda: db.scan_free_slot_for_type("Car"), repeat)
+        idx = timed(lambda: db.get_free_slot_for_type("Car"), repeat)
+        print(f"{slot_count:>7} slots  free slot:  sql scan {sql * 1e6:9.1f} us  index    {idx * 1e6:6.2f} us  ({sql / idx:,.0f}x)")
+        group_by = lambda: db.conn.execute("SELECT status, COUNT(*) FROM slots GROUP BY status").fetchall()
+        sql = timed(group_by, 50)
+        idx = timed(db.get_occupancy_stats, repeat)
+        print(f"{'':>13}occupancy:  GROUP BY {sql * 1e6:9.1f} us  counters {idx * 1e6:6.2f} us  ({sql / idx:,.0f}x)")
+        assert not db.check_occupancy_counters()
+
+
+def main():
+    for n in (10_000, 100_000):
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
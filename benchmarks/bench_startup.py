@@ -0,0 +1,88 @@
+"""
+Benchmark: cold-start cost of the application
+
+1. `python -X importtime -c "import main"`: total import time, slowest
+   modules, and whether matplotlib/reportlab/openpyxl load at startup.
+2. Time to login window: `main.py` (and the PyInstaller build, if present)
+   run with PARKING_STARTUP_PROBE=1, which draws the login window and exits.
+   Each run uses a throwaway copy of the database (PARKING_DB). This step
+   needs a display.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--exe dist/SmartParkingSystem/SmartParkingSystem]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import ROOT
+
+HEAVY = ("matplotlib", "reportlab", "openpyxl", "numpy", "PIL")
+DEFAULT_EXE = os.path.join(ROOT, "dist", "SmartParkingSystem",
+                           "SmartParkingSystem.exe" if sys.platform == "win32" else "SmartParkingSystem")
+
+
+def import_profile():
+    """Return [(module, self_us, cumulative_us)] for `import main`"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative)))
+    return rows
+
+
+def time_to_login(cmd, runs):
+    """Median wall time of `cmd` with the startup probe, on a copy of the database"""
+    tmpdir = tempfile.mkdtemp(prefix="parking_startup_")
+    source = os.path.join(ROOT, "parking_system_upgraded.db")
+    db_path = os.path.join(tmpdir, "startup.db")
+    env = dict(os.environ, PARKING_STARTUP_PROBE="1", PARKING_DB=db_path)
+    times = []
+    try:
+        for _ in range(runs):
+            if os.path.exists(source):
+                shutil.copy(source, db_path)
+            start = time.perf_counter()
+            subprocess.run(cmd, cwd=ROOT, env=env, check=True, capture_output=True)
+            times.append(time.perf_counter() - start)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", default=DEFAULT_EXE, help="PyInstaller build to time (skipped if missing)")
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = [next(cum for name, _, cum in rows if name == "main") for rows in profiles]
+    print(f"import main: {statistics.median(totals) / 1000:.1f} ms (median of {args.runs})")
+    print("slowest modules (self time, last run):")
+    for name, self_us, _ in sorted(profiles[-1], key=lambda r: -r[1])[:10]:
+        print(f"  {self_us / 1000:7.1f} ms  {name}")
+    loaded = sorted({name.split(".")[0] for name, _, _ in profiles[-1]} & set(HEAVY))
+    print(f"heavy libraries loaded at startup: {', '.join(loaded) or 'none'}")
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("no display: skipping time to login window")
+        return
+    print(f"time to login window (source): {time_to_login([sys.executable, 'main.py'], args.runs) * 1e3:.0f} ms")
+    if os.path.exists(args.exe):
+        print(f"time to login window (PyInstaller build): {time_to_login([args.exe], args.runs) * 1e3:.0f} ms")
+    else:
+        print(f"no PyInstaller build at {args.exe}: skipping")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark: park/exit/pay cycles per second under each storage profile
+
+Usage: python benchmarks/bench_storage_profiles.py [cycles]
+"""
+
+import sys
+import time
+
+from _common import temp_db
+from models.database import STORAGE_PROFILES
+
+
+def cycle(db, i):
+    slot = db.get_free_slot_for_type("Car")
+    number = f"UAX{i:06d}"
+    db.park_vehicle(number, "Car", "admin", slot[0], "2025-01-01 08:00:00")
+    db.exit_vehicle(number, "2025-01-01 10:00:00")
+    db.record_payment(number, 2000.0, 2.0, "admin", "")
+
+
+def run(profile, cycles, batched=False):
+    with temp_db(profile=profile) as db:
+        for i in range(10):
+            db.create_slot(f"A{i}", "Car", 1000)
+        start = time.perf_counter()
+        if batched:
+            with db.transaction():
+                for i in range(cycles):
+                    cycle(db, i)
+        else:
+            for i in range(cycles):
+                cycle(db, i)
+        db.flush()
+        elapsed = time.perf_counter() - start
+    label = profile + (" + transaction()" if batched else "")
+    print(f"{label:<28} {cycles / elapsed:10.1f} cycles/s")
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    for profile in STORAGE_PROFILES:
+        run(profile, cycles)
+    run("balanced", cycles, batched=True)
+
+
+if __name__ == "__main__":
+    main()
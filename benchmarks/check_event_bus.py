@@ -0,0 +1,109 @@
+"""
+Check: DB change events and their per-frame batching for the UI
+
+1. every write method publishes its event with the expected payload
+2. writes inside an outer transaction publish on commit, and not at all
+   if it rolls back
+3. a burst of 500 gate events published on the Tk thread reaches a
+   subscribe_ui handler as one batch (one redraw); events from a worker
+   thread arrive on the next idle poll
+
+The Tk main loop is stood in for by FrameClock, which runs after()
+callbacks in time order without a display.
+
+Usage: python benchmarks/check_event_bus.py   (exit code 1 on failure)
+"""
+
+import heapq
+import itertools
+import sys
+import threading
+
+from _common import temp_db
+
+
+class FrameClock:
+    """Minimal widget.after() scheduler driven by advance()"""
+
+    def __init__(self):
+        self.now = 0
+        self._queue = []
+        self._ids = itertools.count()
+
+    def after(self, ms, callback, *args):
+        heapq.heappush(self._queue, (self.now + ms, next(self._ids), callback, args))
+
+    def advance(self, ms):
+        end = self.now + ms
+        while self._queue and self._queue[0][0] <= end:
+            self.now, _, callback, args = heapq.heappop(self._queue)
+            callback(*args)
+        self.now = end
+
+
+def check(name, ok, detail=""):
+    print(f"[{'  ok' if ok else 'FAIL'}] {name}{': ' + detail if detail and not ok else ''}")
+    return ok
+
+
+def main():
+    results = []
+    with temp_db() as db:
+        seen = []
+        db.events.subscribe(("vehicle_parked", "vehicle_exited", "payment_recorded", "slots_changed"),
+                            lambda topic, payload: seen.append((topic, payload)))
+
+        db.create_slot("A1", "Car", 1000)
+        db.park_vehicle("UAX001", "Car", "admin", 1, "2025-01-01 08:00:00")
+        db.exit_vehicle("UAX001", "2025-01-01 10:00:00")
+        db.record_payment("UAX001", 2000.0, 2.0, "admin", "", "cash")
+        topics = [t for t, _ in seen]
+        results.append(check("write methods publish", topics == ["slots_changed", "vehicle_parked", "vehicle_exited",
+                                                                 "payment_recorded"], str(topics)))
+        results.append(check("park payload", seen[1][1]["number"] == "UAX001" and seen[1][1]["slot_id"] == 1
+                             and seen[1][1]["id"] is not None, str(seen[1][1])))
+
+        seen.clear()
+        with db.transaction():
+            db.park_vehicle("UAX002", "Car", "admin", 1, "2025-01-01 11:00:00")
+            results.append(check("deferred until commit", not seen, str(seen)))
+        results.append(check("published on commit", [t for t, _ in seen] == ["vehicle_parked"], str(seen)))
+
+        seen.clear()
+        try:
+            with db.transaction():
+                db.exit_vehicle("UAX002", "2025-01-01 12:00:00")
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        results.append(check("rolled back writes publish nothing", not seen, str(seen)))
+
+        db.create_slot("A2", "Car", 1000)  # a free slot for the worker thread's park
+        clock = FrameClock()
+        batches = []
+        db.events.subscribe_ui(("vehicle_parked",), batches.append)
+        db.events.attach(clock, frame_ms=16, idle_ms=100)
+        for i in range(500):
+            db.events.publish("vehicle_parked", id=i, number=f"B{i}", type="Car", user="admin", slot_id=None,
+                              entry_time="2025-01-01 08:00:00", payment_method="cash")
+        clock.advance(16)
+        results.append(check("burst coalesced into one frame", [len(b) for b in batches] == [500],
+                             str([len(b) for b in batches])))
+
+        batches.clear()
+        worker = threading.Thread(target=lambda: db.park_vehicle("W1", "Car", "gate1", 2, "2025-01-01 13:00:00"))
+        worker.start()
+        worker.join()
+        clock.advance(16)
+        early = len(batches)
+        clock.advance(100)
+        results.append(check("worker events arrive on the idle poll", early == 0 and len(batches) == 1,
+                             f"after 16 ms: {early}, after 116 ms: {len(batches)}"))
+        db.events.detach()
+
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Check: opt-in instrumentation of DB methods and page refreshes
+
+1. while enabled, calls, rows (lists, single rows and streamed iter_*
+   results), errors and SQL statements are recorded per method
+2. page.refresh() is timed, and profile_page runs exactly one refresh under
+   cProfile
+3. disable() removes every wrapper; the JSON and CSV dumps round-trip
+4. per-call overhead of the wrappers on a cheap query
+
+Usage: python benchmarks/check_instrumentation.py   (exit code 1 on failure)
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import types
+
+from _common import temp_db, bulk_history, timed
+
+
+def check(name, ok, detail=""):
+    print(f"[{'  ok' if ok else 'FAIL'}] {name}{': ' + detail if detail and not ok else ''}")
+    return ok
+
+
+def main():
+    from utils.instrumentation import Instrumentation
+    results = []
+    with temp_db() as db:
+        bulk_history(db, 2000, open_visits=30)
+        instruments = Instrumentation()
+        refreshes = []
+        original_refresh = lambda: refreshes.append(db.list_active_vehicles(limit=20))
+        page = types.SimpleNamespace(refresh=original_refresh)
+        instruments.enable(db, {"DashboardPage": page})
+
+        db.create_slot("A1", "Car", 1000)
+        db.list_active_vehicles(limit=20)
+        db.get_last_vehicle_record("UAX0000001")
+        rows = sum(1 for _ in db.iter_vehicles())
+        try:
+            db.create_slot("A1", "Car", 1000)  # duplicate name
+        except sqlite3.IntegrityError:
+            pass
+        page.refresh()
+        instruments.profile_page = "DashboardPage"
+        page.refresh()
+        page.refresh()
+
+        stats = instruments.snapshot()
+        results.append(check("list rows counted", stats["db"]["list_active_vehicles"]["rows"] == 20 * 4,
+                             str(stats["db"].get("list_active_vehicles"))))
+        results.append(check("single row counted", stats["db"]["get_last_vehicle_record"]["rows"] == 1))
+        results.append(check("streamed rows counted", stats["db"]["iter_vehicles"]["rows"] == rows == 2030,
+                             str(stats["db"].get("iter_vehicles"))))
+        results.append(check("errors counted", stats["db"]["create_slot"]["calls"] == 2
+                             and stats["db"]["create_slot"]["errors"] == 1, str(stats["db"].get("create_slot"))))
+        results.append(check("SQL traced", stats["statements"] > 0 and stats["recent_sql"]))
+        results.append(check("page refresh timed", stats["pages"]["DashboardPage"]["calls"] == 3))
+        results.append(check("one refresh profiled", instruments.last_profile is not None
+                             and instruments.last_profile[0] == "DashboardPage"
+                             and "list_active_vehicles" in instruments.last_profile[1]
+                             and instruments.profile_page is None))
+
+        tmpdir = tempfile.mkdtemp(prefix="parking_bench_")
+        with open(instruments.dump_json(os.path.join(tmpdir, "d.json"))) as f:
+            dumped = json.load(f)
+        with open(instruments.dump_csv(os.path.join(tmpdir, "d.csv"))) as f:
+            table = list(csv.DictReader(f))
+        results.append(check("JSON dump", dumped["db"]["iter_vehicles"]["rows"] == 2030))
+        results.append(check("CSV dump", any(r["name"] == "list_active_vehicles" and r["calls"] == "4" for r in table)))
+
+        enabled = timed(lambda: db.get_last_vehicle_record("UAX0000001"), 20000)
+        instruments.disable()
+        wrapped = [n for n, v in vars(db).items() if getattr(v, "_instrumented", False)]
+        results.append(check("wrappers removed", not wrapped and page.refresh is original_refresh, str(wrapped)))
+        disabled = timed(lambda: db.get_last_vehicle_record("UAX0000001"), 20000)
+        print(f"       get_last_vehicle_record: {disabled * 1e6:.1f} us off, {enabled * 1e6:.1f} us on "
+              f"({(enabled - disabled) * 1e6:+.1f} us per call)")
+
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
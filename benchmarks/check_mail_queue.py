@@ -0,0 +1,209 @@
+"""
+Functional check for utils.email_sender.MailQueue against a local SMTP stand-in
+
+Runs a minimal plain-text SMTP server on 127.0.0.1 and checks session reuse,
+persistence across a restart, retry with backoff, permanent failures, stale
+session recovery, pausing while email is disabled, surviving database errors,
+and how long enqueue() blocks compared with a synchronous send.
+
+Usage: python benchmarks/check_mail_queue.py   (exit code 1 on failure)
+"""
+
+import smtplib
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+
+from _common import temp_db
+
+from utils.email_sender import EMAIL_SETTINGS, MailQueue
+
+
+class StandInSMTP(socketserver.ThreadingTCPServer):
+    """Tiny SMTP server: counts sessions and messages, can be slow or flaky"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.sessions = 0
+        self.messages = []
+        self.greeting_delay = 0.0
+        self.drop_after_message = False
+        self.rejected = set()
+        self.lock = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        time.sleep(server.greeting_delay)
+        self.reply("220 stand-in ready")
+        rcpt = []
+        while True:
+            line = self.rfile.readline().decode(errors="replace").strip()
+            if not line:
+                return
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stand-in")
+            elif verb == "MAIL":
+                rcpt = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = line.split(":", 1)[1].strip(" <>")
+                if address in server.rejected:
+                    self.reply("550 no such user")
+                else:
+                    rcpt.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 end with .")
+                while self.rfile.readline().rstrip(b"\r\n") != b".":
+                    pass
+                with server.lock:
+                    server.messages.extend(rcpt)
+                self.reply("250 queued")
+                if server.drop_after_message:
+                    return
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def main():
+    server = StandInSMTP()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    connect = lambda: smtplib.SMTP("127.0.0.1", port, timeout=10)
+    EMAIL_SETTINGS.update(smtp_server="127.0.0.1", smtp_port=port, sender_email="gate@example.com",
+                          sender_password="x", enabled=True)
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"[{'ok' if ok else 'FAIL':>4}] {name} {detail}")
+        if not ok:
+            failures.append(name)
+
+    with temp_db() as db:
+        # one session for a burst of messages
+        mailer = MailQueue(db, connect=connect)
+        mailer.start()
+        for i in range(20):
+            mailer.enqueue(f"user{i}@example.com", "Receipt", "body")
+        check("burst delivered", wait_for(lambda: len(server.messages) == 20), f"({len(server.messages)}/20)")
+        check("session reused", server.sessions == 1, f"({server.sessions} sessions)")
+        mailer.stop()
+
+        # jobs queued while no worker runs are delivered after a restart
+        for i in range(5):
+            db.queue_email(f"later{i}@example.com", "Receipt", "body")
+        mailer = MailQueue(db, connect=connect)
+        mailer.start()
+        check("delivered after restart", wait_for(lambda: db.count_pending_emails() == 0))
+        mailer.stop()
+
+        # transient connection errors are retried with backoff
+        attempts = []
+
+        def flaky():
+            attempts.append(time.time())
+            if len(attempts) < 3:
+                raise ConnectionRefusedError("stand-in down")
+            return connect()
+
+        results = []
+        mailer = MailQueue(db, connect=flaky, backoff=0.05)
+        mailer.start()
+        email_id = mailer.enqueue("retry@example.com", "Receipt", "body", callback=lambda *r: results.append(r))
+        check("retried until sent", wait_for(lambda: "retry@example.com" in server.messages), f"({len(attempts)} attempts)")
+        row = db.conn.execute("SELECT status, attempts FROM email_outbox WHERE id=?", (email_id,)).fetchone()
+        check("attempts recorded", row == ("sent", 3), str(row))
+        check("callback after first attempt", results[:1] and results[0][0] is False, str(results[:1]))
+        mailer.stop()
+
+        # a 5xx rejection fails the job without retrying
+        server.rejected.add("nobody@example.com")
+        results = []
+        mailer = MailQueue(db, connect=connect, backoff=0.05)
+        mailer.start()
+        email_id = mailer.enqueue("nobody@example.com", "Receipt", "body", callback=lambda *r: results.append(r))
+        check("permanent failure reported", wait_for(lambda: results) and results[0][0] is False, str(results))
+        row = db.conn.execute("SELECT status, attempts FROM email_outbox WHERE id=?", (email_id,)).fetchone()
+        check("permanent failure not retried", row == ("failed", 1), str(row))
+
+        # a session the server dropped is replaced transparently
+        server.drop_after_message = True
+        before = len(server.messages)
+        for i in range(3):
+            mailer.enqueue(f"stale{i}@example.com", "Receipt", "body")
+        check("stale session recovered", wait_for(lambda: len(server.messages) == before + 3))
+        server.drop_after_message = False
+        mailer.stop()
+
+        # while email is disabled the queue pauses without using up attempts
+        EMAIL_SETTINGS["enabled"] = False
+        email_id = db.queue_email("paused@example.com", "Receipt", "body")
+        mailer = MailQueue(db, connect=connect, backoff=0.05, max_attempts=2, idle_timeout=0.05)
+        mailer.start()
+        time.sleep(0.3)
+        row = db.conn.execute("SELECT status, attempts FROM email_outbox WHERE id=?", (email_id,)).fetchone()
+        check("paused while disabled", row == ("pending", 0), str(row))
+        EMAIL_SETTINGS["enabled"] = True
+        mailer.wake()
+        check("resumed when enabled", wait_for(lambda: "paused@example.com" in server.messages))
+
+        # a database error does not kill the worker
+        get_due_emails, failed = db.get_due_emails, []
+
+        def locked(*args, **kwargs):
+            if not failed:
+                failed.append(1)
+                raise sqlite3.OperationalError("database is locked")
+            return get_due_emails(*args, **kwargs)
+
+        db.get_due_emails = locked
+        mailer.enqueue("locked@example.com", "Receipt", "body")
+        check("survives a database error", wait_for(lambda: "locked@example.com" in server.messages) and failed)
+        db.get_due_emails = get_due_emails
+        mailer.stop()
+
+        # enqueue must not block the caller on a slow server
+        server.greeting_delay = 0.5
+        mailer = MailQueue(db, connect=connect)
+        start = time.perf_counter()
+        mailer.enqueue("slow@example.com", "Receipt", "body")
+        queued = time.perf_counter() - start
+        start = time.perf_counter()
+        smtp = connect()
+        smtp.sendmail("gate@example.com", ["sync@example.com"], "Subject: x\r\n\r\nbody")
+        smtp.quit()
+        direct = time.perf_counter() - start
+        print(f"       caller blocked: enqueue {queued * 1e3:.1f} ms, synchronous send {direct * 1e3:.1f} ms")
+        check("enqueue does not wait for SMTP", queued < direct / 5)
+
+    server.shutdown()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
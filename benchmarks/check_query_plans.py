@@ -0,0 +1,93 @@
+"""
+Query-plan regression check for the indexed DB methods
+
+Calls each DB method against a small seeded database, captures the SQL it
+runs through sqlite3's trace callback and asserts that EXPLAIN QUERY PLAN
+searches an index instead of scanning the vehicles/payments tables.
+
+Usage: python benchmarks/check_query_plans.py   (exit code 1 on regression)
+"""
+
+import sys
+
+from _common import temp_db
+
+
+# "method" or "method(variant)" -> (args, kwargs)
+INDEXED_CALLS = {
+    "exit_vehicle": (("UAX123A", "2025-01-02 10:00:00"), {}),
+    "get_last_vehicle_record": (("UAX123A",), {}),
+    "list_active_vehicles(user)": ((), {"user": "admin"}),
+    "search_vehicles": (("",), {"date_from": "2025-01-01", "date_to": "2025-01-31"}),
+    "search_payments": (("",), {"date_from": "2025-01-01", "date_to": "2025-01-31"}),
+    "search_vehicles(plate)": (("uax 12",), {"limit": 50}),
+    "search_vehicles(plate, range, next page)": (("P1",), {"date_from": "2025-01-01", "limit": 50, "before_id": 100}),
+    "search_payments(plate)": (("p19",), {"limit": 50}),
+    "get_revenue_stats": ((), {"date_from": "2025-01-01", "date_to": "2025-01-31"}),
+    "get_daily_revenue": ((7,), {}),
+    "list_active_vehicles": ((), {"limit": 20}),
+    "count_active_vehicles": ((), {}),
+    "list_vehicles_page(before)": ((), {"before_id": 150}),
+    "list_vehicles_page(after)": ((), {"after_id": 50}),
+    "list_payments_page(before)": ((), {"before_id": 150}),
+    "iter_payments(range)": (("2025-01-01", "2025-01-31 23:59:59"), {}),
+    "count_payments(range)": (("2025-01-01", "2025-01-31 23:59:59"), {}),
+    "iter_vehicles(range)": (("2025-01-01", "2025-01-31 23:59:59"), {}),
+    "count_vehicle_records(range)": (("2025-01-01", "2025-01-31 23:59:59"), {}),
+    "list_unpaid_exits(range)": (("2025-01-01", "2025-01-01 23:59:59"), {}),
+    "iter_stays(range)": (("2025-01-01", "2025-01-31 23:59:59"), {}),
+}
+
+HOT_TABLES = ("vehicles", "payments")
+
+
+def seed(db):
+    db.create_slot("A1", "Car", 1000)
+    with db.transaction() as cur:
+        for i in range(200):
+            cur.execute("INSERT INTO vehicles(number,type,user,slot_id,entry_time,exit_time) VALUES(?,?,?,?,?,?)",
+                        (f"P{i}", "Car", "admin", 1, "2025-01-01 08:00:00", "2025-01-01 09:00:00"))
+            cur.execute("INSERT INTO payments(vehicle_number,amount,paid_at,duration_hours,generated_by) VALUES(?,?,?,?,?)",
+                        (f"P{i}", 1000, "2025-01-01 09:00:00", 1.0, "admin"))
+    db.park_vehicle("UAX123A", "Car", "admin", 1, "2025-01-02 08:00:00")
+
+
+def capture(db, method, args, kwargs):
+    statements = []
+    db.set_trace_callback(statements.append)
+    try:
+        result = getattr(db, method.split("(")[0])(*args, **kwargs)
+        if hasattr(result, "__next__"):
+            for _ in result:  # streaming methods run their SQL lazily
+                pass
+    finally:
+        db.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))]
+
+
+def scans(db, sql):
+    """Return the plan lines that scan a hot table without an index"""
+    detail = [row[-1] for row in db.conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    return [d for d in detail
+            if d.startswith("SCAN") and "INDEX" not in d and any(t in d.split() for t in HOT_TABLES)]
+
+
+def main():
+    failures = 0
+    with temp_db() as db:
+        seed(db)
+        for method, (args, kwargs) in INDEXED_CALLS.items():
+            for sql in capture(db, method, args, kwargs):
+                bad = scans(db, sql)
+                status = "FAIL" if bad else "ok"
+                failures += bool(bad)
+                print(f"[{status:>4}] {method}: {' '.join(sql.split())[:90]}")
+                for line in bad:
+                    print(f"        {line}")
+    if failures:
+        print(f"{failures} statement(s) scan a full table")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
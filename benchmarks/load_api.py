@@ -0,0 +1,144 @@
+"""
+Load test: the headless HTTP API (api_server.py) under concurrent gates
+
+Each client thread keeps one HTTP/1.1 connection open and loops through a
+gate cycle: park, quote, exit, pay, then an occupancy and a plate search
+request. Reports requests per second and p50/p99 latency per endpoint.
+
+Without --url a local instance is started on a throwaway database seeded
+with enough slots for every client; with --url an already running instance
+is used (it needs free Car slots).
+
+Usage: python benchmarks/load_api.py [--url http://127.0.0.1:8080] [--clients 8]
+                                     [--seconds 10] [--workers 4] [--profile NAME]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import shutil
+import threading
+import time
+from urllib.parse import urlsplit
+
+from _common import ROOT
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+
+
+def client(url, n, deadline, latencies, errors, token):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    def call(name, method, path, body=None):
+        start = time.perf_counter()
+        conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+        response = conn.getresponse()
+        data = response.read()
+        latencies.setdefault(name, []).append(time.perf_counter() - start)
+        if response.status != 200:
+            raise AssertionError(f"{method} {path}: {response.status} {data[:200]!r}")
+        return json.loads(data)
+
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            number = f"LT{n:03d}-{i}"
+            call("park", "POST", "/park", {"number": number, "type": "Car", "user": f"gate{n}"})
+            call("quote", "GET", f"/quote?number={number}")
+            call("exit", "POST", "/exit", {"number": number})
+            call("pay", "POST", "/payments", {"number": number, "user": f"gate{n}"})
+            call("occupancy", "GET", "/occupancy")
+            call("search", "GET", f"/vehicles?q=LT{n:03d}-{i}&limit=20")
+            i += 1
+    except Exception as e:
+        errors.append(f"client {n}: {e!r}")
+    finally:
+        conn.close()
+
+
+def start_server(db_path, workers, profile):
+    """Run api_server.py on a free port and return (process, url)"""
+    cmd = [sys.executable, os.path.join(ROOT, "api_server.py"), "--port", "0", "--db", db_path,
+           "--workers", str(workers)]
+    if profile:
+        cmd += ["--profile", profile]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, env=dict(os.environ, PARKING_API_TOKEN=""))
+    line = proc.stdout.readline()
+    if "http://" not in line:
+        proc.kill()
+        raise RuntimeError(f"server did not start: {line!r}")
+    return proc, line[line.index("http://"):].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="test a running instance instead of starting one")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=4, help="server DB workers (local instance)")
+    parser.add_argument("--profile", help="server storage profile (local instance)")
+    parser.add_argument("--token", default=os.environ.get("PARKING_API_TOKEN"))
+    args = parser.parse_args()
+
+    proc = tmpdir = None
+    url = args.url
+    if url is None:
+        from models import DB
+        tmpdir = tempfile.mkdtemp(prefix="parking_bench_")
+        db_path = os.path.join(tmpdir, "bench.db")
+        db = DB(db_path)
+        for n in range(args.clients * 2):
+            db.create_slot(f"L{n}", "Car", 1000)
+        db.close()
+        proc, url = start_server(db_path, args.workers, args.profile)
+        args.token = None
+    print(f"{args.clients} clients against {url} for {args.seconds:.0f} s")
+
+    latencies, errors = {}, []
+    per_client = [{} for _ in range(args.clients)]
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=client, args=(url, n, deadline, per_client[n], errors, args.token))
+               for n in range(args.clients)]
+    start = time.perf_counter()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    for samples in per_client:
+        for name, values in samples.items():
+            latencies.setdefault(name, []).extend(values)
+    everything = [v for values in latencies.values() for v in values]
+    print(f"{'endpoint':<10} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name in ("park", "quote", "exit", "pay", "occupancy", "search"):
+        values = latencies.get(name, [])
+        print(f"{name:<10} {len(values):>9} {percentile(values, 0.5) * 1e3:>8.2f} {percentile(values, 0.99) * 1e3:>8.2f}")
+    print(f"{'total':<10} {len(everything):>9} {percentile(everything, 0.5) * 1e3:>8.2f} "
+          f"{percentile(everything, 0.99) * 1e3:>8.2f}   {len(everything) / elapsed:.0f} req/s")
+    for error in errors:
+        print("ERROR", error)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark suite: end-to-end timings on a synthetic database, saved as JSON
+
+Builds a database through the DB API (see _common.synthetic_db) with the
+given slots, users and months of history, then times the operations the
+gate and report screens depend on: slot lookup, park/exit/payment, vehicle
+and payment search, daily revenue, Excel and PDF export, and the refresh()
+of every page in a Tk window (skipped when there is no display).
+
+Results go to benchmarks/results/<time>-<commit>.json; pass --compare with
+an earlier file to print the change per operation.
+
+Usage: python benchmarks/run_suite.py [--slots 200] [--users 50] [--months 3]
+                                      [--visits-per-day 200] [--db PATH] [--out FILE]
+                                      [--compare OLD.json]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import ROOT, synthetic_db
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SKIP_PAGES = ("LoginPage", "RegisterPage")
+
+
+def measure(fn, repeat):
+    """Call fn `repeat` times; return per-call stats in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {"n": len(samples), "mean_ms": statistics.fmean(samples), "p50_ms": samples[len(samples) // 2],
+            "p95_ms": samples[min(len(samples) - 1, int(0.95 * len(samples)))], "min_ms": samples[0]}
+
+
+def gate_cycle(db, cycles):
+    """Park, exit and pay `cycles` new vehicles, timing each step separately"""
+    from utils.helpers import now_str
+    from utils.pricing import stay_fee
+    parks, exits, pays = [], [], []
+    for i in range(cycles):
+        number = f"BENCH {i:05d}"
+        slot = db.get_free_slot_for_type("Car")
+        entry_time = now_str()
+        start = time.perf_counter()
+        db.park_vehicle(number, "Car", "admin", slot[0], entry_time, "cash")
+        parks.append((time.perf_counter() - start) * 1e3)
+        start = time.perf_counter()
+        db.exit_vehicle(number, now_str())
+        exits.append((time.perf_counter() - start) * 1e3)
+        amount, duration = stay_fee(entry_time, now_str(), "Car", slot[2])
+        start = time.perf_counter()
+        db.record_payment(number, amount, duration, "admin", "", "cash")
+        pays.append((time.perf_counter() - start) * 1e3)
+    return {"park_vehicle": summarize(parks), "exit_vehicle": summarize(exits), "record_payment": summarize(pays)}
+
+
+def run_db_benchmarks(db, fleet, tmpdir):
+    from utils.excel_exporter import export_rows_to_excel
+    from utils.report_generator import build_report
+    today = datetime.date.today()
+    month_ago = (today - datetime.timedelta(days=30)).isoformat()
+    week_ago = (today - datetime.timedelta(days=7)).isoformat()
+    partial = fleet[0][:3]  # e.g. "UAX": a prefix shared by many plates
+    results = {
+        "get_free_slot_for_type": measure(lambda: db.get_free_slot_for_type("Car"), 10000),
+        "search_vehicles(plate)": measure(lambda: db.search_vehicles(partial), 10),
+        "search_vehicles(plate, week)": measure(lambda: db.search_vehicles(partial, week_ago, today.isoformat()), 10),
+        "search_payments(plate)": measure(lambda: db.search_payments(partial), 10),
+        "search_payments(plate, week)": measure(lambda: db.search_payments(partial, week_ago, today.isoformat()), 10),
+        "get_daily_revenue(7)": measure(lambda: db.get_daily_revenue(7), 100),
+        "get_daily_revenue(30)": measure(lambda: db.get_daily_revenue(30), 100),
+        "get_revenue_stats(month)": measure(lambda: db.get_revenue_stats(month_ago, today.isoformat()), 100),
+        "list_active_vehicles(20)": measure(lambda: db.list_active_vehicles(limit=20), 100),
+    }
+    results.update(gate_cycle(db, 500))
+    xlsx = os.path.join(tmpdir, "export.xlsx")
+    results["excel_export(month)"] = measure(lambda: export_rows_to_excel(
+        ((p[0], p[1], p[2], p[3], p[4], p[5], p[7]) for p in db.iter_payments(month_ago, today.isoformat())),
+        ['ID', 'Vehicle', 'Amount', 'Paid At', 'Duration (hrs)', 'Generated By', 'Payment Method'], xlsx), 3)
+    pdf = os.path.join(tmpdir, "report.pdf")
+    results["pdf_report(month)"] = measure(lambda: build_report(db, "payments", pdf, month_ago, today.isoformat()), 3)
+    return results
+
+
+def page_refresh_child(repeat):
+    """Runs in a subprocess with PARKING_DB set: time refresh() of every page"""
+    import tkinter as tk
+    try:
+        from controllers import App
+        app = App()
+    except tk.TclError as e:
+        print(json.dumps({"page refresh": f"skipped: no display ({e})"}))
+        return
+    app.withdraw()
+    app.current_user, app.current_user_role = "admin", "admin"
+    results = {}
+    for name in app.page_classes:
+        if name in SKIP_PAGES:
+            continue
+        page = app.get_page(name)
+        app.update()
+
+        def refresh():
+            page.refresh()
+            app.update()  # include the redraw and any idle work the refresh scheduled
+        results[f"{name}.refresh"] = measure(refresh, repeat)
+    app.destroy()
+    print(json.dumps(results))
+
+
+def run_page_benchmarks(db_path, repeat=10):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--page-child", str(repeat)],
+                         env=dict(os.environ, PARKING_DB=db_path), capture_output=True, text=True)
+    try:
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"page refresh": "failed: " + (out.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {os.path.basename(baseline_path)} (commit {baseline['meta']['commit']}), mean ms:")
+    for name, stats in results.items():
+        old = baseline["results"].get(name)
+        if not isinstance(stats, dict) or "mean_ms" not in stats or not old or "mean_ms" not in old:
+            continue
+        change = (stats["mean_ms"] - old["mean_ms"]) / old["mean_ms"] * 100 if old["mean_ms"] else 0.0
+        print(f"  {name:<36} {old['mean_ms']:>10.3f} -> {stats['mean_ms']:>10.3f}  ({change:+.1f}%)")
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--page-child":
+        page_refresh_child(int(sys.argv[2]))
+        return
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--months", type=float, default=3)
+    parser.add_argument("--visits-per-day", type=int, default=200)
+    parser.add_argument("--db", help="keep the synthetic database at this path (reused if it exists)")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    from models import DB
+    tmpdir = tempfile.mkdtemp(prefix="parking_bench_")
+    db_path = args.db or os.path.join(tmpdir, "bench.db")
+    reuse = args.db and os.path.exists(args.db)
+    params = {"slots": args.slots, "users": args.users, "months": args.months, "visits_per_day": args.visits_per_day}
+    try:
+        db = DB(db_path)
+        start = time.perf_counter()
+        if reuse:
+            fleet = [row[0] for row in db.conn.execute("SELECT DISTINCT number FROM vehicles LIMIT 100")]
+        else:
+            fleet = synthetic_db(db, args.slots, args.users, args.months, args.visits_per_day,
+                                 progress=lambda d, n: print(f"\rgenerating history: day {d}/{n}", end="", flush=True))
+            print()
+        visits = db.count_vehicle_records()
+        print(f"database: {visits} visits, {db.count_payments()} payments "
+              f"({'reused' if reuse else f'built in {time.perf_counter() - start:.1f} s'})")
+        results = run_db_benchmarks(db, fleet, tmpdir)
+        db.close()
+        results.update(run_page_benchmarks(db_path))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            print(f"{name:<38} mean {stats['mean_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  (n={stats['n']})")
+        else:
+            print(f"{name:<38} {stats}")
+
+    commit = git_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"meta": {"commit": commit, "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                            "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                            "platform": platform.platform(), "cpus": os.cpu_count(), "params": params,
+                            "visits": visits},
+                   "results": results}, f, indent=2)
+    print(f"results saved to {out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
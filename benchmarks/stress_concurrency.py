@@ -0,0 +1,96 @@
+"""
+Multi-threaded stress check for the DB connection pool
+
+Gate threads park, exit and pay in a loop while report threads query
+revenue, occupancy and active vehicles. Every thread checks the rows it
+reads back; at the end the totals must match what the gates wrote.
+
+Usage: python benchmarks/stress_concurrency.py [gates] [cycles] [profile]
+"""
+
+import sys
+import threading
+import time
+
+from _common import temp_db
+
+
+def gate(db, n, cycles, errors):
+    vtype = f"T{n}"  # each gate owns one slot type, so allocations never collide
+    try:
+        for i in range(cycles):
+            number = f"G{n}-{i}"
+            slot = db.get_free_slot_for_type(vtype)
+            if not slot:
+                raise AssertionError(f"{vtype}: no free slot")
+            db.park_vehicle(number, vtype, f"gate{n}", slot[0], "2025-01-01 08:00:00")
+            row = db.get_last_vehicle_record(number)
+            if row is None or row[1] != number or row[6] is not None:
+                raise AssertionError(f"{number}: bad record after park: {row}")
+            db.exit_vehicle(number, "2025-01-01 09:00:00")
+            row = db.get_last_vehicle_record(number)
+            if row is None or row[1] != number or row[6] != "2025-01-01 09:00:00":
+                raise AssertionError(f"{number}: bad record after exit: {row}")
+            db.record_payment(number, 1000.0, 1.0, f"gate{n}", "")
+    except Exception as e:
+        errors.append(f"gate {n}: {e!r}")
+
+
+def reporter(db, stop, errors):
+    last_total = 0
+    try:
+        while not stop.is_set():
+            stats = db.get_revenue_stats()
+            if stats["total"] < last_total or stats["total"] != stats["count"] * 1000.0:
+                raise AssertionError(f"revenue went inconsistent: {stats} (previous total {last_total})")
+            last_total = stats["total"]
+            occupancy = db.get_occupancy_stats()
+            if occupancy["occupied"] + occupancy["free"] != occupancy["total"]:
+                raise AssertionError(f"occupancy does not add up: {occupancy}")
+            for row in db.list_active_vehicles(limit=20):
+                if row[6] is not None:
+                    raise AssertionError(f"closed visit listed as active: {row}")
+    except Exception as e:
+        errors.append(f"reporter: {e!r}")
+
+
+def main():
+    gates = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    profile = sys.argv[3] if len(sys.argv) > 3 else "balanced"
+    errors = []
+    with temp_db(profile=profile) as db:
+        for n in range(gates):
+            db.create_slot(f"G{n}", f"T{n}", 1000)
+        stop = threading.Event()
+        readers = [threading.Thread(target=reporter, args=(db, stop, errors)) for _ in range(4)]
+        writers = [threading.Thread(target=gate, args=(db, n, cycles, errors)) for n in range(gates)]
+        start = time.perf_counter()
+        for t in readers + writers:
+            t.start()
+        for t in writers:
+            t.join()
+        stop.set()
+        for t in readers:
+            t.join()
+        elapsed = time.perf_counter() - start
+        db.flush()
+
+        stats = db.get_revenue_stats()
+        if stats["count"] != gates * cycles:
+            errors.append(f"expected {gates * cycles} payments, found {stats['count']}")
+        if db.count_active_vehicles() != 0:
+            errors.append(f"{db.count_active_vehicles()} vehicles still active")
+        if db.get_occupancy_stats()["occupied"] != 0:
+            errors.append("slots left occupied")
+        for mismatch in db.check_occupancy_counters():
+            errors.append(f"occupancy counter mismatch: {mismatch}")
+
+    print(f"{gates} gates x {cycles} cycles ({profile}): {gates * cycles / elapsed:.0f} cycles/s")
+    for e in errors:
+        print("ERROR", e)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
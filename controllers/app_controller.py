@@ -8,10 +8,13 @@ from tkinter import messagebox
 from models import DB
 from utils.config import *
 from utils.helpers import toast
+from utils.email_sender import MailQueue
+from utils.checkout import CheckoutService
+from utils.instrumentation import Instrumentation
 from views import (
     LoginPage, RegisterPage, UserDashboardPage, DashboardPage,
     SlotMgmtPage, VehiclesPage, PaymentsPage, ProfilePage,
-    SettingsPage, ReportsPage, AdminManagePage
+    SettingsPage, ReportsPage, AdminManagePage, DiagnosticsPage
 )
 
 
@@ -23,7 +26,19 @@ class App(tk.Tk):
         self.title(APP_TITLE)
         self.geometry(WINDOW_SIZE)
         self.configure(bg=BG)
-        self.db = DB()
+        self.db = DB(DB_FILE)
+        # outbound email is sent by a background worker; started by main() once settings are loaded
+        self.mailer = MailQueue(self.db)
+        self.mailer.attach(self)
+        # gate checkouts commit at once; receipts are rendered and emailed in the background
+        self.checkouts = CheckoutService(self.db, self.mailer)
+        self.checkouts.attach(self)
+        # DB change events reach the pages on the Tk main loop, batched per frame
+        self.db.events.attach(self)
+        # opt-in timings for the Diagnostics page; wraps DB methods and page refreshes only while enabled
+        self.instruments = Instrumentation()
+        if DIAGNOSTICS:
+            self.instruments.enable(self.db)
         self.current_user = None  # username
         self.current_user_role = None  # user role (admin/user)
         self.create_widgets()
@@ -48,21 +63,31 @@ class App(tk.Tk):
         self.container = tk.Frame(self, bg=BG)
         self.container.pack(fill="both", expand=True)
 
-        # create frames/pages dict
+        # pages are built on first use (see get_page)
         self.pages = {}
-        for Page in (LoginPage, RegisterPage, DashboardPage, UserDashboardPage, AdminManagePage, SlotMgmtPage, 
-                     VehiclesPage, PaymentsPage, ProfilePage, SettingsPage, ReportsPage):
-            page = Page(self.container, self)
-            page.grid(row=0, column=0, sticky="nsew")
-            self.pages[Page.__name__] = page
+        self.current_page = None
+        self.page_classes = {Page.__name__: Page for Page in (
+            LoginPage, RegisterPage, DashboardPage, UserDashboardPage, AdminManagePage, SlotMgmtPage,
+            VehiclesPage, PaymentsPage, ProfilePage, SettingsPage, ReportsPage, DiagnosticsPage)}
 
         # start with login
         self.show_page("LoginPage")
 
+    def get_page(self, name):
+        """Return the named page, constructing it the first time it is needed"""
+        page = self.pages.get(name)
+        if page is None:
+            page = self.page_classes[name](self.container, self)
+            page.grid(row=0, column=0, sticky="nsew")
+            self.pages[name] = page
+            self.instruments.instrument_page(name, page)
+        return page
+
     def show_page(self, name):
         """Switch to specified page and call its refresh method if available"""
-        page = self.pages[name]
+        page = self.get_page(name)
         page.tkraise()
+        self.current_page = name
         if hasattr(page, "refresh"):
             page.refresh()
 
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Database maintenance commands for Smart Parking Management System
+
+Usage:
+    python db_maintenance.py rebuild-revenue [--db PATH]
+    python db_maintenance.py rekey-plates [--db PATH]
+"""
+import argparse
+
+from models import DB
+from utils.config import DB_FILE
+
+
+def rebuild_revenue(db):
+    """Recompute the revenue_daily rollup from the payments table"""
+    before = db.get_revenue_stats()
+    db.rebuild_revenue_rollup()
+    after = db.get_revenue_stats()
+    print(f"revenue_daily rebuilt: {after['count']} payments, {after['total']:.2f} total "
+          f"(was {before['count']} payments, {before['total']:.2f})")
+
+
+def rekey_plates(db):
+    """Rewrite every plate key under the active plate rules (config.PLATE_COUNTRY)"""
+    changed = db.rekey_plates(force=True)
+    print(f"plate keys rewritten: {changed} rows changed")
+
+
+COMMANDS = {
+    "rebuild-revenue": rebuild_revenue,
+    "rekey-plates": rekey_plates,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Parking database maintenance")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--db", default=DB_FILE, help="database file (default: the app database)")
+    args = parser.parse_args()
+
+    db = DB(args.db)
+    try:
+        COMMANDS[args.command](db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,9 @@ Course: UTAMU CSC 1201/CS 200 OOP
 Date: December 2025
 """
 
+import multiprocessing
+import os
+
 from controllers import App
 from models import DB
 from utils.config import HOURLY_RATE_CAR, HOURLY_RATE_MOTOR
@@ -44,6 +47,9 @@ def main():
         EMAIL_SETTINGS['sender_password'] = settings.get('sender_password', '')
         EMAIL_SETTINGS['enabled'] = settings.get('email_enabled', 'False') == 'True'
     
+    # Deliver queued emails (including any left over from the last run) in the background
+    app.mailer.start()
+    
     # Create default slots if none exist
     if len(app.db.list_slots()) == 0:
         try:
@@ -54,9 +60,17 @@ def main():
         except Exception as e:
             print(f"Note: Could not create default slots: {e}")
     
+    # Startup probe for benchmarks/bench_startup.py: draw the login window, then exit
+    if os.environ.get("PARKING_STARTUP_PROBE"):
+        app.update()
+        app.destroy()
+        return
+    
     # Start the application
     app.mainloop()
 
 
 if __name__ == "__main__":
+    # bulk receipts use a process pool; needed for the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     main()
@@ -3,6 +3,9 @@ Models package for Smart Parking Management System
 Contains database operations and data models
 """
 
-from .database import DB
+from .database import DB, SearchCancelled, AlreadyParked, SlotTaken, StillParked
+from .slot_index import SlotIndex
+from .connection_pool import ConnectionPool
+from .event_bus import EventBus
 
-__all__ = ['DB']
+__all__ = ['DB', 'SearchCancelled', 'AlreadyParked', 'SlotTaken', 'StillParked', 'SlotIndex', 'ConnectionPool', 'EventBus']
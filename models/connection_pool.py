@@ -0,0 +1,95 @@
+"""
+SQLite connection pool for Smart Parking Management System
+One writer connection plus a bounded set of read-only connections
+"""
+
+import sqlite3
+import threading
+import contextlib
+from collections import deque
+
+
+class ConnectionPool:
+    """One shared writer connection and up to `readers` read-only connections.
+
+    The writer is used by exactly one thread at a time (callers serialize on
+    their own write lock). Readers are opened lazily with `mode=ro` and handed
+    out one per `reader()` block, first come first served, so concurrent
+    queries never share a cursor and a busy thread cannot starve the others.
+    With WAL journaling readers also never block the writer.
+    """
+
+    def __init__(self, path, readers=4, setup=None):
+        self.path = path
+        self.setup = setup  # callable(conn) applying per-connection PRAGMAs
+        self.in_memory = path == ":memory:" or path.startswith("file::memory:")
+        self.max_readers = 0 if self.in_memory else readers
+        self._trace = None
+        self._idle = []
+        self._opened = []
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self.writer = sqlite3.connect(path, check_same_thread=False)
+        if setup:
+            setup(self.writer)
+
+    def _open_reader(self):
+        uri = "file:" + self.path.replace("?", "%3f").replace("#", "%23") + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        if self.setup:
+            self.setup(conn)
+        conn.execute("PRAGMA query_only=1")
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _acquire(self):
+        with self._available:
+            ticket = object()
+            self._waiters.append(ticket)
+            while True:
+                if self._waiters[0] is ticket:
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if len(self._opened) < self.max_readers:
+                        conn = self._open_reader()
+                        self._opened.append(conn)
+                        break
+                self._available.wait()
+            self._waiters.popleft()
+            self._available.notify_all()
+            return conn
+
+    def _release(self, conn):
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify_all()
+
+    @contextlib.contextmanager
+    def reader(self):
+        """Borrow a read-only connection for the duration of the block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._release(conn)
+
+    def set_trace_callback(self, callback):
+        """Install a sqlite3 trace callback on every pooled connection"""
+        with self._lock:
+            self._trace = callback
+            self.writer.set_trace_callback(callback)
+            for conn in self._opened:
+                conn.set_trace_callback(callback)
+
+    def close(self):
+        """Close the writer and all reader connections"""
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+            self._idle.clear()
+            self.writer.close()
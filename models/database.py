@@ -6,13 +6,55 @@ Handles all SQLite operations and CRUD functionality
 import sqlite3
 import os
 import sys
-from utils.helpers import hash_password, now_str
+import time
+import threading
+import contextlib
+import datetime
+from utils.helpers import hash_password, now_str, to_epoch
+from utils.plates import plate_key, plate_key_sql, plate_rules_signature
+from utils.pricing import stay_fee
+from utils.config import DB_PROFILE
+from models.slot_index import SlotIndex
+from models.connection_pool import ConnectionPool
+from models.event_bus import EventBus
+
+
+# Storage profiles: PRAGMAs applied when the connection opens, plus an optional
+# group-commit window in milliseconds (0 = commit every write immediately).
+STORAGE_PROFILES = {
+    # sqlite defaults: rollback journal, fsync on every commit
+    "legacy": {},
+    # WAL with full durability on every commit
+    "wal": {"journal_mode": "WAL", "synchronous": "FULL"},
+    # WAL, fsync only at checkpoints; survives app crashes, not power loss mid-checkpoint
+    "balanced": {"journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 64 * 1024 * 1024,
+                 "cache_size": -16000, "temp_store": "MEMORY"},
+    # balanced plus group commit: writes within 20 ms share one commit
+    "throughput": {"journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 256 * 1024 * 1024,
+                   "cache_size": -64000, "temp_store": "MEMORY", "group_commit_ms": 20},
+}
+
+
+class SearchCancelled(Exception):
+    """A search_vehicles/search_payments query was aborted by its `cancelled` callback"""
+
+
+class AlreadyParked(Exception):
+    """park_vehicle was given a plate that already has an open visit"""
+
+
+class SlotTaken(Exception):
+    """park_vehicle was given a slot that is no longer free (another gate or process took it)"""
+
+
+class StillParked(Exception):
+    """checkout(allow_exit=False) found the plate's latest visit still open"""
 
 
 class DB:
     """Database manager class handling all database operations"""
     
-    def __init__(self, path="parking_system_upgraded.db"):
+    def __init__(self, path="parking_system_upgraded.db", profile=None, group_commit_ms=None, readers=4, events=None):
         # Use absolute path to ensure same database is used by source and executable
         if not os.path.isabs(path):
             # Always use the project root directory for the database
@@ -28,14 +70,231 @@ class DB:
                 app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             path = os.path.join(app_dir, path)
         
-        self.conn = sqlite3.connect(path, check_same_thread=False)
-        self.cursor = self.conn.cursor()
+        self._write_lock = threading.RLock()
+        self._tx_depth = 0
+        self._pending_since = None  # first uncommitted write in group-commit mode
+        self._flush_timer = None
+        self._tx_owner = None
+        self._versions = {"revenue": 0}  # see data_version
+        self._tx_events = []  # published when the outermost transaction commits
+        self._tx_slots_touched = False  # slot index changed inside the open transaction (see _slots_touched)
+        self._search_indexes = {}  # FTS table -> exists (see _has_search_index)
+        # change notifications for every committed write (see models.event_bus.TOPICS)
+        self.events = events or EventBus()
+        settings = dict(STORAGE_PROFILES[profile or DB_PROFILE] if not isinstance(profile, dict) else profile)
+        window = settings.pop("group_commit_ms", 0)
+        self.group_commit_ms = window if group_commit_ms is None else group_commit_ms
+        self.storage_settings = settings
+        # one writer connection (self.conn) plus `readers` read-only connections
+        self.pool = ConnectionPool(path, readers=readers, setup=self._setup_connection)
+        self.conn = self.pool.writer
+        if "journal_mode" in settings:
+            self.conn.execute(f"PRAGMA journal_mode={settings['journal_mode']}").fetchall()
+        # in-memory free lists, rebuilt from the slots table on every start
+        # and whenever another connection has written to the file (see _sync_slot_index)
+        self.slot_index = SlotIndex()
         self.init_schema()
+        self._rebuild_slot_index()
+        self._slots_data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _setup_connection(self, conn):
+        """Apply the per-connection PRAGMAs of the storage profile"""
+        for pragma in ("synchronous", "mmap_size", "cache_size", "temp_store"):
+            if pragma in self.storage_settings:
+                conn.execute(f"PRAGMA {pragma}={self.storage_settings[pragma]}").fetchall()
+
+    @contextlib.contextmanager
+    def _read(self):
+        """Cursor for a read-only query.
+
+        Uses a pooled reader unless this thread is inside transaction() or a
+        group commit is still pending; those reads go to the writer so callers
+        always see their own writes.
+        """
+        owns_tx = self._tx_depth and self._tx_owner == threading.get_ident()
+        if owns_tx or self._pending_since is not None or not self.pool.max_readers:
+            with self._write_lock:
+                yield self.conn.cursor()
+        else:
+            with self.pool.reader() as conn:
+                cur = conn.cursor()
+                try:
+                    yield cur
+                finally:
+                    # a half-read statement (fetchone) would keep its snapshot open
+                    # for the next borrower of this connection
+                    cur.close()
+
+    def _stream(self, query, params=(), batch=1000):
+        """Yield the rows of a long read without loading them all into memory"""
+        if not (self._tx_depth and self._tx_owner == threading.get_ident()):
+            self.flush()  # commit pending writes so the read can use a pooled reader, not the writer lock
+        with self._read() as cur:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    return
+                yield from rows
+
+    def data_version(self, topic):
+        """Counter that changes whenever the 'revenue' or 'occupancy' aggregates change (cache key for charts)"""
+        if topic == "occupancy":
+            self._sync_slot_index()
+            return self.slot_index.version
+        return self._versions[topic]
+
+    def set_trace_callback(self, callback):
+        """Trace every SQL statement on all pooled connections (None to stop)"""
+        self.pool.set_trace_callback(callback)
+
+    # --- transactions ---
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run a block of writes atomically and commit them together.
+
+        Blocks nest (inner ones become savepoints). Without group commit the
+        outermost block commits on exit; with it, the commit is deferred to the
+        end of the current window. On error only this block is rolled back.
+        """
+        events = ()
+        with self._write_lock:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            savepoint = f"tx{self._tx_depth}"
+            self.conn.execute(f"SAVEPOINT {savepoint}")
+            self._tx_depth += 1
+            self._tx_owner = threading.get_ident()
+            published = len(self._tx_events)
+            try:
+                yield self.conn.cursor()
+            except BaseException:
+                self._tx_depth -= 1
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+                del self._tx_events[published:]  # those changes never happened
+                if self._tx_depth == 0:
+                    self._commit()
+                    # the slot index may have seen writes that were undone
+                    if self._tx_slots_touched:
+                        self._tx_slots_touched = False
+                        self._rebuild_slot_index()
+                raise
+            self._tx_depth -= 1
+            self.conn.execute(f"RELEASE {savepoint}")
+            if self._tx_depth == 0:
+                self._commit()
+                self._tx_slots_touched = False
+                events, self._tx_events = self._tx_events, []
+        # outside the lock, so subscribers are free to query
+        for topic, payload in events:
+            self.events.publish(topic, **payload)
+
+    def _sync_slot_index(self):
+        """Rebuild the slot index if another connection has changed the slots table.
+
+        PRAGMA data_version on the writer only moves when some other
+        connection (another process, or another DB on the same file) commits,
+        so our own writes never trigger a rebuild. When it has moved, the
+        trigger-maintained 'slots' change counter tells whether that commit
+        touched a slot at all; payments, settings and the like do not.
+        """
+        with self._write_lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._slots_data_version:
+                return
+            self._slots_data_version = version
+            counter = self._slot_changes(self.conn.cursor())
+            if counter is not None and counter == self._slots_counter:
+                return
+            self._rebuild_slot_index()
+            self._slots_touched()
+
+    def _rebuild_slot_index(self):
+        """Reload the slot index from the slots table and note the change counter it reflects"""
+        with self._write_lock:
+            cur = self.conn.cursor()
+            self.slot_index.rebuild(cur)
+            self._slots_counter = self._slot_changes(cur)
+
+    @staticmethod
+    def _slot_changes(cur):
+        """The 'slots' change counter (see _migration_change_counters), or None before that migration"""
+        try:
+            cur.execute("SELECT value FROM change_counters WHERE name='slots'")
+        except sqlite3.OperationalError:
+            return None
+        row = cur.fetchone()
+        return row[0] if row else None
+
+    def _slots_written(self, cur, rows):
+        """Account for `rows` slot rows this transaction just wrote.
+
+        Each one bumped the change counter; if nothing else did, the index
+        (updated by the caller) is still in step with it. Otherwise another
+        connection's change is pending and the next _sync_slot_index rebuilds.
+        """
+        value = self._slot_changes(cur)
+        if value is not None and self._slots_counter is not None and value - rows == self._slots_counter:
+            self._slots_counter = value
+
+    def _resync_slot(self, slot_id):
+        """Reload one slot into the index from the table (after a guarded UPDATE missed)"""
+        row = self.get_slot_by_id(slot_id)
+        if row:
+            self.slot_index.put(row[0], row[1], row[2], row[3], row[4])
+        else:
+            self.slot_index.remove(slot_id)
+        self._slots_touched()
+
+    def _slots_touched(self):
+        """Note a slot index change; if it happened inside the caller's open
+        transaction, a rollback of that transaction rebuilds the index"""
+        if self._tx_depth and self._tx_owner == threading.get_ident():
+            self._tx_slots_touched = True
+
+    def _publish(self, topic, **payload):
+        """Publish a change now, or when the caller's enclosing transaction commits"""
+        if self._tx_depth and self._tx_owner == threading.get_ident():
+            self._tx_events.append((topic, payload))
+        else:
+            self.events.publish(topic, **payload)
+
+    def _commit(self):
+        """Commit now, or schedule the commit at the end of the group-commit window"""
+        if self.group_commit_ms <= 0:
+            self.conn.commit()
+            return
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        remaining = self.group_commit_ms / 1000.0 - (now - self._pending_since)
+        if remaining <= 0:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(remaining, self.flush)
+            self._flush_timer.start()
+
+    def flush(self):
+        """Commit any writes still waiting for their group commit"""
+        with self._write_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._pending_since = None
+            if self._tx_depth == 0 and self.conn.in_transaction:
+                self.conn.commit()
+
+    def close(self):
+        """Flush pending writes and close all connections"""
+        self.flush()
+        self.pool.close()
 
     def init_schema(self):
         """Initialize database schema with all required tables"""
+        cur = self.conn.cursor()
         # USERS: username (pk), password_hash, full_name, role (admin/user), email
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 username TEXT PRIMARY KEY,
                 password_hash TEXT,
@@ -44,8 +303,10 @@ class DB:
                 email TEXT
             )
         """)
-        # VEHICLES: id, number, type, user (who parked), slot_id (nullable), entry_time, exit_time, payment_method
-        self.cursor.execute("""
+        # VEHICLES: id, number, type, user (who parked), slot_id (nullable), entry_time, exit_time, payment_method,
+        # entry_ts, exit_ts (the times as epoch seconds, see _migration_epoch_columns),
+        # number_key (canonical plate, see utils.plates.plate_key)
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS vehicles (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 number TEXT,
@@ -54,11 +315,14 @@ class DB:
                 slot_id INTEGER,
                 entry_time TEXT,
                 exit_time TEXT,
-                payment_method TEXT DEFAULT 'cash'
+                payment_method TEXT DEFAULT 'cash',
+                entry_ts INTEGER,
+                exit_ts INTEGER,
+                number_key TEXT
             )
         """)
         # SLOTS: id, name, type_allowed (Car/Motor/Both), status (free/occupied), hourly_rate
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS slots (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT UNIQUE,
@@ -67,8 +331,9 @@ class DB:
                 hourly_rate REAL DEFAULT 0
             )
         """)
-        # PAYMENTS: id, vehicle_number, amount, paid_at, duration_hours, generated_by, receipt_path, payment_method
-        self.cursor.execute("""
+        # PAYMENTS: id, vehicle_number, amount, paid_at, duration_hours, generated_by, receipt_path, payment_method,
+        # paid_ts (paid_at as epoch seconds), vehicle_key (canonical plate)
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS payments (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 vehicle_number TEXT,
@@ -77,87 +342,336 @@ class DB:
                 duration_hours REAL,
                 generated_by TEXT,
                 receipt_path TEXT,
-                payment_method TEXT DEFAULT 'cash'
+                payment_method TEXT DEFAULT 'cash',
+                paid_ts INTEGER,
+                vehicle_key TEXT
+            )
+        """)
+        # REVENUE_DAILY: payments rolled up per day, payment_method and generated_by
+        # (kept in step by record_payment; NULL keys are stored as '')
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS revenue_daily (
+                day TEXT,
+                payment_method TEXT,
+                generated_by TEXT,
+                total REAL DEFAULT 0,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (day, payment_method, generated_by)
+            ) WITHOUT ROWID
+        """)
+        # EMAIL_OUTBOX: queued emails (receipts, notifications) awaiting delivery by utils.email_sender.MailQueue
+        # status pending/sent/failed; next_attempt is epoch seconds
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recipient TEXT,
+                subject TEXT,
+                body TEXT,
+                attachment_path TEXT,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt REAL DEFAULT 0,
+                last_error TEXT,
+                created_at TEXT,
+                sent_at TEXT
             )
         """)
         # SETTINGS: key-value store for system configuration
-        self.cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS settings (
                 key TEXT PRIMARY KEY,
                 value TEXT
             )
         """)
         self.conn.commit()
-        # Migrate existing tables (add missing columns if they don't exist)
-        self._migrate_schema()
+        # Migrate existing tables (missing columns, indexes, ...)
+        self._migrate_schema(cur)
+        # plate keys follow the active plate rules (config.PLATE_COUNTRY)
+        self.rekey_plates()
         # ensure admin exists
         self.ensure_admin()
 
-    def _migrate_schema(self):
+    # Versioned migrations: (version, method name). The applied version is kept in
+    # PRAGMA user_version; every step is idempotent so re-running one is harmless.
+    MIGRATIONS = [
+        (1, "_migration_legacy_columns"),
+        (2, "_migration_hot_query_indexes"),
+        (3, "_migration_active_vehicle_indexes"),
+        (4, "_migration_revenue_rollup"),
+        (5, "_migration_email_outbox_index"),
+        (6, "_migration_receipt_indexes"),
+        (7, "_migration_epoch_columns"),
+        (8, "_migration_plate_search"),
+        (9, "_migration_plate_keys"),
+        (10, "_migration_change_counters"),
+        (11, "_migration_row_counts"),
+    ]
+
+    def _migrate_schema(self, cur):
+        """Apply pending schema migrations in version order"""
+        cur.execute("PRAGMA user_version")
+        version = cur.fetchone()[0]
+        for target, method in self.MIGRATIONS:
+            if version >= target:
+                continue
+            try:
+                getattr(self, method)(cur)
+                cur.execute(f"PRAGMA user_version = {int(target)}")
+                self.conn.commit()
+                version = target
+            except Exception as e:
+                self.conn.rollback()
+                print(f"Migration warning ({method}): {e}")
+                break
+
+    def _add_column(self, cur, table, column, ddl):
+        """Add a column to a table if it is missing"""
+        cur.execute(f"PRAGMA table_info({table})")
+        cols = [col[1] for col in cur.fetchall()]
+        if column not in cols:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+    def _migration_legacy_columns(self, cur):
         """Add missing columns to existing tables for backward compatibility"""
+        self._add_column(cur, "vehicles", "payment_method", "TEXT DEFAULT 'cash'")
+        self._add_column(cur, "users", "email", "TEXT")
+        self._add_column(cur, "slots", "hourly_rate", "REAL DEFAULT 0")
+        self._add_column(cur, "payments", "payment_method", "TEXT DEFAULT 'cash'")
+
+    def _migration_hot_query_indexes(self, cur):
+        """Indexes for the exit, lookup, search and revenue queries"""
+        # open visits by plate: exit_vehicle
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_open_number ON vehicles(number) WHERE exit_time IS NULL")
+        # latest visit by plate: get_last_vehicle_record, exit_vehicle slot lookup
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_number ON vehicles(number)")
+        # date range filters: search_vehicles
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_entry_time ON vehicles(entry_time)")
+        # covering (paid_at, amount): get_revenue_stats, get_daily_revenue, search_payments
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_paid_at ON payments(paid_at, amount)")
+        # per-operator payments
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_generated_by ON payments(generated_by)")
+
+    def _migration_active_vehicle_indexes(self, cur):
+        """Partial indexes over open visits for the active-vehicle queries"""
+        # newest-first listing and counting: list_active_vehicles, count_active_vehicles
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_open_id ON vehicles(id) WHERE exit_time IS NULL")
+        # one user's open visits: list_active_vehicles(user=...)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_open_user ON vehicles(user) WHERE exit_time IS NULL")
+
+    def _migration_revenue_rollup(self, cur):
+        """Backfill revenue_daily from existing payments"""
+        self._fill_revenue_rollup(cur, day="DATE(paid_at)")  # paid_ts arrives in migration 7
+
+    def _migration_email_outbox_index(self, cur):
+        """Index the mail queue's due-job lookup"""
+        # pending jobs by due time: get_due_emails, next_email_due
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON email_outbox(next_attempt) WHERE status='pending'")
+
+    def _migration_receipt_indexes(self, cur):
+        """Indexes for finding exited visits that still need a receipt"""
+        # visits by exit time: list_unpaid_exits
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_exit_time ON vehicles(exit_time)")
+        # payments per plate after a given time: list_unpaid_exits
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_vehicle_number ON payments(vehicle_number, paid_at)")
+
+    # TEXT time column -> integer twin holding the same wall-clock time as epoch seconds
+    EPOCH_COLUMNS = {"entry_time": "entry_ts", "exit_time": "exit_ts", "paid_at": "paid_ts"}
+
+    def _migration_epoch_columns(self, cur):
+        """Integer epoch twins of the time columns for range filters and durations"""
+        for table, columns in (("vehicles", ("entry_time", "exit_time")), ("payments", ("paid_at",))):
+            for column in columns:
+                self._add_column(cur, table, self.EPOCH_COLUMNS[column], "INTEGER")
+            assignments = ", ".join(f"{self.EPOCH_COLUMNS[c]} = CAST(strftime('%s', {c}) AS INTEGER)" for c in columns)
+            stale = " OR ".join(f"NEW.{self.EPOCH_COLUMNS[c]} IS NOT CAST(strftime('%s', NEW.{c}) AS INTEGER)" for c in columns)
+            cur.execute(f"UPDATE {table} SET {assignments}")
+            # the app writes both columns itself; these catch any other writer (a no-op when in sync)
+            for event in ("INSERT", f"UPDATE OF {', '.join(columns)}"):
+                cur.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_ts_{event.split()[0].lower()} AFTER {event} ON {table}
+                    WHEN {stale}
+                    BEGIN UPDATE {table} SET {assignments} WHERE id = NEW.id; END
+                """)
+        # the epoch indexes replace the TEXT ones
+        cur.execute("DROP INDEX IF EXISTS idx_vehicles_entry_time")
+        cur.execute("DROP INDEX IF EXISTS idx_vehicles_exit_time")
+        cur.execute("DROP INDEX IF EXISTS idx_payments_paid_at")
+        cur.execute("DROP INDEX IF EXISTS idx_payments_vehicle_number")
+        # entry time ranges: iter_vehicles, search_vehicles, count_vehicle_records
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_entry_ts ON vehicles(entry_ts)")
+        # exit time ranges, covering the stay length: iter_stays, list_unpaid_exits, get_stay_stats
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_exit_ts ON vehicles(exit_ts, entry_ts)")
+        # covering (paid_ts, amount): _scan_revenue_stats, iter_payments, search_payments
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_paid_ts ON payments(paid_ts, amount)")
+        # payments per plate after a given time: list_unpaid_exits
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_vehicle_number_ts ON payments(vehicle_number, paid_ts)")
+
+    # trigram full-text index per searchable table: (index table, plate column, operator column, plate key column).
+    # The index's plate column holds the key since migration 9.
+    SEARCH_INDEXES = {"vehicles": ("vehicles_search", "number", "user", "number_key"),
+                      "payments": ("payments_search", "vehicle_number", "generated_by", "vehicle_key")}
+
+    def _migration_plate_search(self, cur):
+        """Trigram FTS5 indexes for substring search on plates and operators"""
         try:
-            # Check and add payment_method to vehicles table
-            self.cursor.execute("PRAGMA table_info(vehicles)")
-            cols = [col[1] for col in self.cursor.fetchall()]
-            if 'payment_method' not in cols:
-                self.cursor.execute("ALTER TABLE vehicles ADD COLUMN payment_method TEXT DEFAULT 'cash'")
-            
-            # Check and add email column to users
-            self.cursor.execute("PRAGMA table_info(users)")
-            cols = [col[1] for col in self.cursor.fetchall()]
-            if 'email' not in cols:
-                self.cursor.execute("ALTER TABLE users ADD COLUMN email TEXT")
-            
-            # Check and add hourly_rate to slots
-            self.cursor.execute("PRAGMA table_info(slots)")
-            cols = [col[1] for col in self.cursor.fetchall()]
-            if 'hourly_rate' not in cols:
-                self.cursor.execute("ALTER TABLE slots ADD COLUMN hourly_rate REAL DEFAULT 0")
-            
-            # Check and add payment_method to payments
-            self.cursor.execute("PRAGMA table_info(payments)")
-            cols = [col[1] for col in self.cursor.fetchall()]
-            if 'payment_method' not in cols:
-                self.cursor.execute("ALTER TABLE payments ADD COLUMN payment_method TEXT DEFAULT 'cash'")
-            
-            self.conn.commit()
-        except Exception as e:
-            print(f"Migration warning: {e}")
+            cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x, tokenize='trigram')")
+            cur.execute("DROP TABLE temp.fts5_probe")
+        except sqlite3.OperationalError as e:
+            print(f"Note: plate search index unavailable ({e}); search falls back to scanning")
+            return
+        for table, (index, plate, person, _) in self.SEARCH_INDEXES.items():
+            new_plate, old_plate = plate_key_sql(f"NEW.{plate}"), plate_key_sql(f"OLD.{plate}")
+            # contentless: holds only the trigrams; rows are joined back to the table by rowid = id
+            cur.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({plate}, {person}, content='', tokenize='trigram')")
+            cur.execute(f"INSERT INTO {index}({index}) VALUES ('delete-all')")
+            cur.execute(f"INSERT INTO {index}(rowid, {plate}, {person}) SELECT id, {plate_key_sql(plate)}, {person} FROM {table}")
+            insert = f"INSERT INTO {index}(rowid, {plate}, {person}) VALUES (NEW.id, {new_plate}, NEW.{person});"
+            delete = f"INSERT INTO {index}({index}, rowid, {plate}, {person}) VALUES ('delete', OLD.id, {old_plate}, OLD.{person});"
+            for name, event, body in (("insert", "INSERT", insert), ("delete", "DELETE", delete),
+                                      ("update", f"UPDATE OF {plate}, {person}", delete + insert)):
+                cur.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{index}_{name} AFTER {event} ON {table} BEGIN {body} END")
+
+    # plate column -> canonical key column
+    PLATE_KEYS = {"vehicles": ("number", "number_key"), "payments": ("vehicle_number", "vehicle_key")}
+
+    def _migration_plate_keys(self, cur):
+        """Canonical plate key columns, matched instead of the plate as typed"""
+        self.conn.create_function("plate_key", 1, plate_key, deterministic=True)
+        for table, (plate, key) in self.PLATE_KEYS.items():
+            self._add_column(cur, table, key, "TEXT")
+            cur.execute(f"UPDATE {table} SET {key} = plate_key({plate})")
+        self._create_plate_key_triggers(cur)
+        # the key indexes replace the ones on the plate as typed
+        cur.execute("DROP INDEX IF EXISTS idx_vehicles_open_number")
+        cur.execute("DROP INDEX IF EXISTS idx_vehicles_number")
+        cur.execute("DROP INDEX IF EXISTS idx_payments_vehicle_number_ts")
+        # open visit by plate: exit_vehicle, park_vehicle duplicate check
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_open_number_key ON vehicles(number_key) WHERE exit_time IS NULL")
+        # latest visit by plate: get_last_vehicle_record, exit_vehicle slot lookup
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_number_key ON vehicles(number_key)")
+        # payments per plate after a given time: list_unpaid_exits
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_vehicle_key_ts ON payments(vehicle_key, paid_ts)")
+        # the search index now holds the key column rather than its own normalization
+        for table, (index, plate, person, key) in self.SEARCH_INDEXES.items():
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (index,))
+            if cur.fetchone() is not None:  # else no FTS5 (see _migration_plate_search)
+                cur.execute(f"INSERT INTO {index}({index}) VALUES ('delete-all')")
+                cur.execute(f"INSERT INTO {index}(rowid, {plate}, {person}) SELECT id, {key}, {person} FROM {table}")
+        self._create_search_triggers(cur)
+
+    def _migration_change_counters(self, cur):
+        """Per-table change counters bumped by triggers, so other connections' writes can be told apart"""
+        cur.execute("CREATE TABLE IF NOT EXISTS change_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # slots: any insert, update or delete (_sync_slot_index)
+        cur.execute("INSERT OR IGNORE INTO change_counters(name, value) VALUES ('slots', 0)")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_slots_changes_{event.lower()} AFTER {event} ON slots
+                BEGIN UPDATE change_counters SET value = value + 1 WHERE name = 'slots'; END
+            """)
+
+    def _migration_row_counts(self, cur):
+        """Trigger-maintained row counts for totals read on every refresh"""
+        cur.execute("CREATE TABLE IF NOT EXISTS row_counts (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # vehicles: count_vehicle_records() without a date range
+        cur.execute("INSERT OR REPLACE INTO row_counts(name, value) SELECT 'vehicles', COUNT(*) FROM vehicles")
+        for event, delta in (("INSERT", "+ 1"), ("DELETE", "- 1")):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_vehicles_count_{event.lower()} AFTER {event} ON vehicles
+                BEGIN UPDATE row_counts SET value = value {delta} WHERE name = 'vehicles'; END
+            """)
+
+    def _create_plate_key_triggers(self, cur):
+        """(Re)create the triggers that key rows inserted without one, from the active plate rules"""
+        for table, (plate, key) in self.PLATE_KEYS.items():
+            # the app writes the key itself; this catches any other writer
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_{table}_key_insert")
+            cur.execute(f"""
+                CREATE TRIGGER trg_{table}_key_insert AFTER INSERT ON {table}
+                WHEN NEW.{key} IS NULL
+                BEGIN UPDATE {table} SET {key} = {plate_key_sql(f"NEW.{plate}")} WHERE id = NEW.id; END
+            """)
+
+    def _create_search_triggers(self, cur):
+        """(Re)create the triggers that keep the search indexes on the plate key columns.
+
+        SQLite runs triggers on the same event newest first, so these must be
+        created after the key triggers: a row inserted without a key is then
+        indexed before the key trigger's UPDATE deletes and re-indexes it.
+        """
+        for table, (index, plate, person, key) in self.SEARCH_INDEXES.items():
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (index,))
+            if cur.fetchone() is None:
+                continue  # no FTS5 (see _migration_plate_search)
+            for name in ("insert", "delete", "update"):
+                cur.execute(f"DROP TRIGGER IF EXISTS trg_{index}_{name}")
+            insert = f"INSERT INTO {index}(rowid, {plate}, {person}) VALUES (NEW.id, NEW.{key}, NEW.{person});"
+            delete = f"INSERT INTO {index}({index}, rowid, {plate}, {person}) VALUES ('delete', OLD.id, OLD.{key}, OLD.{person});"
+            for name, event, body in (("insert", "INSERT", insert), ("delete", "DELETE", delete),
+                                      ("update", f"UPDATE OF {key}, {person}", delete + insert)):
+                cur.execute(f"CREATE TRIGGER trg_{index}_{name} AFTER {event} ON {table} BEGIN {body} END")
+
+    def rekey_plates(self, force=False):
+        """Bring the plate key columns and triggers in line with the active plate rules.
+
+        Runs on every start; it does nothing unless the rules changed (e.g. a
+        new config.PLATE_COUNTRY) since the keys were last written, or
+        `force` is set. Returns the number of rows whose key changed.
+        """
+        signature = plate_rules_signature()
+        if not force and self.get_setting("plate_rules") == signature:
+            return 0
+        cur = self.conn.cursor()
+        cur.execute("PRAGMA user_version")
+        if cur.fetchone()[0] < 9:
+            return 0  # no key columns (see _migration_plate_keys)
+        self.conn.create_function("plate_key", 1, plate_key, deterministic=True)
+        changed = 0
+        with self.transaction() as cur:
+            self._create_plate_key_triggers(cur)
+            self._create_search_triggers(cur)
+            for table, (plate, key) in self.PLATE_KEYS.items():
+                # the search index triggers follow the key column
+                cur.execute(f"UPDATE {table} SET {key} = plate_key({plate}) WHERE {key} IS NOT plate_key({plate})")
+                changed += cur.rowcount
+            cur.execute("INSERT OR REPLACE INTO settings(key, value) VALUES('plate_rules', ?)", (signature,))
+        return changed
 
     def ensure_admin(self):
         """Ensure default admin account exists"""
-        self.cursor.execute("SELECT * FROM users WHERE username='admin'")
-        if not self.cursor.fetchone():
+        if not self.get_user("admin"):
             admin_pw = hash_password("admin123")  # default, tell user to change
-            self.cursor.execute("INSERT INTO users(username,password_hash,full_name,role) VALUES(?,?,?,?)",
-                                ("admin", admin_pw, "Administrator", "admin"))
-            self.conn.commit()
+            with self.transaction() as cur:
+                cur.execute("INSERT INTO users(username,password_hash,full_name,role) VALUES(?,?,?,?)",
+                            ("admin", admin_pw, "Administrator", "admin"))
 
     # --- users CRUD ---
     def create_user(self, username, password, full_name, role="user", email=""):
         """Create a new user account"""
         pw_hash = hash_password(password)
-        self.cursor.execute("INSERT INTO users(username,password_hash,full_name,role,email) VALUES(?,?,?,?,?)",
-                            (username, pw_hash, full_name, role, email))
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute("INSERT INTO users(username,password_hash,full_name,role,email) VALUES(?,?,?,?,?)",
+                        (username, pw_hash, full_name, role, email))
 
     def get_user(self, username):
         """Get user details by username"""
-        self.cursor.execute("SELECT username,full_name,role,email FROM users WHERE username=?", (username,))
-        return self.cursor.fetchone()
+        with self._read() as cur:
+            cur.execute("SELECT username,full_name,role,email FROM users WHERE username=?", (username,))
+            return cur.fetchone()
 
     def validate_user(self, username, password):
         """Validate user credentials"""
-        self.cursor.execute("SELECT password_hash FROM users WHERE username=?", (username,))
-        row = self.cursor.fetchone()
-        if not row:
-            return False
-        return row[0] == hash_password(password)
+        with self._read() as cur:
+            cur.execute("SELECT password_hash FROM users WHERE username=?", (username,))
+            row = cur.fetchone()
+            if not row:
+                return False
+            return row[0] == hash_password(password)
 
     def update_password(self, username, new_password):
         """Update user password"""
-        self.cursor.execute("UPDATE users SET password_hash=? WHERE username=?", (hash_password(new_password), username))
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute("UPDATE users SET password_hash=? WHERE username=?", (hash_password(new_password), username))
 
     def update_user(self, username, full_name=None, email=None, role=None):
         """Update user details"""
@@ -171,25 +685,31 @@ class DB:
             parts.append("role=?"); vals.append(role)
         if parts:
             vals.append(username)
-            self.cursor.execute(f"UPDATE users SET {', '.join(parts)} WHERE username=?", vals)
-            self.conn.commit()
+            with self.transaction() as cur:
+                cur.execute(f"UPDATE users SET {', '.join(parts)} WHERE username=?", vals)
 
     def delete_user(self, username):
         """Delete a user account"""
-        self.cursor.execute("DELETE FROM users WHERE username=?", (username,))
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM users WHERE username=?", (username,))
 
     def list_users(self):
         """Get list of all users"""
-        self.cursor.execute("SELECT username, full_name, role, email FROM users")
-        return self.cursor.fetchall()
+        with self._read() as cur:
+            cur.execute("SELECT username, full_name, role, email FROM users")
+            return cur.fetchall()
 
     # --- slots CRUD ---
     def create_slot(self, name, type_allowed, hourly_rate=0):
         """Create a new parking slot"""
-        self.cursor.execute("INSERT INTO slots(name,type_allowed,status,hourly_rate) VALUES(?,?,?,?)", 
-                          (name, type_allowed, "free", hourly_rate))
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute("INSERT INTO slots(name,type_allowed,status,hourly_rate) VALUES(?,?,?,?)", 
+                        (name, type_allowed, "free", hourly_rate))
+            slot_id = cur.lastrowid
+            self._slots_written(cur, 1)
+        self.slot_index.put(slot_id, name, type_allowed, "free", hourly_rate)
+        self._slots_touched()
+        self._publish("slots_changed", slot_id=slot_id)
 
     def update_slot(self, slot_id, name=None, type_allowed=None, status=None, hourly_rate=None):
         """Update parking slot details"""
@@ -204,171 +724,673 @@ class DB:
         if hourly_rate is not None:
             parts.append("hourly_rate=?"); vals.append(hourly_rate)
         vals.append(slot_id)
-        self.cursor.execute(f"UPDATE slots SET {', '.join(parts)} WHERE id=?", vals)
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute(f"UPDATE slots SET {', '.join(parts)} WHERE id=?", vals)
+            self._slots_written(cur, cur.rowcount)
+        row = self.get_slot_by_id(slot_id)
+        if row:
+            self.slot_index.put(row[0], row[1], row[2], row[3], row[4])
+            self._slots_touched()
+        self._publish("slots_changed", slot_id=slot_id)
 
     def delete_slot(self, slot_id):
         """Delete a parking slot"""
-        self.cursor.execute("DELETE FROM slots WHERE id=?", (slot_id,))
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute("DELETE FROM slots WHERE id=?", (slot_id,))
+            self._slots_written(cur, cur.rowcount)
+        self.slot_index.remove(slot_id)
+        self._slots_touched()
+        self._publish("slots_changed", slot_id=slot_id)
 
     def list_slots(self):
         """Get list of all parking slots"""
-        self.cursor.execute("SELECT id,name,type_allowed,status,hourly_rate FROM slots")
-        return self.cursor.fetchall()
+        with self._read() as cur:
+            cur.execute("SELECT id,name,type_allowed,status,hourly_rate FROM slots")
+            return cur.fetchall()
     
     def get_slot_by_id(self, slot_id):
         """Get parking slot by ID"""
-        self.cursor.execute("SELECT id,name,type_allowed,status,hourly_rate FROM slots WHERE id=?", (slot_id,))
-        return self.cursor.fetchone()
+        with self._read() as cur:
+            cur.execute("SELECT id,name,type_allowed,status,hourly_rate FROM slots WHERE id=?", (slot_id,))
+            return cur.fetchone()
 
     def get_free_slot_for_type(self, vtype):
         """Find first available free slot for vehicle type"""
-        # try exact type then 'Both'
-        self.cursor.execute("SELECT id,name,hourly_rate FROM slots WHERE status='free' AND (type_allowed=? OR type_allowed='Both') LIMIT 1", (vtype,))
-        return self.cursor.fetchone()
+        # served from the in-memory free lists (exact type, then 'Both')
+        self._sync_slot_index()
+        return self.slot_index.find_free(vtype)
+
+    def park_in_free_slot(self, number, vtype, username, entry_time, payment_method='cash', attempts=3):
+        """Find a free slot for vtype and park in it, retrying if another gate takes it first.
+
+        Returns the (id, name, hourly_rate) of the slot used, or None if none
+        is free. Raises AlreadyParked like park_vehicle.
+        """
+        for _ in range(attempts):
+            slot = self.get_free_slot_for_type(vtype)
+            if slot is None:
+                return None
+            try:
+                self.park_vehicle(number, vtype, username, slot[0], entry_time, payment_method)
+                return slot
+            except SlotTaken:
+                continue
+        return None
+
+    def scan_free_slot_for_type(self, vtype):
+        """Find a free slot for vehicle type by scanning the slots table"""
+        with self._read() as cur:
+            cur.execute("SELECT id,name,hourly_rate FROM slots WHERE status='free' AND (type_allowed=? OR type_allowed='Both') LIMIT 1", (vtype,))
+            return cur.fetchone()
 
     # --- vehicles CRUD ---
     def park_vehicle(self, number, vtype, username, slot_id, entry_time, payment_method='cash'):
-        """Park a vehicle in a slot"""
-        self.cursor.execute("""
-            INSERT INTO vehicles(number,type,user,slot_id,entry_time,exit_time,payment_method)
-            VALUES(?,?,?,?,?,NULL,?)
-        """, (number, vtype, username, slot_id, entry_time, payment_method))
-        self.cursor.execute("UPDATE slots SET status='occupied' WHERE id=?", (slot_id,))
-        self.conn.commit()
+        """Park a vehicle in a slot.
+
+        Raises AlreadyParked if its plate has an open visit and SlotTaken if
+        the slot is not free in the database (the slot index is only a hint:
+        another process may have taken the slot since it was looked up).
+        """
+        key = plate_key(number)
+        taken = False
+        with self.transaction() as cur:
+            cur.execute("SELECT number, slot_id FROM vehicles WHERE number_key=? AND exit_time IS NULL LIMIT 1", (key,))
+            open_visit = cur.fetchone()
+            if open_visit is None:
+                # the guarded UPDATE is what allocates the slot
+                cur.execute("UPDATE slots SET status='occupied' WHERE id=? AND status='free'", (slot_id,))
+                taken = cur.rowcount == 0
+            if open_visit is None and not taken:
+                cur.execute("""
+                    INSERT INTO vehicles(number,number_key,type,user,slot_id,entry_time,entry_ts,exit_time,payment_method)
+                    VALUES(?,?,?,?,?,?,CAST(strftime('%s', ?) AS INTEGER),NULL,?)
+                """, (number, key, vtype, username, slot_id, entry_time, entry_time, payment_method))
+                vehicle_id = cur.lastrowid
+                self._slots_written(cur, 1)
+        # decided inside the block, raised outside it: nothing was written, so nothing to roll back
+        if open_visit:
+            raise AlreadyParked(f"{open_visit[0]} is already parked (slot {open_visit[1]})")
+        if taken:
+            # the index said free but the table did not; correct it before a retry
+            self._resync_slot(slot_id)
+            raise SlotTaken(f"slot {slot_id} is not free")
+        self.slot_index.mark_occupied(slot_id)
+        self._slots_touched()
+        self._publish("vehicle_parked", id=vehicle_id, number=number, type=vtype, user=username,
+                      slot_id=slot_id, entry_time=entry_time, payment_method=payment_method)
 
     def exit_vehicle(self, number, exit_time):
-        """Exit a vehicle from parking"""
-        # update latest vehicle with this number that has null exit_time
-        self.cursor.execute("""
-            UPDATE vehicles SET exit_time=?
-            WHERE number=? AND exit_time IS NULL
-        """, (exit_time, number))
-        # free slot(s)
-        self.cursor.execute("SELECT slot_id FROM vehicles WHERE number=? ORDER BY id DESC LIMIT 1", (number,))
-        r = self.cursor.fetchone()
-        if r and r[0]:
-            self.cursor.execute("UPDATE slots SET status='free' WHERE id=?", (r[0],))
-        self.conn.commit()
-        return self.cursor.rowcount
+        """Exit a vehicle from parking; returns 1 if an open visit was closed, else 0"""
+        return 1 if self.close_visit(number, exit_time) else 0
+
+    def close_visit(self, number, exit_time):
+        """Close a plate's open visit and free its slot.
+
+        Returns (visit, amount, duration_hours) with the visit row as it now
+        stands (see get_last_vehicle_record) and the fee at the slot's rate,
+        or None if the plate is not parked. The visit is closed and its slot
+        freed by one UPDATE ... RETURNING each, in one transaction.
+        """
+        with self.transaction() as cur:
+            closed = self._close_open_visit(cur, plate_key(number), exit_time)
+        if closed is None:
+            return None
+        visit, rate = closed
+        self._visit_closed(visit)
+        amount, duration = stay_fee(visit[5], exit_time, visit[2], rate)
+        return visit, amount, duration
+
+    def _close_open_visit(self, cur, key, exit_time):
+        """Close the newest open visit for a plate key; returns (visit, slot rate) or None"""
+        cur.execute("""
+            UPDATE vehicles SET exit_time=?, exit_ts=CAST(strftime('%s', ?) AS INTEGER)
+            WHERE id = (SELECT id FROM vehicles WHERE number_key=? AND exit_time IS NULL ORDER BY id DESC LIMIT 1)
+            RETURNING id,number,type,user,slot_id,entry_time,exit_time,payment_method
+        """, (exit_time, exit_time, key))
+        # fetchall, not fetchone: a RETURNING statement left unfinished would block the commit
+        rows = cur.fetchall()
+        if not rows:
+            return None
+        visit, rate = rows[0], None
+        if visit[4]:
+            cur.execute("UPDATE slots SET status='free' WHERE id=? RETURNING hourly_rate", (visit[4],))
+            slot = cur.fetchall()
+            rate = slot[0][0] if slot else None
+            self._slots_written(cur, len(slot))
+        return visit, rate
+
+    def _visit_closed(self, visit):
+        """Update the slot index and announce an exit once its transaction has committed"""
+        if visit[4]:
+            self.slot_index.mark_free(visit[4])
+            self._slots_touched()
+        self._publish("vehicle_exited", number=visit[1], exit_time=visit[6], slot_id=visit[4])
+
+    def checkout(self, number, exit_time, generated_by, receipt_path="", allow_exit=True):
+        """Exit (if still parked), price and pay a plate's latest visit in one transaction.
+
+        Returns (visit, amount, duration_hours, owner, exited) with `owner`
+        the (full_name, email) of the user who parked it and `exited` True if
+        the visit was still open and this call closed it, or None if the
+        plate has no visit. One statement per table: the visit is closed (or, if it
+        already exited, read) and its slot freed by UPDATE ... RETURNING, the
+        payment and its revenue_daily row written, the owner read.
+
+        With allow_exit=False a still-parked visit is left alone and
+        StillParked is raised, so the caller can confirm the exit first.
+        """
+        key = plate_key(number)
+        paid_at = now_str()
+        still_parked = False
+        with self.transaction() as cur:
+            closed = self._close_open_visit(cur, key, exit_time) if allow_exit else None
+            if closed is None:
+                cur.execute("""
+                    SELECT v.id,v.number,v.type,v.user,v.slot_id,v.entry_time,v.exit_time,v.payment_method,s.hourly_rate
+                    FROM vehicles v LEFT JOIN slots s ON s.id = v.slot_id
+                    WHERE v.number_key=? ORDER BY v.id DESC LIMIT 1
+                """, (key,))
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                visit, rate = row[:8], row[8]
+                still_parked = visit[6] is None
+            else:
+                visit, rate = closed
+            if not still_parked:
+                amount, duration = stay_fee(visit[5], visit[6], visit[2], rate)
+                payment_method = visit[7] or "cash"
+                self._insert_payment(cur, visit[1], amount, paid_at, duration, generated_by, receipt_path, payment_method)
+                cur.execute("SELECT full_name, email FROM users WHERE username=?", (visit[3],))
+                owner = cur.fetchone()
+        # decided inside the block, raised outside it: nothing was written
+        if still_parked:
+            raise StillParked(f"{visit[1]} has not exited")
+        if closed is not None:
+            self._visit_closed(visit)
+        self._payment_recorded(visit[1], amount, paid_at, generated_by, payment_method)
+        return visit, amount, duration, owner, closed is not None
 
     def list_parked(self):
         """Get list of all parked vehicles"""
-        self.cursor.execute("SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles ORDER BY id DESC")
-        return self.cursor.fetchall()
+        with self._read() as cur:
+            cur.execute("SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles ORDER BY id DESC")
+            return cur.fetchall()
+
+    def iter_vehicles(self, date_from="", date_to=""):
+        """Iterate over vehicle records by entry time range, newest first (streamed for exports)"""
+        query, params = self._date_filter("SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles WHERE 1=1",
+                                          "entry_time", date_from, date_to)
+        return self._stream(query + " ORDER BY id DESC", params)
+
+    def iter_stays(self, date_from="", date_to=""):
+        """Iterate over (entry_ts, exit_ts, type, slot hourly_rate) of closed visits by exit time range"""
+        query, params = self._date_filter("""
+            SELECT v.entry_ts, v.exit_ts, v.type, s.hourly_rate
+            FROM vehicles v LEFT JOIN slots s ON s.id = v.slot_id
+            WHERE v.exit_time IS NOT NULL""", "v.exit_time", date_from, date_to)
+        return self._stream(query, params)
+
+    def list_vehicles_page(self, before_id=None, after_id=None, limit=100):
+        """Get one page of vehicle records, newest first (keyset pagination on id)"""
+        return self._page("SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles WHERE 1=1",
+                          [], before_id, after_id, limit)
+
+    def _page(self, query, params, before_id=None, after_id=None, limit=100):
+        """Run `query` for the page of rows just below before_id or just above after_id.
 
-    def search_vehicles(self, search_term="", date_from="", date_to=""):
-        """Search vehicles by number, user, or date range"""
-        query = "SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles WHERE 1=1"
+        Rows always come back newest first; with neither bound the newest page
+        is returned. Each page is an index range seek on the primary key, so its
+        cost does not depend on how deep into the history it is.
+        """
+        params = list(params)
+        if after_id is not None:
+            query += " AND id > ? ORDER BY id ASC LIMIT ?"
+            params.extend([after_id, int(limit)])
+        else:
+            if before_id is not None:
+                query += " AND id < ?"
+                params.append(before_id)
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(int(limit))
+        with self._read() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        if after_id is not None:
+            rows.reverse()
+        return rows
+
+    def list_active_vehicles(self, user=None, limit=None):
+        """Get vehicles still parked (no exit time), newest first"""
+        query = "SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles WHERE exit_time IS NULL"
         params = []
         
-        if search_term:
-            query += " AND (number LIKE ? OR user LIKE ?)"
-            params.extend([f"%{search_term}%", f"%{search_term}%"])
-        
-        if date_from:
-            query += " AND entry_time >= ?"
-            params.append(date_from)
-        
-        if date_to:
-            query += " AND entry_time <= ?"
-            params.append(date_to)
+        if user is not None:
+            query += " AND user=?"
+            params.append(user)
         
         query += " ORDER BY id DESC"
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._read() as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    def count_active_vehicles(self):
+        """Count vehicles still parked"""
+        with self._read() as cur:
+            cur.execute("SELECT COUNT(*) FROM vehicles WHERE exit_time IS NULL")
+            return cur.fetchone()[0]
+
+    def count_vehicle_records(self, date_from="", date_to=""):
+        """Count vehicle records (parking history), optionally by entry time range"""
+        if not date_from and not date_to:
+            # the whole history: the maintained count, not a COUNT(*) over every visit
+            with self._read() as cur:
+                try:
+                    cur.execute("SELECT value FROM row_counts WHERE name='vehicles'")
+                    row = cur.fetchone()
+                except sqlite3.OperationalError:
+                    row = None  # before _migration_row_counts
+                if row is not None:
+                    return row[0]
+        query, params = self._date_filter("SELECT COUNT(*) FROM vehicles WHERE 1=1", "entry_time", date_from, date_to)
+        with self._read() as cur:
+            cur.execute(query, params)
+            return cur.fetchone()[0]
+
+    @classmethod
+    def _date_filter(cls, query, column, date_from="", date_to=""):
+        """Append inclusive date bounds on the TEXT time `column` to a WHERE 1=1 query.
+
+        Bounds are compared on the column's epoch twin; one that is not a
+        YYYY-MM-DD[ HH:MM:SS] time falls back to comparing the text.
+        """
+        prefix, _, name = column.rpartition(".")
+        epoch_column = f"{prefix}.{cls.EPOCH_COLUMNS[name]}" if prefix else cls.EPOCH_COLUMNS[name]
+        params = []
+        for op, bound in ((">=", date_from), ("<=", date_to)):
+            if not bound:
+                continue
+            try:
+                params.append(to_epoch(bound))
+                query += f" AND {epoch_column} {op} ?"
+            except ValueError:
+                params.append(bound)
+                query += f" AND {column} {op} ?"
+        return query, params
+
+    def get_stay_stats(self, date_from="", date_to=""):
+        """Count and average length in hours of closed visits by exit time range"""
+        query, params = self._date_filter("SELECT COUNT(*), AVG(exit_ts - entry_ts) FROM vehicles WHERE exit_ts IS NOT NULL",
+                                          "exit_time", date_from, date_to)
+        with self._read() as cur:
+            cur.execute(query, params)
+            count, avg_seconds = cur.fetchone()
+            return {'count': count, 'avg_hours': (avg_seconds or 0) / 3600.0}
+
+    def search_vehicles(self, search_term="", date_from="", date_to="", limit=None, before_id=None, after_id=None,
+                        cancelled=None):
+        """Search vehicles by partial plate, user, or entry time range, newest first.
+
+        With `limit`, pass the id of the last row as `before_id` for the next
+        page (or of the first row as `after_id` for the previous one), as with
+        list_vehicles_page. See _search for `cancelled`.
+        """
+        return self._search("vehicles", "id,number,type,user,slot_id,entry_time,exit_time,payment_method", "entry_time",
+                            search_term, date_from, date_to, limit, before_id, after_id, cancelled)
 
     def get_last_vehicle_record(self, number):
-        """Get last vehicle record by number"""
-        self.cursor.execute("SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles WHERE number=? ORDER BY id DESC LIMIT 1", (number,))
-        return self.cursor.fetchone()
+        """Get last vehicle record by number (matched on the plate key)"""
+        with self._read() as cur:
+            cur.execute("SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles WHERE number_key=? ORDER BY id DESC LIMIT 1", (plate_key(number),))
+            return cur.fetchone()
 
     # --- payments ---
     def record_payment(self, vehicle_number, amount, duration_hours, generated_by, receipt_path, payment_method="cash"):
         """Record a payment transaction"""
         paid_at = now_str()
-        self.cursor.execute("INSERT INTO payments(vehicle_number,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method) VALUES(?,?,?,?,?,?,?)",
-                            (vehicle_number, amount, paid_at, duration_hours, generated_by, receipt_path, payment_method))
-        self.conn.commit()
+        with self.transaction() as cur:
+            self._insert_payment(cur, vehicle_number, amount, paid_at, duration_hours, generated_by, receipt_path, payment_method)
+        self._payment_recorded(vehicle_number, amount, paid_at, generated_by, payment_method)
+
+    def _insert_payment(self, cur, vehicle_number, amount, paid_at, duration_hours, generated_by, receipt_path, payment_method):
+        """Insert one payment and add it to the daily rollup (call inside transaction())"""
+        cur.execute("INSERT INTO payments(vehicle_number,vehicle_key,amount,paid_at,paid_ts,duration_hours,generated_by,receipt_path,payment_method) VALUES(?,?,?,?,?,?,?,?,?)",
+                    (vehicle_number, plate_key(vehicle_number), amount, paid_at, to_epoch(paid_at), duration_hours, generated_by, receipt_path, payment_method))
+        # keep the daily rollup in the same transaction
+        cur.execute("""
+            INSERT INTO revenue_daily(day,payment_method,generated_by,total,count) VALUES(?,?,?,?,1)
+            ON CONFLICT(day,payment_method,generated_by)
+            DO UPDATE SET total=total+excluded.total, count=count+1
+        """, (paid_at[:10], payment_method or '', generated_by or '', amount or 0))
+
+    def _payment_recorded(self, vehicle_number, amount, paid_at, generated_by, payment_method):
+        """Invalidate revenue caches and announce a committed payment"""
+        self._versions["revenue"] += 1
+        self._publish("payment_recorded", vehicle_number=vehicle_number, amount=amount, paid_at=paid_at,
+                      generated_by=generated_by, payment_method=payment_method)
+
+    def record_payments(self, payments):
+        """Record many payments in one transaction.
+
+        `payments` are (vehicle_number, amount, duration_hours, generated_by,
+        receipt_path, payment_method) tuples; all share the same paid_at.
+        """
+        paid_at = now_str()
+        paid_ts = to_epoch(paid_at)
+        rollup = {}
+        for _, amount, _, generated_by, _, payment_method in payments:
+            key = (paid_at[:10], payment_method or '', generated_by or '')
+            total, count = rollup.get(key, (0, 0))
+            rollup[key] = (total + (amount or 0), count + 1)
+        with self.transaction() as cur:
+            cur.executemany("INSERT INTO payments(vehicle_number,vehicle_key,amount,paid_at,paid_ts,duration_hours,generated_by,receipt_path,payment_method) VALUES(?,?,?,?,?,?,?,?,?)",
+                            [(p[0], plate_key(p[0]), p[1], paid_at, paid_ts, p[2], p[3], p[4], p[5]) for p in payments])
+            cur.executemany("""
+                INSERT INTO revenue_daily(day,payment_method,generated_by,total,count) VALUES(?,?,?,?,?)
+                ON CONFLICT(day,payment_method,generated_by)
+                DO UPDATE SET total=total+excluded.total, count=count+excluded.count
+            """, [key + value for key, value in rollup.items()])
+        self._versions["revenue"] += 1
+        for p in payments:
+            self._publish("payment_recorded", vehicle_number=p[0], amount=p[1], paid_at=paid_at,
+                          generated_by=p[3], payment_method=p[5])
+
+    def list_unpaid_exits(self, date_from="", date_to=""):
+        """Get exited visits in an exit time range with no payment recorded since the exit"""
+        query, params = self._date_filter("""
+            SELECT id,number,type,user,slot_id,entry_time,exit_time,payment_method FROM vehicles v
+            WHERE exit_time IS NOT NULL""", "exit_time", date_from, date_to)
+        query += """ AND NOT EXISTS (SELECT 1 FROM payments p WHERE p.vehicle_key = v.number_key AND p.paid_ts >= v.exit_ts)
+            ORDER BY id"""
+        with self._read() as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
 
     def list_payments(self):
         """Get list of all payments"""
-        self.cursor.execute("SELECT id,vehicle_number,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method FROM payments ORDER BY id DESC")
-        return self.cursor.fetchall()
+        with self._read() as cur:
+            cur.execute("SELECT id,vehicle_number,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method FROM payments ORDER BY id DESC")
+            return cur.fetchall()
     
-    def search_payments(self, search_term="", date_from="", date_to=""):
-        """Search payments by vehicle number or date range"""
-        query = "SELECT id,vehicle_number,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method FROM payments WHERE 1=1"
-        params = []
-        
-        if search_term:
-            query += " AND (vehicle_number LIKE ? OR generated_by LIKE ?)"
-            params.extend([f"%{search_term}%", f"%{search_term}%"])
-        
-        if date_from:
-            query += " AND paid_at >= ?"
-            params.append(date_from)
-        
-        if date_to:
-            query += " AND paid_at <= ?"
-            params.append(date_to)
-        
-        query += " ORDER BY id DESC"
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
+    def iter_payments(self, date_from="", date_to=""):
+        """Iterate over payments by paid_at range, newest first (streamed for exports)"""
+        query, params = self._date_filter("SELECT id,vehicle_number,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method FROM payments WHERE 1=1",
+                                          "paid_at", date_from, date_to)
+        return self._stream(query + " ORDER BY id DESC", params)
+
+    def count_payments(self, date_from="", date_to=""):
+        """Count payments, optionally by paid_at range"""
+        query, params = self._date_filter("SELECT COUNT(*) FROM payments WHERE 1=1", "paid_at", date_from, date_to)
+        with self._read() as cur:
+            cur.execute(query, params)
+            return cur.fetchone()[0]
+    
+    def list_payments_page(self, before_id=None, after_id=None, limit=100):
+        """Get one page of payments, newest first (keyset pagination on id)"""
+        return self._page("SELECT id,vehicle_number,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method FROM payments WHERE 1=1",
+                          [], before_id, after_id, limit)
+    
+    def search_payments(self, search_term="", date_from="", date_to="", limit=None, before_id=None, after_id=None,
+                        cancelled=None):
+        """Search payments by partial plate, operator, or paid_at range, newest first.
+
+        Paged like search_vehicles.
+        """
+        return self._search("payments", "id,vehicle_number,amount,paid_at,duration_hours,generated_by,receipt_path,payment_method",
+                            "paid_at", search_term, date_from, date_to, limit, before_id, after_id, cancelled)
+
+    def _search(self, table, columns, time_column, search_term, date_from, date_to, limit, before_id,
+                after_id=None, cancelled=None):
+        """Substring search on a table's plate and operator columns.
+
+        Terms of 3+ characters are looked up in the trigram index, walked
+        newest first, so a limited page stops at the first `limit` matches;
+        shorter terms (or a database without FTS5) fall back to LIKE.
+        `cancelled`, a callable polled while the query runs, aborts it with
+        SearchCancelled once it returns True (a newer search superseded it).
+        """
+        index, plate, person, plate_column = self.SEARCH_INDEXES[table]
+        term = (search_term or "").strip()
+        key = plate_key(term)
+        columns = ",".join(f"{table}.{c}" for c in columns.split(","))
+        if term and len(key) >= 3 and self._has_search_index(index):
+            query = f"SELECT {columns} FROM {index} JOIN {table} ON {table}.id = {index}.rowid WHERE {index} MATCH ?"
+            quote = lambda text: '"' + text.replace('"', '""') + '"'
+            params = [f"{plate} : {quote(key)} OR {person} : {quote(term)}"]
+            order = f"{index}.rowid"
+        else:
+            query = f"SELECT {columns} FROM {table} WHERE 1=1"
+            params = []
+            if term:
+                query += f" AND ({plate_column} LIKE ? OR {person} LIKE ?)"
+                params.extend([f"%{key}%", f"%{term}%"])
+            order = f"{table}.id"
+        query, bounds = self._date_filter(query, f"{table}.{time_column}", date_from, date_to)
+        params.extend(bounds)
+        if after_id is not None:
+            query += f" AND {order} > ? ORDER BY {order} ASC"
+            params.append(after_id)
+        else:
+            if before_id is not None:
+                query += f" AND {order} < ?"
+                params.append(before_id)
+            query += f" ORDER BY {order} DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._read() as cur:
+            if cancelled is not None:
+                cur.connection.set_progress_handler(cancelled, 1000)
+            try:
+                cur.execute(query, params)
+                rows = cur.fetchall()
+            except sqlite3.OperationalError as e:
+                if cancelled is not None and str(e) == "interrupted":
+                    raise SearchCancelled(search_term) from None
+                raise
+            finally:
+                if cancelled is not None:
+                    cur.connection.set_progress_handler(None, 0)
+        if after_id is not None:
+            rows.reverse()
+        return rows
+
+    def _has_search_index(self, index):
+        """True if the FTS5 table exists (migration 8 skips it where FTS5 is missing)"""
+        if index not in self._search_indexes:
+            with self._read() as cur:
+                cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (index,))
+                self._search_indexes[index] = cur.fetchone() is not None
+        return self._search_indexes[index]
     
     def get_revenue_stats(self, date_from="", date_to=""):
         """Get revenue statistics for a date range"""
-        query = "SELECT SUM(amount) as total, COUNT(*) as count FROM payments WHERE 1=1"
+        if not self._is_day(date_from) or not self._is_day(date_to):
+            return self._scan_revenue_stats(date_from, date_to)
+        # whole-day bounds: answered from the daily rollup
+        query = "SELECT SUM(total), SUM(count) FROM revenue_daily WHERE 1=1"
         params = []
         
         if date_from:
-            query += " AND paid_at >= ?"
+            query += " AND day >= ?"
             params.append(date_from)
         
         if date_to:
-            query += " AND paid_at <= ?"
+            # paid_at <= 'YYYY-MM-DD' only matches days before date_to
+            query += " AND day < ?"
             params.append(date_to)
         
-        self.cursor.execute(query, params)
-        result = self.cursor.fetchone()
-        return {'total': result[0] or 0, 'count': result[1] or 0}
+        with self._read() as cur:
+            cur.execute(query, params)
+            result = cur.fetchone()
+            return {'total': result[0] or 0, 'count': result[1] or 0}
+
+    @staticmethod
+    def _is_day(value):
+        """True for '' or a bare YYYY-MM-DD date"""
+        return not value or (len(value) == 10 and value[4] == '-' and value[7] == '-')
+
+    def _scan_revenue_stats(self, date_from="", date_to=""):
+        """Revenue statistics straight from payments (for sub-day bounds)"""
+        query, params = self._date_filter("SELECT SUM(amount) as total, COUNT(*) as count FROM payments WHERE 1=1",
+                                          "paid_at", date_from, date_to)
+        
+        with self._read() as cur:
+            cur.execute(query, params)
+            result = cur.fetchone()
+            return {'total': result[0] or 0, 'count': result[1] or 0}
     
     def get_daily_revenue(self, days=7):
         """Get daily revenue for the last N days"""
-        self.cursor.execute("""
-            SELECT DATE(paid_at) as date, SUM(amount) as revenue
+        with self._read() as cur:
+            # local date, like the stored times (SQLite's 'now' is UTC)
+            since = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+            cur.execute("""
+                SELECT day as date, SUM(total) as revenue
+                FROM revenue_daily
+                WHERE day >= ?
+                GROUP BY day
+                ORDER BY day
+            """, (since,))
+            return cur.fetchall()
+
+    def get_user_payment_summary(self, username):
+        """Get total paid and the latest payment recorded by a user"""
+        with self._read() as cur:
+            cur.execute("SELECT SUM(total) FROM revenue_daily WHERE generated_by=?", (username or '',))
+            total = cur.fetchone()[0] or 0
+            cur.execute("SELECT amount, paid_at FROM payments WHERE generated_by=? ORDER BY id DESC LIMIT 1", (username,))
+            return {'total': total, 'last': cur.fetchone()}
+
+    def rebuild_revenue_rollup(self):
+        """Recompute revenue_daily from the payments table"""
+        with self.transaction() as cur:
+            self._fill_revenue_rollup(cur)
+        self._versions["revenue"] += 1
+
+    def _fill_revenue_rollup(self, cur, day="DATE(paid_ts, 'unixepoch')"):
+        cur.execute("DELETE FROM revenue_daily")
+        cur.execute(f"""
+            INSERT INTO revenue_daily(day,payment_method,generated_by,total,count)
+            SELECT COALESCE({day}, ''), COALESCE(payment_method, ''), COALESCE(generated_by, ''),
+                   COALESCE(SUM(amount), 0), COUNT(*)
             FROM payments
-            WHERE paid_at >= datetime('now', '-' || ? || ' days')
-            GROUP BY DATE(paid_at)
-            ORDER BY date
-        """, (days,))
-        return self.cursor.fetchall()
+            GROUP BY 1, 2, 3
+        """)
     
     def get_occupancy_stats(self):
         """Get current slot occupancy statistics"""
-        self.cursor.execute("SELECT status, COUNT(*) FROM slots GROUP BY status")
-        stats = dict(self.cursor.fetchall())
+        # served from the counters kept by the slot index; the only query is
+        # PRAGMA data_version, to rebuild it if another connection has written
+        self._sync_slot_index()
+        return self._occupancy_from_counts(self.slot_index.counts())
+
+    @staticmethod
+    def _occupancy_from_counts(counts):
+        """Shape {type_allowed: {status: n}} into the occupancy stats dict"""
+        by_type = {}
+        for type_allowed, statuses in counts.items():
+            by_type[type_allowed] = {
+                'occupied': statuses.get('occupied', 0),
+                'free': statuses.get('free', 0),
+                'total': sum(statuses.values())
+            }
         return {
-            'occupied': stats.get('occupied', 0),
-            'free': stats.get('free', 0),
-            'total': sum(stats.values())
+            'occupied': sum(t['occupied'] for t in by_type.values()),
+            'free': sum(t['free'] for t in by_type.values()),
+            'total': sum(t['total'] for t in by_type.values()),
+            'by_type': by_type
         }
+
+    def check_occupancy_counters(self, repair=False):
+        """Recompute occupancy from the slots table and compare with the counters.
+
+        Returns a list of (type_allowed, status, counted, actual) mismatches;
+        with repair=True the slot index is rebuilt when any are found.
+        """
+        with self._read() as cur:
+            cur.execute("SELECT type_allowed, status, COUNT(*) FROM slots GROUP BY type_allowed, status")
+            actual = {}
+            for type_allowed, status, n in cur.fetchall():
+                actual.setdefault(type_allowed, {})[status] = n
+        counted = self.slot_index.counts()
+        mismatches = []
+        for type_allowed in sorted(set(actual) | set(counted), key=str):
+            a, c = actual.get(type_allowed, {}), counted.get(type_allowed, {})
+            for status in sorted(set(a) | set(c), key=str):
+                if a.get(status, 0) != c.get(status, 0):
+                    mismatches.append((type_allowed, status, c.get(status, 0), a.get(status, 0)))
+        if mismatches and repair:
+            self._rebuild_slot_index()
+        return mismatches
     
+    # --- email outbox ---
+    def queue_email(self, recipient, subject, body, attachment_path=None):
+        """Persist an email for background delivery and return its id"""
+        with self.transaction() as cur:
+            cur.execute("""
+                INSERT INTO email_outbox(recipient,subject,body,attachment_path,status,attempts,next_attempt,created_at)
+                VALUES(?,?,?,?,'pending',0,?,?)
+            """, (recipient, subject, body, attachment_path, time.time(), now_str()))
+            return cur.lastrowid
+
+    def get_due_emails(self, now=None, limit=20):
+        """Get pending emails whose next attempt is due, oldest first"""
+        with self._read() as cur:
+            cur.execute("""
+                SELECT id,recipient,subject,body,attachment_path,attempts FROM email_outbox
+                WHERE status='pending' AND next_attempt <= ? ORDER BY next_attempt, id LIMIT ?
+            """, (time.time() if now is None else now, limit))
+            return cur.fetchall()
+
+    def next_email_due(self):
+        """Epoch time of the next pending email, or None if the queue is empty"""
+        with self._read() as cur:
+            cur.execute("SELECT MIN(next_attempt) FROM email_outbox WHERE status='pending'")
+            return cur.fetchone()[0]
+
+    def count_pending_emails(self):
+        """Number of emails still waiting for delivery"""
+        with self._read() as cur:
+            cur.execute("SELECT COUNT(*) FROM email_outbox WHERE status='pending'")
+            return cur.fetchone()[0]
+
+    def mark_email_sent(self, email_id):
+        """Record a successful delivery"""
+        with self.transaction() as cur:
+            cur.execute("UPDATE email_outbox SET status='sent', attempts=attempts+1, last_error=NULL, sent_at=? WHERE id=?",
+                        (now_str(), email_id))
+
+    def reschedule_email(self, email_id, next_attempt, error):
+        """Record a failed attempt and when to try again"""
+        with self.transaction() as cur:
+            cur.execute("UPDATE email_outbox SET attempts=attempts+1, next_attempt=?, last_error=? WHERE id=?",
+                        (next_attempt, error, email_id))
+
+    def mark_email_failed(self, email_id, error):
+        """Give up on an email after a permanent error or too many attempts"""
+        with self.transaction() as cur:
+            cur.execute("UPDATE email_outbox SET status='failed', attempts=attempts+1, last_error=? WHERE id=?",
+                        (error, email_id))
+
     # --- settings CRUD ---
     def get_setting(self, key, default=None):
         """Get a setting value by key"""
-        self.cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
-        row = self.cursor.fetchone()
-        return row[0] if row else default
+        with self._read() as cur:
+            cur.execute("SELECT value FROM settings WHERE key=?", (key,))
+            row = cur.fetchone()
+            return row[0] if row else default
     
     def set_setting(self, key, value):
         """Set a setting value"""
-        self.cursor.execute("INSERT OR REPLACE INTO settings(key, value) VALUES(?,?)", (key, value))
-        self.conn.commit()
+        with self.transaction() as cur:
+            cur.execute("INSERT OR REPLACE INTO settings(key, value) VALUES(?,?)", (key, value))
     
     def get_all_settings(self):
         """Get all settings as a dictionary"""
-        self.cursor.execute("SELECT key, value FROM settings")
-        return dict(self.cursor.fetchall())
+        with self._read() as cur:
+            cur.execute("SELECT key, value FROM settings")
+            return dict(cur.fetchall())
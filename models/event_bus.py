@@ -0,0 +1,112 @@
+"""
+In-process change notifications for Smart Parking Management System
+DB publishes an event for every committed write; pages subscribe to apply
+the change incrementally instead of re-querying everything
+"""
+
+import threading
+
+from utils.callbacks import call_safely
+
+# topic -> payload keys
+TOPICS = {
+    "vehicle_parked": ("id", "number", "type", "user", "slot_id", "entry_time", "payment_method"),
+    "vehicle_exited": ("number", "exit_time", "slot_id"),
+    "payment_recorded": ("vehicle_number", "amount", "paid_at", "generated_by", "payment_method"),
+    "slots_changed": ("slot_id",),
+}
+
+
+class EventBus:
+    """Publish/subscribe for data changes.
+
+    subscribe() callbacks run on the publishing thread (any thread) and must
+    be quick. subscribe_ui() handlers run on the Tk main loop once attach()
+    has been called: events are queued, and each handler gets everything
+    published since the last frame as one list of (topic, payload), so a
+    burst of gate events costs one redraw.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}   # topic -> [callback(topic, payload)]
+        self._ui_handlers = []   # (topics, handler(events))
+        self._pending = []       # events waiting for the Tk loop
+        self._widget = None
+        self._ui_thread = None
+        self._flush_scheduled = False
+
+    def subscribe(self, topics, callback):
+        """Call callback(topic, payload) on the publishing thread for each event in `topics`"""
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, []).append(callback)
+
+    def subscribe_ui(self, topics, handler):
+        """Call handler(events) on the Tk main loop with each frame's events in `topics`"""
+        with self._lock:
+            self._ui_handlers.append((frozenset(topics), handler))
+
+    def unsubscribe(self, callback):
+        """Remove a callback or handler from every topic"""
+        with self._lock:
+            for callbacks in self._subscribers.values():
+                while callback in callbacks:
+                    callbacks.remove(callback)
+            self._ui_handlers = [(t, h) for t, h in self._ui_handlers if h != callback]
+
+    def publish(self, topic, **payload):
+        """Deliver an event to the subscribers and queue it for the UI handlers"""
+        with self._lock:
+            callbacks = list(self._subscribers.get(topic, ()))
+            if self._widget is not None and self._ui_handlers:
+                self._pending.append((topic, payload))
+                schedule = not self._flush_scheduled and threading.get_ident() == self._ui_thread
+                if schedule:
+                    self._flush_scheduled = True
+            else:
+                schedule = False
+        for callback in callbacks:
+            callback(topic, payload)
+        if schedule:
+            # published on the Tk thread: flush at the end of this frame
+            self._widget.after(self._frame_ms, self._flush)
+
+    def attach(self, widget, frame_ms=16, idle_ms=100):
+        """Deliver UI events on widget's main loop.
+
+        Events published on the Tk thread are flushed after `frame_ms`; those
+        from worker threads are picked up by a poll every `idle_ms`.
+        """
+        self._widget = widget
+        self._ui_thread = threading.get_ident()
+        self._frame_ms = frame_ms
+        self._idle_ms = idle_ms
+        widget.after(idle_ms, self._poll)
+
+    def _poll(self):
+        if self._widget is None:
+            return
+        with self._lock:
+            flush = bool(self._pending) and not self._flush_scheduled
+        if flush:
+            self._flush()
+        self._widget.after(self._idle_ms, self._poll)
+
+    def _flush(self):
+        with self._lock:
+            events, self._pending = self._pending, []
+            handlers = list(self._ui_handlers)
+            self._flush_scheduled = False
+        if not events:
+            return
+        for topics, handler in handlers:
+            wanted = [event for event in events if event[0] in topics]
+            if wanted:
+                call_safely(handler, wanted, label="Event handler")
+
+    def detach(self):
+        """Stop delivering to the Tk loop (pending UI events are dropped)"""
+        with self._lock:
+            self._widget = None
+            self._pending = []
@@ -0,0 +1,138 @@
+"""
+In-memory free-slot index for Smart Parking Management System
+Keeps per-type free lists so slot allocation does not scan the slots table,
+and occupancy counters so occupancy reads do not GROUP BY over it
+"""
+
+import threading
+
+
+class SlotIndex:
+    """Per-type free lists and occupancy counters mirroring the slots table.
+
+    Each type_allowed value (Car, Motorcycle, Both, ...) has its own stack of
+    free slot ids. Occupying or deleting a slot only drops it from the free
+    set; stale ids left on the stack are skipped lazily on allocation, which
+    keeps every operation amortized O(1). Slot counts per (type_allowed,
+    status) are adjusted under the same lock by every change, and `version`
+    goes up with each adjustment so readers can tell when occupancy moved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}   # slot_id -> [name, type_allowed, hourly_rate, status]
+        self._free = {}    # type_allowed -> set of free slot ids
+        self._stacks = {}  # type_allowed -> list of slot ids (may hold stale ids)
+        self._counts = {}  # type_allowed -> {status: number of slots}
+        self.version = 0
+
+    def rebuild(self, cursor):
+        """Rebuild the index from the slots table"""
+        cursor.execute("SELECT id,name,type_allowed,status,hourly_rate FROM slots ORDER BY id DESC")
+        rows = cursor.fetchall()
+        with self._lock:
+            self._slots.clear()
+            self._free.clear()
+            self._stacks.clear()
+            self._counts.clear()
+            self.version += 1
+            # rows come highest id first, so the lowest id ends up on top of each stack
+            for slot_id, name, type_allowed, status, hourly_rate in rows:
+                self._add(slot_id, name, type_allowed, status, hourly_rate)
+
+    def _add(self, slot_id, name, type_allowed, status, hourly_rate):
+        self._slots[slot_id] = [name, type_allowed, hourly_rate, status]
+        self._count(type_allowed, status, 1)
+        if status == 'free':
+            self._push(slot_id, type_allowed)
+
+    def _drop(self, slot_id):
+        info = self._slots.pop(slot_id, None)
+        if info:
+            self._free.get(info[1], set()).discard(slot_id)
+            self._count(info[1], info[3], -1)
+
+    def _count(self, type_allowed, status, delta):
+        self.version += 1
+        counts = self._counts.setdefault(type_allowed, {})
+        counts[status] = counts.get(status, 0) + delta
+        if not counts[status]:
+            del counts[status]
+            if not counts:
+                del self._counts[type_allowed]
+
+    def _set_status(self, slot_id, status):
+        info = self._slots.get(slot_id)
+        if not info or info[3] == status:
+            return
+        self._count(info[1], info[3], -1)
+        self._count(info[1], status, 1)
+        info[3] = status
+        if status == 'free':
+            self._push(slot_id, info[1])
+        else:
+            self._free.get(info[1], set()).discard(slot_id)
+
+    def _push(self, slot_id, type_allowed):
+        free = self._free.setdefault(type_allowed, set())
+        if slot_id in free:
+            return
+        free.add(slot_id)
+        stack = self._stacks.setdefault(type_allowed, [])
+        stack.append(slot_id)
+        # compact once stale ids dominate the stack
+        if len(stack) > 2 * len(free) + 64:
+            stack[:] = [s for s in dict.fromkeys(stack) if s in free]
+
+    def _peek(self, type_allowed):
+        free = self._free.get(type_allowed)
+        if not free:
+            return None
+        stack = self._stacks[type_allowed]
+        while stack[-1] not in free:
+            stack.pop()
+        return stack[-1]
+
+    def put(self, slot_id, name, type_allowed, status, hourly_rate):
+        """Insert or replace a slot after create_slot/update_slot"""
+        with self._lock:
+            self._drop(slot_id)
+            self._add(slot_id, name, type_allowed, status, hourly_rate)
+
+    def remove(self, slot_id):
+        """Drop a slot after delete_slot"""
+        with self._lock:
+            self._drop(slot_id)
+
+    def mark_occupied(self, slot_id):
+        """Take a slot off its free list"""
+        with self._lock:
+            self._set_status(slot_id, 'occupied')
+
+    def mark_free(self, slot_id):
+        """Return a slot to its free list"""
+        with self._lock:
+            self._set_status(slot_id, 'free')
+
+    def find_free(self, vtype):
+        """Return (id, name, hourly_rate) of a free slot for vtype, or None"""
+        with self._lock:
+            # try exact type then 'Both'
+            for type_allowed in (vtype, 'Both'):
+                slot_id = self._peek(type_allowed)
+                if slot_id is not None:
+                    name, _, hourly_rate, _ = self._slots[slot_id]
+                    return (slot_id, name, hourly_rate)
+        return None
+
+    def free_count(self, type_allowed=None):
+        """Number of free slots, optionally for one type_allowed"""
+        with self._lock:
+            if type_allowed is not None:
+                return len(self._free.get(type_allowed, ()))
+            return sum(len(f) for f in self._free.values())
+
+    def counts(self):
+        """Snapshot of slot counts: {type_allowed: {status: count}}"""
+        with self._lock:
+            return {t: dict(c) for t, c in self._counts.items()}
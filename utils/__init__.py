@@ -4,9 +4,26 @@ Contains helper functions and utilities
 """
 
 from .helpers import hash_password, now_str, hours_between, toast
-from .pdf_generator import generate_pdf_receipt
-from .email_sender import send_email_with_attachment
-from .excel_exporter import export_to_excel
+from .email_sender import send_email_with_attachment, MailQueue
+from .checkout import CheckoutService
+
+
+# reportlab and openpyxl are slow to import; load their wrappers on first access
+_LAZY = {
+    'generate_pdf_receipt': 'pdf_generator',
+    'export_to_excel': 'excel_exporter',
+    'export_rows_to_excel': 'excel_exporter',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'hash_password',
@@ -15,5 +32,8 @@ __all__ = [
     'toast',
     'generate_pdf_receipt',
     'send_email_with_attachment',
-    'export_to_excel'
+    'MailQueue',
+    'CheckoutService',
+    'export_to_excel',
+    'export_rows_to_excel'
 ]
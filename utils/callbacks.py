@@ -0,0 +1,54 @@
+"""
+UI callbacks for Smart Parking Management System
+Results produced on worker threads are handed to the Tk main loop through a
+CallbackPump; call_safely keeps one failing callback from stopping the rest
+"""
+
+import queue
+
+
+def call_safely(callback, *args, label="Callback"):
+    """Run a UI callback, printing (not raising) any exception it throws"""
+    try:
+        callback(*args)
+    except Exception as e:
+        print(f"{label} error ({getattr(callback, '__qualname__', callback)}): {e}")
+
+
+class CallbackPump:
+    """Run callbacks queued from any thread on the Tk main loop.
+
+    Until attach(widget) is called, call() runs the callback right away on
+    the calling thread. After it, callbacks are queued and run by a
+    widget.after() poll every `interval` ms; the poll is rescheduled whatever
+    the callbacks do.
+    """
+
+    def __init__(self, label="Callback"):
+        self.label = label  # prefix of the printed error when a callback raises
+        self._queue = queue.Queue()
+        self._widget = None
+
+    def attach(self, widget, interval=200):
+        """Start delivering on widget's main loop"""
+        self._widget = widget
+        self._interval = interval
+        widget.after(interval, self._poll)
+
+    def call(self, callback, *args):
+        """Run callback(*args) now, or on the next poll once attached"""
+        if self._widget is None:
+            callback(*args)
+        else:
+            self._queue.put((callback, args))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    callback, args = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                call_safely(callback, *args, label=self.label)
+        finally:
+            self._widget.after(self._interval, self._poll)
@@ -0,0 +1,95 @@
+"""
+Matplotlib entry point for the chart views
+Imported lazily by the pages that draw charts, so matplotlib stays out of startup.
+Pages keep one ChartPanel (figure + canvas) for their lifetime and update its
+artists in place; redraws are skipped while the data version is unchanged
+"""
+
+import math
+
+import matplotlib
+matplotlib.use('TkAgg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+
+class ChartPanel:
+    """A persistent Figure and canvas packed into a Tk frame.
+
+    `master=None` renders off screen (benchmarks). Call stale(version) before
+    fetching data and draw(version) after updating the artists.
+    """
+
+    def __init__(self, master, figsize, dpi=80, facecolor="white"):
+        self.figure = Figure(figsize=figsize, dpi=dpi, facecolor=facecolor)
+        if master is None:
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.version = None
+        self._laid_out = False
+
+    def stale(self, version):
+        """True if the chart was last drawn for a different data version"""
+        return version != self.version
+
+    def draw(self, version):
+        """Record the data version and repaint (idle-time on screen)"""
+        self.version = version
+        if not self._laid_out:
+            self.figure.tight_layout()
+            self._laid_out = True
+        if isinstance(self.canvas, FigureCanvasTkAgg):
+            self.canvas.draw_idle()
+        else:
+            self.canvas.draw()
+
+
+class TrendPlot:
+    """Line with a filled area over day labels, updated in place"""
+
+    def __init__(self, ax, color, empty_text="No data available"):
+        self.ax = ax
+        self.line, = ax.plot([], [], marker='o', color=color, linewidth=2, markersize=6)
+        self.fill = ax.fill_between([0, 0], [0, 0], alpha=0.3, color=color)
+        self.empty = ax.text(0.5, 0.5, empty_text, transform=ax.transAxes,
+                             ha="center", va="center", color="gray")
+
+    def update(self, labels, values):
+        n = len(values)
+        x = list(range(n))
+        self.line.set_data(x, values)
+        self.fill.set_verts([[(0, 0)] + list(zip(x, values)) + [(n - 1, 0)]] if n else [])
+        self.ax.set_xticks(x)
+        self.ax.set_xticklabels(labels)
+        self.ax.set_xlim(-0.5, max(n - 0.5, 0.5))
+        self.ax.set_ylim(0, (max(values) if n and max(values) > 0 else 1) * 1.15)
+        self.empty.set_visible(not n)
+
+
+class SharePie:
+    """Pie chart whose wedges, labels and percentages are updated in place"""
+
+    def __init__(self, ax, labels, colors, startangle=90):
+        self.startangle = startangle
+        self.wedges, self.texts, self.autotexts = ax.pie(
+            [1] * len(labels), labels=labels, colors=colors, autopct='%1.1f%%', startangle=startangle)
+
+    def update(self, sizes):
+        total = float(sum(sizes))
+        theta = self.startangle
+        for wedge, text, autotext, size in zip(self.wedges, self.texts, self.autotexts, sizes):
+            span = 360.0 * size / total if total else 0
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + span)
+            mid = math.radians(theta + span / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            text.set_position((1.1 * x, 1.1 * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((0.6 * x, 0.6 * y))
+            autotext.set_text(f"{100.0 * size / total:.1f}%" if total else "")
+            for artist in (wedge, text, autotext):
+                artist.set_visible(size > 0)
+            theta += span
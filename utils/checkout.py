@@ -0,0 +1,106 @@
+"""
+Gate checkout: exit, fee and payment in one DB transaction, with the receipt
+PDF and email handled in the background
+"""
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.callbacks import CallbackPump
+from utils.config import CURRENCY
+from utils.receipts import receipt_path, receipts_dir
+
+
+def receipt_email(visit, amount, duration_hours, payment_method, owner_name):
+    """Subject and body of the email sent with a receipt"""
+    return (f"Parking Receipt - {visit[1]}",
+            f"Dear {owner_name},\n\n"
+            f"Thank you for using our parking service.\n\n"
+            f"Receipt Details:\n"
+            f"Vehicle Number: {visit[1]}\n"
+            f"Vehicle Type: {visit[2]}\n"
+            f"Entry Time: {visit[5]}\n"
+            f"Exit Time: {visit[6]}\n"
+            f"Duration: {duration_hours:.2f} hours\n"
+            f"Amount Paid: {amount} {CURRENCY}\n"
+            f"Payment Method: {payment_method.upper()}\n\n"
+            f"Please find your detailed receipt attached.\n\n"
+            f"Best regards,\n"
+            f"Smart Parking Management System")
+
+
+class CheckoutService:
+    """Check vehicles out at the gate without waiting for the receipt.
+
+    checkout() does the database work in one transaction (DB.checkout) and
+    returns as soon as it commits. The PDF receipt is then rendered on a
+    background worker thread and, when the vehicle's owner has an email
+    address on file, handed to the MailQueue. `on_receipt(result, error)`
+    runs once the PDF is written (error is None) or failed; after
+    `attach(widget)` it runs on the Tk thread via widget.after(), like the
+    MailQueue callbacks.
+    """
+
+    def __init__(self, db, mailer=None, directory=None, workers=1):
+        self.db = db
+        self.mailer = mailer
+        self.directory = directory  # default: utils.receipts.receipts_dir()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Receipts")
+        self._ui = CallbackPump("Receipt callback")
+
+    # --- public API ---
+    def attach(self, widget, interval=200):
+        """Deliver on_receipt callbacks on the Tk main loop by polling from widget.after()"""
+        self._ui.attach(widget, interval)
+
+    def checkout(self, number, generated_by, exit_time=None, on_receipt=None, on_email=None, allow_exit=True):
+        """Exit, price and pay a plate's latest visit; returns the result dict or None.
+
+        The result holds visit, amount, duration_hours, payment_method,
+        receipt_path, email (the owner's address, or None), owner_name and
+        exited (True if the vehicle was still parked and this checkout
+        recorded its exit). `on_email` is passed to MailQueue.enqueue.
+        With allow_exit=False a still-parked plate raises StillParked (see
+        DB.checkout) and nothing is recorded.
+        """
+        from utils.helpers import now_str
+        if self.directory is None:
+            self.directory = receipts_dir()
+        stamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+        path = receipt_path(self.directory, number, stamp)
+        checked_out = self.db.checkout(number, exit_time or now_str(), generated_by, path, allow_exit)
+        if checked_out is None:
+            return None
+        visit, amount, duration, owner, exited = checked_out
+        result = {"visit": visit, "amount": amount, "duration_hours": duration,
+                  "payment_method": visit[7] or "cash", "receipt_path": path,
+                  "email": owner[1] if owner and owner[1] else None,
+                  "owner_name": owner[0] if owner and owner[0] else visit[3],
+                  "exited": exited}
+        self._pool.submit(self._finish, result, generated_by, on_receipt, on_email)
+        return result
+
+    def close(self, wait=True):
+        """Stop the worker, by default after the queued receipts are rendered"""
+        self._pool.shutdown(wait=wait)
+
+    # --- worker ---
+    def _finish(self, result, generated_by, on_receipt, on_email):
+        visit = result["visit"]
+        try:
+            from utils.pdf_generator import generate_pdf_receipt
+            generate_pdf_receipt(visit, result["amount"], result["duration_hours"], result["payment_method"],
+                                 generated_by, result["receipt_path"])
+        except Exception as e:
+            self._notify(on_receipt, result, str(e))
+            return
+        if result["email"] and self.mailer is not None:
+            subject, body = receipt_email(visit, result["amount"], result["duration_hours"],
+                                          result["payment_method"], result["owner_name"])
+            self.mailer.enqueue(result["email"], subject, body, result["receipt_path"], callback=on_email)
+        self._notify(on_receipt, result, None)
+
+    # --- callbacks ---
+    def _notify(self, callback, result, error):
+        if callback is not None:
+            self._ui.call(callback, result, error)
@@ -2,11 +2,16 @@
 Configuration constants for Smart Parking Management System
 """
 
+import os
+
 # Application settings
 APP_TITLE = "Smart Parking Management System"
-DB_FILE = "parking_system_upgraded.db"
+DB_FILE = os.environ.get("PARKING_DB", "parking_system_upgraded.db")  # PARKING_DB overrides (benchmarks)
+DB_PROFILE = "balanced"     # storage profile, see models.database.STORAGE_PROFILES
+DIAGNOSTICS = os.environ.get("PARKING_DIAGNOSTICS") == "1"  # record DB/page timings from startup
 WINDOW_SIZE = "1100x700"
 CURRENCY = "UGX"
+PLATE_COUNTRY = "UG"       # plate normalization rules, see utils.plates.PLATE_RULES
 
 # Default parking rates (can be changed via Settings)
 HOURLY_RATE_CAR = 1000      # 1000 UGX per hour
@@ -3,11 +3,14 @@ Email sending utilities for notifications and receipts
 """
 
 import os
-import smtplib
-import socket
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
+import random
+import threading
+import time
+
+from utils.callbacks import CallbackPump
+
+# smtplib/ssl and the email package are imported where they are used: together
+# they cost ~40 ms, and nothing needs them until the first email goes out.
 
 
 # Email settings (will be updated from database)
@@ -20,56 +23,266 @@ EMAIL_SETTINGS = {
 }
 
 
-def send_email_with_attachment(recipient, subject, body, attachment_path=None):
-    """Send email with optional PDF attachment"""
+def _settings_error():
+    """Return an error message if email is disabled or not configured, else None"""
     if not EMAIL_SETTINGS['enabled']:
-        return False, "Email is not enabled. Check 'Enable Email Notifications' in Settings."
+        return "Email is not enabled. Check 'Enable Email Notifications' in Settings."
     
     if not EMAIL_SETTINGS['sender_email']:
-        return False, "Sender email not configured. Please set it in Settings."
+        return "Sender email not configured. Please set it in Settings."
     
     if not EMAIL_SETTINGS['sender_password']:
-        return False, "Sender password not configured. Please set it in Settings."
-    
+        return "Sender password not configured. Please set it in Settings."
+    return None
+
+
+def _check_settings(recipient):
+    """Return an error message if email cannot be sent to recipient, else None"""
+    error = _settings_error()
+    if error:
+        return error
     if not recipient or '@' not in recipient:
-        return False, f"Invalid recipient email address: {recipient}"
+        return f"Invalid recipient email address: {recipient}"
+    return None
+
+
+def _build_message(recipient, subject, body, attachment_path=None):
+    """Build the MIME message, attaching the PDF if it exists"""
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.application import MIMEApplication
+    msg = MIMEMultipart()
+    msg['From'] = EMAIL_SETTINGS['sender_email']
+    msg['To'] = recipient
+    msg['Subject'] = subject
     
+    msg.attach(MIMEText(body, 'plain'))
+    
+    # Attach file if provided
+    if attachment_path and os.path.exists(attachment_path):
+        with open(attachment_path, 'rb') as f:
+            attach = MIMEApplication(f.read(), _subtype="pdf")
+            attach.add_header('Content-Disposition', 'attachment', 
+                            filename=os.path.basename(attachment_path))
+            msg.attach(attach)
+    return msg
+
+
+def open_smtp_session():
+    """Connect, STARTTLS and log in with the configured account"""
+    import smtplib
+    server = smtplib.SMTP(EMAIL_SETTINGS['smtp_server'], EMAIL_SETTINGS['smtp_port'], timeout=10)
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_SETTINGS['sender_email']
-        msg['To'] = recipient
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Attach file if provided
-        if attachment_path and os.path.exists(attachment_path):
-            with open(attachment_path, 'rb') as f:
-                attach = MIMEApplication(f.read(), _subtype="pdf")
-                attach.add_header('Content-Disposition', 'attachment', 
-                                filename=os.path.basename(attachment_path))
-                msg.attach(attach)
-        
-        # Connect and send
-        server = smtplib.SMTP(EMAIL_SETTINGS['smtp_server'], EMAIL_SETTINGS['smtp_port'], timeout=10)
         server.starttls()
         server.login(EMAIL_SETTINGS['sender_email'], EMAIL_SETTINGS['sender_password'])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def _error_message(e):
+    """User-facing description of an SMTP/socket error"""
+    import smtplib
+    import socket
+    if isinstance(e, smtplib.SMTPAuthenticationError):
+        return f"Authentication failed. For Gmail, use App Password (not regular password). Error: {str(e)}"
+    if isinstance(e, smtplib.SMTPConnectError):
+        return f"Cannot connect to SMTP server. Check server address and port. Error: {str(e)}"
+    if isinstance(e, smtplib.SMTPServerDisconnected):
+        return f"Server disconnected unexpectedly. Check your internet connection. Error: {str(e)}"
+    if isinstance(e, smtplib.SMTPException):
+        return f"SMTP error occurred: {str(e)}"
+    if isinstance(e, socket.gaierror):
+        return f"Cannot resolve SMTP server address. Check server name. Error: {str(e)}"
+    if isinstance(e, socket.timeout):
+        return "Connection timeout. Check your internet connection and firewall settings."
+    return f"Unexpected error: {type(e).__name__}: {str(e)}"
+
+
+def send_email_with_attachment(recipient, subject, body, attachment_path=None):
+    """Send email with optional PDF attachment"""
+    error = _check_settings(recipient)
+    if error:
+        return False, error
+    
+    try:
+        msg = _build_message(recipient, subject, body, attachment_path)
+        
+        # Connect and send
+        server = open_smtp_session()
         server.send_message(msg)
         server.quit()
         
         return True, "Email sent successfully"
-    except smtplib.SMTPAuthenticationError as e:
-        return False, f"Authentication failed. For Gmail, use App Password (not regular password). Error: {str(e)}"
-    except smtplib.SMTPConnectError as e:
-        return False, f"Cannot connect to SMTP server. Check server address and port. Error: {str(e)}"
-    except smtplib.SMTPServerDisconnected as e:
-        return False, f"Server disconnected unexpectedly. Check your internet connection. Error: {str(e)}"
-    except smtplib.SMTPException as e:
-        return False, f"SMTP error occurred: {str(e)}"
-    except socket.gaierror as e:
-        return False, f"Cannot resolve SMTP server address. Check server name. Error: {str(e)}"
-    except socket.timeout:
-        return False, "Connection timeout. Check your internet connection and firewall settings."
     except Exception as e:
-        return False, f"Unexpected error: {type(e).__name__}: {str(e)}"
+        return False, _error_message(e)
+
+
+class MailQueue:
+    """Outbound mail queue delivered by a background worker thread.
+
+    Jobs are stored in the email_outbox table, so anything queued survives a
+    restart. The worker keeps one authenticated SMTP session open while there
+    is work (closing it after `idle_timeout` seconds) and retries failed jobs
+    with exponential backoff. While email is disabled or not configured the
+    queue pauses: jobs wait without using up attempts. `enqueue` callbacks receive (success, message)
+    once, after the first delivery attempt; after `attach(widget)` they run on
+    the Tk thread via widget.after().
+    """
+
+    def __init__(self, db, connect=open_smtp_session, max_attempts=5, backoff=30.0,
+                 max_backoff=3600.0, idle_timeout=60.0):
+        self.db = db
+        self.connect = connect  # factory returning a logged-in smtplib.SMTP
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._callbacks = {}  # email id -> callback(success, message)
+        self._ui = CallbackPump("Email callback")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- public API ---
+    def start(self):
+        """Start the worker thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="MailQueue", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=15):
+        """Stop the worker; undelivered jobs stay queued in the database"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        """Look at the queue now instead of at the next due time (e.g. after the email settings changed)"""
+        self._wake.set()
+
+    def attach(self, widget, interval=200):
+        """Deliver callbacks on the Tk main loop by polling from widget.after()"""
+        self._ui.attach(widget, interval)
+
+    def enqueue(self, recipient, subject, body, attachment_path=None, callback=None):
+        """Queue an email; returns its outbox id, or None if it cannot be sent"""
+        error = _check_settings(recipient)
+        if error:
+            if callback:
+                self._ui.call(callback, False, error)
+            return None
+        with self._lock:  # register the callback before the worker can finish the job
+            email_id = self.db.queue_email(recipient, subject, body, attachment_path)
+            if callback:
+                self._callbacks[email_id] = callback
+        self._wake.set()
+        return email_id
+
+    # --- worker ---
+    def _run(self):
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                wait = self._step()
+                errors = 0
+            except Exception as e:
+                # e.g. the database is locked: back off and keep the worker alive
+                errors += 1
+                wait = min(self.backoff * 2 ** (errors - 1), self.max_backoff)
+                print(f"Mail queue error (retrying in {wait:.1f} s): {e}")
+            if wait is None:
+                continue
+            self._wake.wait(wait)
+            self._wake.clear()
+            if self._server is not None and time.time() - self._last_used >= self.idle_timeout:
+                self._close_session()
+        self._close_session()
+
+    def _step(self):
+        """Deliver the due jobs; returns how long to wait before the next step (None: go again now)"""
+        if _settings_error():
+            # paused until email is configured again (see wake); jobs keep their attempts
+            self._close_session()
+            return self.idle_timeout
+        jobs = self.db.get_due_emails()
+        for job in jobs:
+            if self._stop.is_set():
+                break
+            self._deliver(*job)
+        if jobs:
+            return None
+        due = self.db.next_email_due()
+        return self.idle_timeout if due is None else max(0.0, min(due - time.time(), self.idle_timeout))
+
+    def _deliver(self, email_id, recipient, subject, body, attachment_path, attempts):
+        if _settings_error():
+            return  # email was turned off mid-batch: leave the job for when it is back
+        error = _check_settings(recipient)
+        try:
+            if error:
+                raise ValueError(error)
+            self._send(_build_message(recipient, subject, body, attachment_path))
+        except Exception as e:
+            message = error or _error_message(e)
+            attempts += 1
+            # a bad recipient address will not get better on retry either
+            if error or self._is_permanent(e) or attempts >= self.max_attempts:
+                self.db.mark_email_failed(email_id, message)
+            else:
+                delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+                self.db.reschedule_email(email_id, time.time() + delay * random.uniform(0.8, 1.2), message)
+                message += "\n\nWill retry in the background."
+            self._finish(email_id, False, message)
+        else:
+            self.db.mark_email_sent(email_id)
+            self._finish(email_id, True, "Email sent successfully")
+
+    def _send(self, msg):
+        import smtplib
+        for _ in range(2):
+            reused = self._server is not None
+            if not reused:
+                self._server = self.connect()
+            try:
+                self._server.send_message(msg)
+                self._last_used = time.time()
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._close_session()
+                # a kept-alive session may have gone stale; retry once on a fresh one
+                if not reused:
+                    raise
+            except (smtplib.SMTPException, OSError):
+                self._close_session()
+                raise
+
+    def _close_session(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+
+    @staticmethod
+    def _is_permanent(e):
+        import smtplib
+        # 5xx replies (bad credentials, rejected sender/recipient) will not succeed on retry
+        if isinstance(e, smtplib.SMTPRecipientsRefused):
+            return True
+        return isinstance(e, smtplib.SMTPResponseException) and 500 <= e.smtp_code < 600
+
+    # --- callbacks ---
+    def _finish(self, email_id, success, message):
+        with self._lock:
+            callback = self._callbacks.pop(email_id, None)
+        if callback:
+            self._ui.call(callback, success, message)
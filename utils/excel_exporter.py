@@ -2,41 +2,65 @@
 Excel export utilities for reports and data
 """
 
+import itertools
+
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 
 
 def export_to_excel(data, headers, filepath):
     """Export data to Excel file"""
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Report"
+    export_rows_to_excel(data, headers, filepath)
+    return filepath
+
+
+def export_rows_to_excel(rows, headers, filepath, sample_size=1000, total=None, progress=None, every=1000):
+    """Stream rows (any iterable, e.g. a DB cursor) into an Excel file.
+
+    Uses a write-only workbook, so rows go straight to disk and memory stays
+    flat however many there are. Column widths are estimated from the headers
+    and the first `sample_size` rows. `progress(rows_done, total)` is called
+    every `every` rows and once more before the file is saved. Returns the
+    number of data rows written.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Report")
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, sample_size))
+    
+    # Size columns from the sample (write-only sheets need widths before any row)
+    widths = [len(str(h)) for h in headers]
+    for row_data in sample:
+        for col_idx, value in enumerate(row_data):
+            length = len(str(value)) if value is not None else 0
+            if col_idx >= len(widths):
+                widths.append(length)
+            elif length > widths[col_idx]:
+                widths[col_idx] = length
+    for col_idx, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 2, 50)
     
     # Add headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True)
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
         cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
         cell.font = Font(bold=True, color="FFFFFF")
         cell.alignment = Alignment(horizontal="center")
+        header_cells.append(cell)
+    ws.append(header_cells)
     
     # Add data
-    for row_idx, row_data in enumerate(data, 2):
-        for col_idx, value in enumerate(row_data, 1):
-            ws.cell(row=row_idx, column=col_idx, value=value)
-    
-    # Auto-size columns
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
+    count = 0
+    for row_data in itertools.chain(sample, rows):
+        ws.append(row_data)
+        count += 1
+        if progress and count % every == 0:
+            progress(count, total)
     
+    if progress:
+        progress(count, total)
     wb.save(filepath)
-    return filepath
+    return count
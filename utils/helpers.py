@@ -3,6 +3,7 @@ Helper utility functions for Smart Parking Management System
 """
 
 import hashlib
+import calendar
 import datetime
 import tkinter as tk
 
@@ -19,13 +20,21 @@ def now_str() -> str:
 
 def hours_between(start_iso: str, end_iso: str) -> float:
     """Return hours (float) between two ISO-like time strings."""
-    fmt = "%Y-%m-%d %H:%M:%S"
-    a = datetime.datetime.strptime(start_iso, fmt)
-    b = datetime.datetime.strptime(end_iso, fmt)
+    a = datetime.datetime.fromisoformat(start_iso)
+    b = datetime.datetime.fromisoformat(end_iso)
     delta = b - a
     return delta.total_seconds() / 3600.0
 
 
+def to_epoch(value: str) -> int:
+    """Seconds since 1970-01-01 for a 'YYYY-MM-DD[ HH:MM:SS]' wall-clock time.
+
+    This is what the *_ts columns hold (SQLite's strftime('%s', value));
+    raises ValueError for anything else.
+    """
+    return calendar.timegm(datetime.datetime.fromisoformat(value).timetuple())
+
+
 def toast(root, text, bg="#1e88e5", duration=1800):
     """Tiny non-blocking notification using Toplevel."""
     t = tk.Toplevel(root)
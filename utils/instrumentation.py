@@ -0,0 +1,238 @@
+"""
+Opt-in instrumentation for Smart Parking Management System
+Records call counts, latency histograms and rows returned for every public DB
+method, refresh() timings per page, and the most recent SQL statements.
+Off by default (no wrappers, no overhead); turn it on with PARKING_DIAGNOSTICS=1
+or from the Diagnostics page
+"""
+
+import collections
+import csv
+import datetime
+import functools
+import inspect
+import io
+import json
+import threading
+import time
+
+# histogram bucket upper bounds in ms; the last bucket collects everything slower
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+BUCKET_LABELS = tuple(f"<={b}ms" for b in BUCKETS_MS) + (f">{BUCKETS_MS[-1]}ms",)
+# DB methods that are not queries
+NOT_INSTRUMENTED = ("transaction", "close", "set_trace_callback")
+
+
+class CallStats:
+    """Counters and a latency histogram for one method"""
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "rows", "histogram")
+
+    def __init__(self):
+        self.calls = self.errors = self.rows = 0
+        self.total_ms = self.max_ms = 0.0
+        self.histogram = [0] * len(BUCKET_LABELS)
+
+    def add(self, ms, rows=0, error=False):
+        self.calls += 1
+        self.errors += error
+        self.rows += rows
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (max_ms for the open bucket)"""
+        target, seen = q * self.calls, 0
+        for i, n in enumerate(self.histogram):
+            seen += n
+            if n and seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def as_dict(self):
+        return {"calls": self.calls, "errors": self.errors, "rows": self.rows,
+                "total_ms": round(self.total_ms, 3), "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+                "p95_ms": self.percentile(0.95), "max_ms": round(self.max_ms, 3),
+                "histogram": dict(zip(BUCKET_LABELS, self.histogram))}
+
+
+def count_rows(result):
+    """Rows in a DB method's return value: len of a list, 0 for None, else 1"""
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+class Instrumentation:
+    """Wraps a DB instance and pages while enabled.
+
+    DB methods are wrapped on the instance (the class is untouched), so
+    disable() restores them exactly. Streaming methods (iter_*) are timed
+    until their iterator is exhausted, which includes the consumer's work.
+    """
+
+    def __init__(self, trace_size=500):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.db_stats = collections.defaultdict(CallStats)
+        self.page_stats = collections.defaultdict(CallStats)
+        self.statements = 0
+        self.traces = collections.deque(maxlen=trace_size)  # (time, thread, sql)
+        self.started = None
+        self.profile_page = None   # name of the page whose next refresh runs under cProfile
+        self.last_profile = None   # (page name, pstats text)
+        self._db = None
+        self._pages = {}  # name -> (page, refresh set on the instance before wrapping)
+
+    # --- switching ---
+    def enable(self, db, pages=None):
+        """Start recording `db` calls, SQL statements and the refresh() of `pages` ({name: page})"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = datetime.datetime.now()
+        self._db = db
+        for name, _ in inspect.getmembers(type(db), inspect.isfunction):
+            if not name.startswith("_") and name not in NOT_INSTRUMENTED:
+                setattr(db, name, self._wrap_db(name, getattr(db, name)))
+        db.set_trace_callback(self._trace)
+        for name, page in (pages or {}).items():
+            self.instrument_page(name, page)
+
+    def disable(self):
+        """Stop recording and remove every wrapper (collected data is kept)"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._db.set_trace_callback(None)
+        for name in [n for n in vars(self._db) if getattr(vars(self._db)[n], "_instrumented", False)]:
+            delattr(self._db, name)
+        for page, own_refresh in self._pages.values():
+            if own_refresh is None:
+                del page.refresh  # back to the class's refresh
+            else:
+                page.refresh = own_refresh
+        self._db, self._pages = None, {}
+
+    def reset(self):
+        """Clear everything recorded so far"""
+        with self._lock:
+            self.db_stats.clear()
+            self.page_stats.clear()
+            self.traces.clear()
+            self.statements = 0
+            self.started = datetime.datetime.now() if self.enabled else None
+
+    # --- wrappers ---
+    def _record(self, table, name, start, rows=0, error=False):
+        ms = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            table[name].add(ms, rows, error)
+
+    def _wrap_db(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self._record(self.db_stats, name, start, error=True)
+                raise
+            if inspect.isgenerator(result):
+                return self._stream(name, result, start)
+            self._record(self.db_stats, name, start, count_rows(result))
+            return result
+        wrapper._instrumented = True
+        return wrapper
+
+    def _stream(self, name, rows, start):
+        count, error = 0, False
+        try:
+            for row in rows:
+                count += 1
+                yield row
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record(self.db_stats, name, start, count, error)
+
+    def instrument_page(self, name, page):
+        """Time page.refresh() (and profile it on request) while enabled"""
+        if not self.enabled or not hasattr(page, "refresh") or name in self._pages:
+            return
+        self._pages[name] = (page, vars(page).get("refresh"))
+        original = page.refresh
+
+        @functools.wraps(original)
+        def refresh(*args, **kwargs):
+            if self.profile_page == name:
+                self.profile_page = None
+                return self._profile(name, original, *args, **kwargs)
+            start = time.perf_counter()
+            error = True
+            try:
+                result = original(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                self._record(self.page_stats, name, start, error=error)
+        page.refresh = refresh
+
+    def _profile(self, name, fn, *args, **kwargs):
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profiler.runcall(fn, *args, **kwargs)
+        finally:
+            self._record(self.page_stats, name, start)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            self.last_profile = (name, out.getvalue())
+
+    def _trace(self, statement):
+        with self._lock:
+            self.statements += 1
+            self.traces.append((datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3],
+                                threading.current_thread().name, statement))
+
+    # --- reporting ---
+    def snapshot(self):
+        """Everything recorded so far as plain dicts and lists"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "since": self.started.isoformat(timespec="seconds") if self.started else None,
+                "db": {name: stats.as_dict() for name, stats in self.db_stats.items()},
+                "pages": {name: stats.as_dict() for name, stats in self.page_stats.items()},
+                "statements": self.statements,
+                "recent_sql": [{"time": t, "thread": th, "sql": sql} for t, th, sql in self.traces],
+            }
+
+    def dump_json(self, filepath):
+        """Write snapshot() to a JSON file"""
+        with open(filepath, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return filepath
+
+    def dump_csv(self, filepath):
+        """Write one row per DB method and page with its counters and histogram"""
+        snapshot = self.snapshot()
+        with open(filepath, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "name", "calls", "errors", "rows", "total_ms", "mean_ms", "p95_ms", "max_ms"]
+                            + list(BUCKET_LABELS))
+            for kind in ("db", "pages"):
+                for name, s in sorted(snapshot[kind].items()):
+                    writer.writerow([kind, name, s["calls"], s["errors"], s["rows"], s["total_ms"], s["mean_ms"],
+                                     s["p95_ms"], s["max_ms"]] + list(s["histogram"].values()))
+        return filepath
@@ -3,6 +3,9 @@ PDF generation utilities for receipts and reports
 """
 
 import os
+import time
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
@@ -13,12 +16,31 @@ from utils.helpers import now_str
 
 CURRENCY = "UGX"
 
+# below this many receipts a process pool costs more to start than it saves
+POOL_THRESHOLD = 16
+
+
+@functools.lru_cache(maxsize=None)
+def _receipt_styles():
+    """Paragraph styles and the receipt TableStyle, built once per process"""
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    return styles, table_style
+
 
 def generate_pdf_receipt(vehicle_data, amount, duration_hours, payment_method, generated_by, filepath):
     """Generate a PDF receipt for a vehicle payment"""
     doc = SimpleDocTemplate(filepath, pagesize=letter)
     elements = []
-    styles = getSampleStyleSheet()
+    styles, table_style = _receipt_styles()
     
     # Title
     title = Paragraph("<b>SMART PARKING RECEIPT</b>", styles['Title'])
@@ -40,15 +62,7 @@ def generate_pdf_receipt(vehicle_data, amount, duration_hours, payment_method, g
     ]
     
     table = Table(data, colWidths=[2*inch, 4*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    table.setStyle(table_style)
     
     elements.append(table)
     elements.append(Spacer(1, 0.5*inch))
@@ -59,3 +73,35 @@ def generate_pdf_receipt(vehicle_data, amount, duration_hours, payment_method, g
     
     doc.build(elements)
     return filepath
+
+
+def _render_receipt(job):
+    """Render one receipt job; returns None on success or the error message"""
+    try:
+        generate_pdf_receipt(*job)
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def generate_pdf_receipts(jobs, workers=None):
+    """Render many receipts in parallel across a process pool.
+
+    `jobs` are generate_pdf_receipt argument tuples. Returns (errors, stats):
+    errors[i] is None if job i was rendered, else its error message; stats
+    holds receipts, seconds, per_second and workers.
+    """
+    jobs = list(jobs)
+    workers = workers or min(os.cpu_count() or 1, 8)
+    start = time.perf_counter()
+    if workers <= 1 or len(jobs) < POOL_THRESHOLD:
+        workers = 1
+        errors = [_render_receipt(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            errors = list(pool.map(_render_receipt, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    seconds = time.perf_counter() - start
+    rendered = errors.count(None)
+    stats = {'receipts': rendered, 'seconds': seconds,
+             'per_second': rendered / seconds if seconds else 0.0, 'workers': workers}
+    return errors, stats
@@ -0,0 +1,74 @@
+"""
+Plate numbers for Smart Parking Management System
+plate_key() turns a plate as typed ("uax 123-a") into the canonical key the
+database matches on ("UAX123A"); the rules per country live in PLATE_RULES.
+plate_key_sql() is the same normalization as an SQL expression, for triggers
+"""
+
+import json
+import re
+
+from utils import config
+
+# strip: characters dropped from the key (always including whitespace)
+# replace: characters substituted after stripping, e.g. look-alikes a country never issues
+# pattern: what a valid key looks like (None = anything); only used to warn operators
+PLATE_RULES = {
+    "default": {"strip": "-.", "replace": {}, "pattern": None},
+    # private UAA 123B, motorcycles UDA 123Z, government UG 1234X
+    "UG": {"strip": "-.", "replace": {}, "pattern": r"U[A-Z]{2}\d{3}[A-Z]|UG\d{1,4}[A-Z]?"},
+    "KE": {"strip": "-.", "replace": {}, "pattern": r"K[A-Z]{2}\d{3}[A-Z]"},
+    "GB": {"strip": "-.", "replace": {}, "pattern": r"[A-Z]{2}\d{2}[A-Z]{3}"},
+}
+
+
+def _rules(country):
+    return PLATE_RULES.get(country or config.PLATE_COUNTRY, PLATE_RULES["default"])
+
+
+def plate_key(number, country=None):
+    """Canonical key for a plate: upper case, no whitespace or separators.
+
+    `country` (default config.PLATE_COUNTRY) selects the rules in PLATE_RULES.
+    Accepts non-str plates: Treeview values turn all-digit plates into ints.
+    """
+    rules = _rules(country)
+    key = "".join(str(number or "").split()).upper()
+    for char in rules["strip"]:
+        key = key.replace(char, "")
+    for old, new in rules["replace"].items():
+        key = key.replace(old, new)
+    return key
+
+
+def plate_key_sql(expr, country=None):
+    """plate_key() as an SQL expression over `expr` (e.g. "NEW.number").
+
+    Whitespace is limited to space, tab, CR and LF, which covers anything an
+    operator or a CSV import types into a plate.
+    """
+    rules = _rules(country)
+    sql = f"UPPER({expr})"
+    for char in (" ", "\t", "\r", "\n") + tuple(rules["strip"]):
+        sql = f"REPLACE({sql}, {_sql_char(char)}, '')"
+    for old, new in rules["replace"].items():
+        sql = f"REPLACE({sql}, {_sql_char(old)}, {_sql_char(new)})"
+    return sql
+
+
+def _sql_char(text):
+    if text in ("\t", "\r", "\n"):
+        return f"char({ord(text)})"
+    return "'" + text.replace("'", "''") + "'"
+
+
+def plate_rules_signature(country=None):
+    """Stable text identifying the rules plate_key() applies (stored to detect a change)"""
+    rules = _rules(country)
+    return json.dumps({"strip": rules["strip"], "replace": rules["replace"]}, sort_keys=True)
+
+
+def is_valid_plate(number, country=None):
+    """True if the plate's key matches the country's pattern (or it has none)"""
+    pattern = _rules(country)["pattern"]
+    return pattern is None or re.fullmatch(pattern, plate_key(number, country)) is not None
@@ -0,0 +1,123 @@
+"""
+Parking fees for Smart Parking Management System
+stay_fee() prices one stay; batch_fees() prices whole arrays of stays at once
+with NumPy for bulk receipts, revenue projections and what-if tariff analysis
+"""
+
+import datetime
+import math
+
+from utils import config
+from utils.helpers import hours_between
+
+FLAT_FEE = 1000.0   # minimum charge in UGX...
+FLAT_HOURS = 1.0    # ...for stays up to this long
+
+
+def hourly_rate(vehicle_type, slot_rate=None, car_rate=None, motor_rate=None):
+    """Rate for a stay: the slot's custom rate if it has one, else the car/motorcycle rate"""
+    if slot_rate and slot_rate > 0:
+        return slot_rate
+    if vehicle_type.lower().startswith("c"):
+        return config.HOURLY_RATE_CAR if car_rate is None else car_rate
+    return config.HOURLY_RATE_MOTOR if motor_rate is None else motor_rate
+
+
+def fee(duration, vehicle_type, slot_rate=None, car_rate=None, motor_rate=None,
+        flat_fee=FLAT_FEE, flat_hours=FLAT_HOURS):
+    """Charge for a stay of `duration` hours"""
+    if duration <= flat_hours:
+        amount = flat_fee
+    else:
+        amount = max(0, duration * hourly_rate(vehicle_type, slot_rate, car_rate, motor_rate))
+    return round(amount, 2)
+
+
+def stay_fee(entry_time, exit_time, vehicle_type, slot_rate=None, **tariff):
+    """Return (amount, duration in hours rounded up to 2 decimals) for one stay"""
+    duration = hours_between(entry_time, exit_time)
+    return fee(duration, vehicle_type, slot_rate, **tariff), math.ceil(duration * 100) / 100.0
+
+
+def stay_hours(entry_times, exit_times):
+    """Vectorised hours_between() over time strings or epoch seconds: NaN where a stay has no exit time"""
+    import numpy as np
+    entry = np.asarray(entry_times, dtype="datetime64[s]")
+    exit_ = np.asarray(exit_times, dtype="datetime64[s]")
+    return (exit_ - entry) / np.timedelta64(1, "h")
+
+
+def batch_fees(entry_times, exit_times, vehicle_types, slot_rates=None, car_rate=None, motor_rate=None,
+               flat_fee=FLAT_FEE, flat_hours=FLAT_HOURS):
+    """Vectorised stay_fee(): return (amounts, durations rounded up to 2 decimals) as float arrays.
+
+    Times are 'YYYY-MM-DD HH:MM:SS' strings, epoch seconds (both None for no
+    exit) or datetime64 arrays; `slot_rates` may hold None/0 where a slot has
+    no custom rate. Stays without an exit time come back as NaN.
+    """
+    import numpy as np
+    durations = stay_hours(entry_times, exit_times)
+    initial = np.asarray(vehicle_types, dtype="U1")
+    rates = np.where((initial == "c") | (initial == "C"),
+                     config.HOURLY_RATE_CAR if car_rate is None else car_rate,
+                     config.HOURLY_RATE_MOTOR if motor_rate is None else motor_rate).astype(float)
+    if slot_rates is not None:
+        slot_rates = np.asarray(slot_rates, dtype=float)
+        rates = np.where(slot_rates > 0, slot_rates, rates)
+    amounts = np.where(durations <= flat_hours, flat_fee, np.maximum(durations * rates, 0))
+    return np.round(amounts, 2), np.ceil(durations * 100) / 100.0
+
+
+def load_stays(db, date_from="", date_to=""):
+    """Closed stays in an exit time range as arrays: (entry times, exit times, types, slot rates)
+
+    The times come straight from the epoch columns; nothing is parsed.
+    """
+    import numpy as np
+    rows = list(db.iter_stays(date_from, date_to))
+    if not rows:
+        return (np.array([], dtype="datetime64[s]"), np.array([], dtype="datetime64[s]"),
+                np.array([], dtype="U1"), np.array([], dtype=float))
+    entry, exit_, types, rates = zip(*rows)
+    return (np.array(entry, dtype="datetime64[s]"), np.array(exit_, dtype="datetime64[s]"),
+            np.array(types, dtype="U1"), np.array(rates, dtype=float))
+
+
+def tariff_what_if(db, date_from="", date_to="", **tariff):
+    """Re-price historical stays under another tariff and compare with current pricing.
+
+    `tariff` takes car_rate, motor_rate, flat_fee and flat_hours; the proposed
+    tariff replaces slot custom rates too. Returns a dict with stays, current,
+    proposed, change and change_pct.
+    """
+    import numpy as np
+    entry, exit_, types, slot_rates = load_stays(db, date_from, date_to)
+    current = float(np.nansum(batch_fees(entry, exit_, types, slot_rates)[0]))
+    proposed = float(np.nansum(batch_fees(entry, exit_, types, **tariff)[0]))
+    return {
+        'stays': len(entry),
+        'current': current,
+        'proposed': proposed,
+        'change': proposed - current,
+        'change_pct': (proposed - current) / current * 100 if current else 0.0,
+    }
+
+
+def project_revenue(db, days=30, history_days=30, today=None, **tariff):
+    """Project fee revenue for the next `days` days from the daily average of the last `history_days`.
+
+    With no `tariff` the stays are priced as they are today (slot rates
+    included); otherwise as in tariff_what_if. Returns a dict with stays,
+    daily and projected.
+    """
+    import numpy as np
+    today = today or datetime.date.today()
+    since = (today - datetime.timedelta(days=history_days)).strftime("%Y-%m-%d")
+    until = (today - datetime.timedelta(days=1)).strftime("%Y-%m-%d") + " 23:59:59"
+    entry, exit_, types, slot_rates = load_stays(db, since, until)
+    if tariff:
+        amounts = batch_fees(entry, exit_, types, **tariff)[0]
+    else:
+        amounts = batch_fees(entry, exit_, types, slot_rates)[0]
+    daily = float(np.nansum(amounts)) / history_days
+    return {'stays': len(entry), 'daily': daily, 'projected': daily * days}
@@ -0,0 +1,65 @@
+"""
+Receipt locations and bulk receipt generation
+"""
+
+import datetime
+import os
+import re
+import sys
+
+from utils.plates import plate_key
+
+
+def receipts_dir():
+    """Directory receipts are saved in, created if it doesn't exist"""
+    if getattr(sys, 'frozen', False):
+        # Running as executable - go up from dist/SmartParkingSystem/
+        base = os.path.dirname(os.path.dirname(sys.executable))
+    else:
+        # Running from source
+        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = os.path.join(base, 'receipts')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def receipt_path(directory, number, stamp, suffix=None):
+    """Path of a plate's receipt: receipt_<plate key>_<stamp>[_<suffix>].pdf.
+
+    The plate key is used so every spelling of a plate names its receipts the
+    same way; anything not safe in a file name (e.g. '/') becomes '_'.
+    """
+    name = re.sub(r"[^\w]", "_", plate_key(number)) or "_"
+    if suffix is not None:
+        stamp = f"{stamp}_{suffix}"
+    return os.path.join(directory, f"receipt_{name}_{stamp}.pdf")
+
+
+def bulk_receipts(db, vehicles, generated_by, directory=None, workers=None):
+    """Generate receipts for many exited vehicle records at once.
+
+    Fees are computed up front, the PDFs are rendered in parallel by
+    generate_pdf_receipts, and the payments for every receipt that rendered
+    are recorded in one transaction. Returns the render stats plus a
+    'failed' list of (vehicle number, error).
+    """
+    from utils.pdf_generator import generate_pdf_receipts
+    from utils.pricing import batch_fees
+    directory = directory or receipts_dir()
+    vehicles = [v for v in vehicles if v[6]]  # skip vehicles still parked
+    rates = {slot[0]: slot[4] for slot in db.list_slots()}
+    stamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+    amounts, durations = batch_fees([v[5] for v in vehicles], [v[6] for v in vehicles],
+                                    [v[2] for v in vehicles], [rates.get(v[4]) for v in vehicles])
+    jobs = []
+    for v, amount, duration in zip(vehicles, amounts.tolist(), durations.tolist()):
+        payment_method = v[7] if len(v) > 7 and v[7] else "cash"
+        # the visit id keeps names unique when a vehicle exits twice in one batch
+        filepath = receipt_path(directory, v[1], stamp, v[0])
+        jobs.append((tuple(v), amount, duration, payment_method, generated_by, filepath))
+
+    errors, stats = generate_pdf_receipts(jobs, workers)
+    db.record_payments([(job[0][1], job[1], job[2], generated_by, job[5], job[3])
+                        for job, error in zip(jobs, errors) if error is None])
+    stats['failed'] = [(job[0][1], error) for job, error in zip(jobs, errors) if error is not None]
+    return stats
@@ -0,0 +1,134 @@
+"""
+Paginated PDF reports for Smart Parking Management System
+Rows are streamed from the database and drawn straight onto the canvas one
+page at a time, so a report can cover the full history without loading it
+"""
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas as pdf_canvas
+from utils.helpers import now_str
+
+
+# report type -> (title, [(header, column width in inches)], row formatter)
+REPORT_TYPES = {
+    "revenue": ("Revenue Report",
+                [("Date", 1.3), ("Vehicle", 2.0), ("Amount", 1.5), ("Payment Method", 1.7)],
+                lambda p: (p[3][:10] if p[3] else "", p[1], f"{p[2] or 0:.2f}", p[7] or "N/A")),
+    "vehicles": ("Vehicle History",
+                 [("Number", 1.4), ("Type", 1.1), ("User", 1.1), ("Entry", 1.45), ("Exit", 1.45)],
+                 lambda v: (v[1], v[2], v[3], (v[5] or "")[:16], v[6][:16] if v[6] else "Active")),
+    "payments": ("Payment Records",
+                 [("Vehicle", 2.0), ("Amount", 1.5), ("Duration (hrs)", 1.5), ("Paid At", 1.5)],
+                 lambda p: (p[1], f"{p[2] or 0:.2f}", f"{p[4] or 0:.2f}", (p[3] or "")[:16])),
+    "slots": ("Slot Utilization",
+              [("Name", 1.8), ("Type", 1.6), ("Status", 1.6), ("Rate", 1.5)],
+              lambda s: (s[1], s[2], s[3], f"{s[4] or 0:.2f}")),
+}
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = 0.6 * inch
+HEADER_HEIGHT = 20
+ROW_HEIGHT = 15
+FONT_SIZE = 9
+
+
+def report_rows(db, report_type, date_from="", date_to=""):
+    """Return (row iterator, total rows) for a report type and date range"""
+    if report_type in ("revenue", "payments"):
+        return db.iter_payments(date_from, date_to), db.count_payments(date_from, date_to)
+    if report_type == "vehicles":
+        return db.iter_vehicles(date_from, date_to), db.count_vehicle_records(date_from, date_to)
+    slots = db.list_slots()
+    return iter(slots), len(slots)
+
+
+def build_report(db, report_type, filepath, date_from="", date_to="", period="All dates", progress=None):
+    """Write a full report PDF; returns (rows, pages)"""
+    title, columns, formatter = REPORT_TYPES[report_type]
+    rows, total = report_rows(db, report_type, date_from, date_to)
+    return write_table_report(filepath, title.upper(), columns, (formatter(r) for r in rows),
+                              subtitle=period, total=total, progress=progress)
+
+
+def write_table_report(filepath, title, columns, rows, subtitle="", total=None, progress=None):
+    """Draw rows into a paginated table with the header repeated on every page.
+
+    `columns` is [(header, width in inches)]; `rows` is any iterable of
+    sequences of display values. `progress(rows_done, pages_done, total)` is
+    called after every page. Returns (rows, pages).
+    """
+    c = pdf_canvas.Canvas(filepath, pagesize=letter, pageCompression=1)
+    widths = [w * inch for _, w in columns]
+    left = (PAGE_WIDTH - sum(widths)) / 2
+    xs = [left]
+    for w in widths:
+        xs.append(xs[-1] + w)
+    centers = [(a + b) / 2 for a, b in zip(xs, xs[1:])]
+    # rough character budget per column so long values do not spill into the next cell
+    max_chars = [int(w / (FONT_SIZE * 0.55)) for w in widths]
+    generated = f"Generated: {now_str()}"
+
+    done = pages = 0
+    rows = iter(rows)
+    while True:
+        top = PAGE_HEIGHT - MARGIN
+        if pages == 0:
+            c.setFont("Helvetica-Bold", 18)
+            c.drawCentredString(PAGE_WIDTH / 2, top - 18, title)
+            c.setFont("Helvetica", 10)
+            c.drawString(left, top - 42, generated)
+            if subtitle:
+                c.drawRightString(xs[-1], top - 42, subtitle)
+            top -= 60
+        capacity = int((top - MARGIN - 20 - HEADER_HEIGHT) // ROW_HEIGHT)
+        page_rows = []
+        for row in rows:
+            page_rows.append(row)
+            if len(page_rows) == capacity:
+                break
+        if not page_rows and pages > 0:
+            break
+        _draw_table(c, xs, centers, max_chars, top, columns, page_rows)
+        pages += 1
+        done += len(page_rows)
+        c.setFont("Helvetica", 8)
+        c.drawCentredString(PAGE_WIDTH / 2, MARGIN / 2, f"{title} - page {pages}")
+        c.showPage()
+        if progress:
+            progress(done, pages, total)
+        if len(page_rows) < capacity:
+            break
+    c.save()
+    return done, pages
+
+
+def _draw_table(c, xs, centers, max_chars, top, columns, rows):
+    """Draw one page of the table: grey header row, beige body, black grid"""
+    header_bottom = top - HEADER_HEIGHT
+    bottom = header_bottom - ROW_HEIGHT * len(rows)
+    width = xs[-1] - xs[0]
+
+    c.setFillColor(colors.grey)
+    c.rect(xs[0], header_bottom, width, HEADER_HEIGHT, stroke=0, fill=1)
+    c.setFillColor(colors.whitesmoke)
+    c.setFont("Helvetica-Bold", 10)
+    for x, (header, _) in zip(centers, columns):
+        c.drawCentredString(x, header_bottom + 6, header)
+
+    if rows:
+        c.setFillColor(colors.beige)
+        c.rect(xs[0], bottom, width, header_bottom - bottom, stroke=0, fill=1)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", FONT_SIZE)
+    y = header_bottom - ROW_HEIGHT + 4
+    for row in rows:
+        for x, limit, value in zip(centers, max_chars, row):
+            text = "" if value is None else str(value)
+            c.drawCentredString(x, y, text[:limit])
+        y -= ROW_HEIGHT
+
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(0.5)
+    c.grid(xs, [top, header_bottom] + [header_bottom - ROW_HEIGHT * i for i in range(1, len(rows) + 1)])
@@ -15,6 +15,7 @@ from .profile_page import ProfilePage
 from .settings_page import SettingsPage
 from .reports_page import ReportsPage
 from .admin_manage_page import AdminManagePage
+from .diagnostics_page import DiagnosticsPage
 
 __all__ = [
     'Page',
@@ -28,5 +29,6 @@ __all__ = [
     'ProfilePage',
     'SettingsPage',
     'ReportsPage',
-    'AdminManagePage'
+    'AdminManagePage',
+    'DiagnosticsPage'
 ]
@@ -7,22 +7,10 @@ from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
 import datetime
 import math
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
 
 from views.base_page import Page
 from utils.config import *
 from utils.helpers import now_str, hours_between, toast
-from utils.pdf_generator import generate_pdf_receipt
-from utils.email_sender import send_email_with_attachment, EMAIL_SETTINGS
-from utils.excel_exporter import export_to_excel
 
 
 class AdminManagePage(Page):
@@ -7,29 +7,23 @@ from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
 import datetime
 import math
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
 
 from views.base_page import Page
 from utils.config import *
 from utils.helpers import now_str, hours_between, toast
-from utils.pdf_generator import generate_pdf_receipt
-from utils.email_sender import send_email_with_attachment, EMAIL_SETTINGS
-from utils.excel_exporter import export_to_excel
+from utils.plates import is_valid_plate
+from models.database import AlreadyParked
 
 
 class DashboardPage(Page):
     """Admin-only dashboard with full statistics and analytics"""
     def __init__(self, parent, app):
         super().__init__(parent, app)
+        self.chart = None  # ChartPanel, created on the first refresh
+        self.revenue_total = 0
         self.build()
+        app.db.events.subscribe_ui(("vehicle_parked", "vehicle_exited", "payment_recorded", "slots_changed"),
+                                   self.on_changes)
 
     def build(self):
         top = tk.Frame(self, bg=BG)
@@ -45,6 +39,7 @@ class DashboardPage(Page):
         tk.Button(self.actions, text="Reports", command=lambda: self.app.show_page("ReportsPage"), bg="#10b981", fg="white").pack(side="left", padx=5)
         tk.Button(self.actions, text="Settings", command=lambda: self.app.show_page("SettingsPage"), bg="#f59e0b", fg="white").pack(side="left", padx=5)
         tk.Button(self.actions, text="Admin", command=lambda: self.app.show_page("AdminManagePage"), bg="#6b7280", fg="white").pack(side="left", padx=5)
+        tk.Button(self.actions, text="Diagnostics", command=lambda: self.app.show_page("DiagnosticsPage"), bg="#6b7280", fg="white").pack(side="left", padx=5)
 
         # Main content area with statistics
         main_content = tk.Frame(self, bg=BG)
@@ -127,64 +122,86 @@ class DashboardPage(Page):
         revenue_stats = self.app.db.get_revenue_stats()
         
         # Update statistics cards
-        self.lbl_revenue.config(text=f"{revenue_stats['total']:.2f} {CURRENCY}")
-        
-        if occupancy['total'] > 0:
-            occ_rate = (occupancy['occupied'] / occupancy['total']) * 100
-            self.lbl_occupancy.config(text=f"{occ_rate:.1f}%")
-        else:
-            self.lbl_occupancy.config(text="N/A")
-        
-        self.lbl_active.config(text=str(occupancy['occupied']))
+        self.revenue_total = revenue_stats['total']
+        self.lbl_revenue.config(text=f"{self.revenue_total:.2f} {CURRENCY}")
+        self.update_occupancy_cards(occupancy)
         
         # Update revenue chart
         self.update_revenue_chart()
         
         # Update recent activity
-        parked = self.app.db.list_parked()
-        active_vehicles = [v for v in parked if v[6] is None]  # exit_time is None
+        active_vehicles = self.app.db.list_active_vehicles(limit=20)  # Show last 20
         
         # clear tree
         for r in self.tree.get_children():
             self.tree.delete(r)
-        for row in active_vehicles[:20]:  # Show last 20
+        for row in active_vehicles:
             self.tree.insert("", "end", values=(row[1], row[2], row[5]))
     
+    def update_occupancy_cards(self, occupancy):
+        """Show occupancy rate and active vehicle count"""
+        if occupancy['total'] > 0:
+            occ_rate = (occupancy['occupied'] / occupancy['total']) * 100
+            self.lbl_occupancy.config(text=f"{occ_rate:.1f}%")
+        else:
+            self.lbl_occupancy.config(text="N/A")
+        
+        self.lbl_active.config(text=str(occupancy['occupied']))
+    
+    def on_changes(self, events):
+        """Apply a frame's worth of DB change events without a full refresh"""
+        if self.app.current_page != "DashboardPage":
+            return  # show_page() refreshes the page when it comes back
+        removed = False
+        for topic, event in events:
+            if topic == "vehicle_parked":
+                self.tree.insert("", 0, values=(event['number'], event['type'], event['entry_time']))
+            elif topic == "vehicle_exited":
+                for iid in self.tree.get_children():
+                    if self.tree.set(iid, "number") == event['number']:
+                        self.tree.delete(iid)
+                        removed = True
+            elif topic == "payment_recorded":
+                self.revenue_total += event['amount'] or 0
+        
+        rows = self.tree.get_children()
+        if len(rows) > 20:
+            self.tree.delete(*rows[20:])  # Show last 20
+        elif removed and len(rows) < 20:
+            # exits made room for older active vehicles
+            for row in self.app.db.list_active_vehicles(limit=20)[len(rows):]:
+                self.tree.insert("", "end", values=(row[1], row[2], row[5]))
+        
+        self.lbl_revenue.config(text=f"{self.revenue_total:.2f} {CURRENCY}")
+        # counters come from the in-memory slot index; the chart redraws only if revenue changed
+        self.update_occupancy_cards(self.app.db.get_occupancy_stats())
+        self.update_revenue_chart()
+    
     def update_revenue_chart(self):
-        """Update the revenue trend chart"""
-        # Clear previous chart
-        for widget in self.chart_canvas_frame.winfo_children():
-            widget.destroy()
+        """Update the revenue trend chart (nothing to do while revenue is unchanged)"""
+        # the date is part of the version: the 7-day window moves at midnight
+        version = (self.app.db.data_version("revenue"), datetime.date.today())
+        if self.chart is not None and not self.chart.stale(version):
+            return
         
         # Get daily revenue data
         daily_data = self.app.db.get_daily_revenue(7)
         
-        if not daily_data:
-            tk.Label(self.chart_canvas_frame, text="No revenue data available", 
-                    bg=CARD, fg="gray").pack(expand=True)
-            return
-        
-        # Create matplotlib figure
-        fig = Figure(figsize=(6, 3), dpi=80, facecolor=CARD)
-        ax = fig.add_subplot(111)
-        
-        dates = [d[0] for d in daily_data]
-        revenues = [d[1] for d in daily_data]
-        
-        ax.plot(dates, revenues, marker='o', color=ACCENT, linewidth=2, markersize=6)
-        ax.fill_between(dates, revenues, alpha=0.3, color=ACCENT)
-        ax.set_xlabel('Date', fontsize=9)
-        ax.set_ylabel(f'Revenue ({CURRENCY})', fontsize=9)
-        ax.tick_params(axis='x', rotation=45, labelsize=8)
-        ax.tick_params(axis='y', labelsize=8)
-        ax.grid(True, alpha=0.3)
-        ax.set_facecolor(CARD)
-        fig.tight_layout()
-        
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_canvas_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        if self.chart is None:
+            # One figure and canvas for the page's lifetime (matplotlib is loaded on first use)
+            from utils.charts import ChartPanel, TrendPlot
+            self.chart = ChartPanel(self.chart_canvas_frame, figsize=(6, 3), facecolor=CARD)
+            ax = self.chart.figure.add_subplot(111)
+            ax.set_xlabel('Date', fontsize=9)
+            ax.set_ylabel(f'Revenue ({CURRENCY})', fontsize=9)
+            ax.tick_params(axis='x', rotation=45, labelsize=8)
+            ax.tick_params(axis='y', labelsize=8)
+            ax.grid(True, alpha=0.3)
+            ax.set_facecolor(CARD)
+            self.trend = TrendPlot(ax, ACCENT, "No revenue data available")
+        
+        self.trend.update([d[0] for d in daily_data], [d[1] for d in daily_data])
+        self.chart.draw(version)
 
     def quick_park(self):
         # ask for vehicle number & type
@@ -192,6 +209,9 @@ class DashboardPage(Page):
         vtype = simpledialog.askstring("Vehicle Type", "Car or Motorcycle:")
         if not number or not vtype:
             toast(self.app, "Cancelled", bg=ERROR); return
+        if not is_valid_plate(number) and not messagebox.askyesno(
+                "Vehicle Number", f"{number} does not look like a {PLATE_COUNTRY} plate. Park it anyway?"):
+            return
         
         # Ask for payment method upfront
         payment_method = simpledialog.askstring("Payment Method", 
@@ -200,16 +220,16 @@ class DashboardPage(Page):
         if not payment_method:
             toast(self.app, "Payment method required", bg=ERROR); return
         
-        # find free slot
-        slot = self.app.db.get_free_slot_for_type(vtype)
-        if not slot:
-            toast(self.app, "No free slot available for this vehicle type", bg=ERROR); return
-        slot_id = slot[0]
+        # find a free slot and park (another gate may take it first; then another slot is tried)
         entry_time = now_str()
         user = self.app.current_user or "unknown"
-        self.app.db.park_vehicle(number, vtype, user, slot_id, entry_time, payment_method)
+        try:
+            slot = self.app.db.park_in_free_slot(number, vtype, user, entry_time, payment_method)
+        except AlreadyParked as e:
+            toast(self.app, str(e), bg=ERROR); return
+        if not slot:
+            toast(self.app, "No free slot available for this vehicle type", bg=ERROR); return
         toast(self.app, f"Parked {number} at slot {slot[1]} - Payment: {payment_method.upper()}", bg=SUCCESS)
-        self.refresh()
 
     def generate_receipt_from_selection(self):
         sel = self.tree.selection()
@@ -218,5 +238,5 @@ class DashboardPage(Page):
         v = self.tree.item(sel[0])["values"]
         number = v[0]  # Updated index for new tree structure
         # call PaymentsPage generate
-        pp = self.app.pages["PaymentsPage"]
+        pp = self.app.get_page("PaymentsPage")
         pp.generate_receipt_for(number)
@@ -0,0 +1,138 @@
+"""
+DiagnosticsPage - View for Smart Parking Management System
+"""
+
+import tkinter as tk
+from tkinter import ttk, filedialog
+import datetime
+
+from views.base_page import Page
+from utils.config import *
+from utils.helpers import toast
+
+
+class DiagnosticsPage(Page):
+    """Admin view of the opt-in DB and page timings (see utils.instrumentation)"""
+    def __init__(self, parent, app):
+        super().__init__(parent, app)
+        self.build()
+
+    def _check_admin(self):
+        """Check if user has admin access"""
+        if self.app.current_user_role != "admin":
+            toast(self.app, "Admin access required", bg=ERROR)
+            self.app.show_page("DashboardPage")
+            return False
+        return True
+
+    def build(self):
+        top = tk.Frame(self, bg=BG)
+        top.pack(fill="x", pady=10, padx=20)
+        tk.Label(top, text="Diagnostics", font=("Segoe UI", 16, "bold"), fg=ACCENT, bg=BG).pack(side="left")
+        tk.Button(top, text="Back", command=lambda: self.app.show_page("DashboardPage")).pack(side="right")
+
+        ctrl = tk.Frame(self, bg=BG)
+        ctrl.pack(fill="x", padx=20)
+        self.toggle_button = tk.Button(ctrl, text="Enable", command=self.toggle, bg=ACCENT, fg="white", width=10)
+        self.toggle_button.pack(side="left", padx=5)
+        tk.Button(ctrl, text="Reset", command=self.reset).pack(side="left", padx=5)
+        tk.Button(ctrl, text="Export JSON", command=lambda: self.export("json")).pack(side="left", padx=5)
+        tk.Button(ctrl, text="Export CSV", command=lambda: self.export("csv")).pack(side="left", padx=5)
+        tk.Label(ctrl, text="Profile next refresh of:", bg=BG).pack(side="left", padx=(20, 5))
+        self.profile_target = ttk.Combobox(ctrl, state="readonly", width=20,
+                                           values=[n for n in self.app.page_classes if n not in ("LoginPage", "RegisterPage")])
+        self.profile_target.set("DashboardPage")
+        self.profile_target.pack(side="left")
+        tk.Button(ctrl, text="Profile", command=self.profile, bg="#f59e0b", fg="white").pack(side="left", padx=5)
+        tk.Button(ctrl, text="Refresh", command=self.refresh).pack(side="right", padx=5)
+        self.status = tk.Label(self, text="", bg=BG, fg="#6b7280", anchor="w")
+        self.status.pack(fill="x", padx=20, pady=(5, 0))
+
+        notebook = ttk.Notebook(self)
+        notebook.pack(fill="both", expand=True, padx=20, pady=10)
+        cols = ("name", "calls", "errors", "rows", "total_ms", "mean_ms", "p95_ms", "max_ms")
+        self.db_tree = self._stats_tree(notebook, cols)
+        notebook.add(self.db_tree.master, text="DB methods")
+        self.page_tree = self._stats_tree(notebook, cols)
+        notebook.add(self.page_tree.master, text="Page refresh")
+
+        sql_frame = tk.Frame(notebook, bg=BG)
+        self.sql_tree = ttk.Treeview(sql_frame, columns=("time", "thread", "sql"), show="headings")
+        for c, width in (("time", 90), ("thread", 120), ("sql", 800)):
+            self.sql_tree.heading(c, text=c.title())
+            self.sql_tree.column(c, width=width, anchor="w", stretch=c == "sql")
+        self.sql_tree.pack(fill="both", expand=True)
+        notebook.add(sql_frame, text="Recent SQL")
+
+        profile_frame = tk.Frame(notebook, bg=BG)
+        self.profile_text = tk.Text(profile_frame, font=("Courier", 9), wrap="none")
+        self.profile_text.pack(fill="both", expand=True)
+        notebook.add(profile_frame, text="Profile")
+
+    def _stats_tree(self, parent, cols):
+        frame = tk.Frame(parent, bg=BG)
+        tree = ttk.Treeview(frame, columns=cols, show="headings")
+        for c in cols:
+            tree.heading(c, text=c.replace("_", " ").title())
+            tree.column(c, width=260 if c == "name" else 90, anchor="w" if c == "name" else "e")
+        tree.pack(fill="both", expand=True)
+        return tree
+
+    def refresh(self):
+        if not self._check_admin():
+            return
+        instruments = self.app.instruments
+        snapshot = instruments.snapshot()
+        self.toggle_button.config(text="Disable" if snapshot["enabled"] else "Enable")
+        state = f"Recording since {snapshot['since']}" if snapshot["enabled"] else "Recording is off"
+        self.status.config(text=f"{state} - {snapshot['statements']} SQL statements traced")
+        for tree, stats in ((self.db_tree, snapshot["db"]), (self.page_tree, snapshot["pages"])):
+            tree.delete(*tree.get_children())
+            # most expensive first
+            for name, s in sorted(stats.items(), key=lambda item: -item[1]["total_ms"]):
+                tree.insert("", "end", values=(name, s["calls"], s["errors"], s["rows"], f"{s['total_ms']:.1f}",
+                                               f"{s['mean_ms']:.3f}", f"{s['p95_ms']:g}", f"{s['max_ms']:.2f}"))
+        self.sql_tree.delete(*self.sql_tree.get_children())
+        for t in reversed(snapshot["recent_sql"]):
+            self.sql_tree.insert("", "end", values=(t["time"], t["thread"], " ".join(t["sql"].split())))
+        self.profile_text.delete("1.0", tk.END)
+        if instruments.last_profile:
+            name, text = instruments.last_profile
+            self.profile_text.insert("1.0", f"{name}.refresh()\n\n{text}")
+
+    def toggle(self):
+        instruments = self.app.instruments
+        if instruments.enabled:
+            instruments.disable()
+            toast(self.app, "Diagnostics off", bg=SUCCESS)
+        else:
+            instruments.enable(self.app.db, self.app.pages)
+            toast(self.app, "Diagnostics on: recording DB calls and page refreshes", bg=SUCCESS)
+        self.refresh()
+
+    def reset(self):
+        self.app.instruments.reset()
+        self.refresh()
+
+    def profile(self):
+        name = self.profile_target.get()
+        if not self.app.instruments.enabled:
+            self.app.instruments.enable(self.app.db, self.app.pages)
+        self.app.instruments.profile_page = name
+        # the target page's refresh runs under cProfile when it is shown
+        self.app.show_page(name)
+
+    def export(self, kind):
+        default = f"diagnostics_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{kind}"
+        filename = filedialog.asksaveasfilename(defaultextension=f".{kind}", initialfile=default,
+                                                filetypes=[(kind.upper(), f"*.{kind}")])
+        if not filename:
+            return
+        try:
+            if kind == "json":
+                self.app.instruments.dump_json(filename)
+            else:
+                self.app.instruments.dump_csv(filename)
+            toast(self.app, f"Diagnostics saved: {filename}", bg=SUCCESS)
+        except Exception as e:
+            toast(self.app, f"Error saving diagnostics: {e}", bg=ERROR)
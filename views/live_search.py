@@ -0,0 +1,107 @@
+"""
+LiveSearch - search-as-you-type for a PagedTree
+"""
+
+import queue
+import threading
+
+from models.database import SearchCancelled
+
+
+class LiveSearch:
+    """Run a search as the operator types into `entry` and show it in `pager`.
+
+    Keystrokes are debounced by `delay` ms; the query then runs on a worker
+    thread and only its first page is rendered, the rest loading on scroll.
+    Each new search cancels the one in flight (the DB aborts its statement
+    via the `cancelled` callback), and results of a superseded search are
+    dropped. `search(term, limit=, before_id=, after_id=, cancelled=)` is
+    DB.search_vehicles or DB.search_payments; `on_empty()` runs instead when
+    the box is cleared, `on_status(text)` reports progress.
+    """
+
+    def __init__(self, entry, pager, search, on_empty, on_status=None, delay=250):
+        self.entry = entry
+        self.pager = pager
+        self.search = search
+        self.on_empty = on_empty
+        self.on_status = on_status or (lambda text: None)
+        self.delay = delay
+        self.term = None  # last term searched
+        self._generation = 0  # bumped by every new search; older ones are stale
+        self._timer = None
+        self._running = 0
+        self._results = queue.Queue()
+        entry.bind("<KeyRelease>", self._on_key)
+        entry.bind("<Return>", lambda event: self.run())
+
+    # --- public API ---
+    def run(self):
+        """Search for the entry's text now"""
+        self._cancel_timer()
+        term = self.entry.get().strip()
+        self.term = term
+        self._generation += 1
+        if not term:
+            self.on_status("")
+            self.on_empty()
+            return
+        generation = self._generation
+        cancelled = lambda: generation != self._generation
+
+        def work():
+            try:
+                result = self.search(term, limit=self.pager.page_size, cancelled=cancelled)
+            except SearchCancelled:
+                return self._results.put((generation, None, None))
+            except Exception as e:
+                result = e
+            self._results.put((generation, term, result))
+
+        self.on_status(f"Searching '{term}'...")
+        self._running += 1
+        threading.Thread(target=work, name="LiveSearch", daemon=True).start()
+        if self._running == 1:
+            self.entry.after(50, self._poll)
+
+    def cancel(self):
+        """Drop any pending or running search"""
+        self._cancel_timer()
+        self._generation += 1
+        self.term = None
+        self.on_status("")
+
+    # --- internals ---
+    def _on_key(self, event):
+        # arrows, shift etc. do not change the text
+        if self.entry.get().strip() == self.term and self._timer is None:
+            return
+        self._cancel_timer()
+        self._generation += 1
+        self._timer = self.entry.after(self.delay, self.run)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self.entry.after_cancel(self._timer)
+            self._timer = None
+
+    def _poll(self):
+        while True:
+            try:
+                generation, term, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._running -= 1
+            if generation == self._generation:
+                self._show(term, result)
+        if self._running:
+            self.entry.after(50, self._poll)
+
+    def _show(self, term, result):
+        if isinstance(result, Exception):
+            self.on_status(f"Search failed: {result}")
+            return
+        # later pages are keyset continuations of the same search
+        self.pager.reset(lambda **page: self.search(term, **page), rows=result)
+        more = "+" if self.pager.has_older else ""
+        self.on_status(f"{len(result)}{more} matches for '{term}'")
@@ -0,0 +1,115 @@
+"""
+PagedTree - lazily paged Treeview helper for large tables
+"""
+
+
+class PagedTree:
+    """Feed a ttk.Treeview page by page from a keyset-paginated source.
+
+    `fetch(before_id=None, after_id=None, limit=N)` must return rows newest
+    first with the row id in column 0 (see DB.list_vehicles_page). Older pages
+    load when the view nears the bottom, newer ones when it is scrolled back to
+    the top, and the widget never holds more than `max_rows` items.
+    """
+
+    def __init__(self, tree, scrollbar=None, row_values=None, page_size=100, max_rows=500):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values or (lambda row: row)
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.fetch = None
+        self.has_older = False
+        self.has_newer = False
+        self._pending = None
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+
+    # --- public API ---
+    def reset(self, fetch, rows=None):
+        """Show the newest page of `fetch` and page lazily from there.
+
+        Pass `rows` when that first page has already been fetched (off the Tk
+        thread, see LiveSearch).
+        """
+        self.fetch = fetch
+        self._clear()
+        if rows is None:
+            rows = fetch(limit=self.page_size)
+        self._insert(rows, "end")
+        self.has_older = len(rows) == self.page_size
+        self.has_newer = False
+
+    def show(self, rows):
+        """Show a fixed list of rows (no lazy paging)"""
+        self.fetch = None
+        self._clear()
+        self._insert(rows, "end")
+        self.has_older = self.has_newer = False
+
+    def load_older(self):
+        """Append the next older page, dropping rows from the top if needed"""
+        children = self.tree.get_children()
+        if not self.fetch or not self.has_older or not children:
+            return
+        rows = self.fetch(before_id=self._row_id(children[-1]), limit=self.page_size)
+        self._insert(rows, "end")
+        self.has_older = len(rows) == self.page_size
+        trimmed = self._trim(from_top=True)
+        if trimmed:
+            self.has_newer = True
+            # rows above the view were removed; keep the same rows on screen
+            self.tree.yview_scroll(-trimmed, "units")
+
+    def load_newer(self):
+        """Prepend the next newer page, dropping rows from the bottom if needed"""
+        children = self.tree.get_children()
+        if not self.fetch or not self.has_newer or not children:
+            return
+        rows = self.fetch(after_id=self._row_id(children[0]), limit=self.page_size)
+        self._insert(rows, 0)
+        self.has_newer = len(rows) == self.page_size
+        if self._trim(from_top=False):
+            self.has_older = True
+        if rows:
+            self.tree.yview_scroll(len(rows), "units")
+
+    # --- internals ---
+    def _clear(self):
+        self.tree.delete(*self.tree.get_children())
+
+    def _insert(self, rows, index):
+        if index == "end":
+            for row in rows:
+                self.tree.insert("", "end", iid=str(row[0]), values=self.row_values(row))
+        else:
+            for offset, row in enumerate(rows):
+                self.tree.insert("", index + offset, iid=str(row[0]), values=self.row_values(row))
+
+    def _trim(self, from_top):
+        children = self.tree.get_children()
+        overflow = len(children) - self.max_rows
+        if overflow <= 0:
+            return 0
+        self.tree.delete(*(children[:overflow] if from_top else children[-overflow:]))
+        return overflow
+
+    @staticmethod
+    def _row_id(iid):
+        return int(iid)
+
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if self.fetch is None or self._pending is not None:
+            return
+        # load outside the scroll callback, once Tk is idle
+        if float(last) >= 0.95 and self.has_older:
+            self._pending = self.tree.after_idle(self._run, self.load_older)
+        elif float(first) <= 0.0 and self.has_newer:
+            self._pending = self.tree.after_idle(self._run, self.load_newer)
+
+    def _run(self, load):
+        try:
+            load()
+        finally:
+            self._pending = None
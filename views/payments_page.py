@@ -6,25 +6,16 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
 import datetime
-import math
 import os
-import sys
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
+import queue
+import threading
 
 from views.base_page import Page
+from views.paged_tree import PagedTree
+from views.live_search import LiveSearch
+from models.database import StillParked
 from utils.config import *
-from utils.helpers import now_str, hours_between, toast
-from utils.pdf_generator import generate_pdf_receipt
-from utils.email_sender import send_email_with_attachment, EMAIL_SETTINGS
-from utils.excel_exporter import export_to_excel
+from utils.helpers import toast
 
 
 class PaymentsPage(Page):
@@ -45,146 +36,137 @@ class PaymentsPage(Page):
         self.search_entry.pack(side="left", padx=5)
         tk.Button(search_frame, text="Search", command=self.search, bg=ACCENT, fg="white").pack(side="left", padx=5)
         tk.Button(search_frame, text="Clear", command=self.clear_search, bg="#6b7280", fg="white").pack(side="left", padx=5)
+        self.search_status = tk.Label(search_frame, text="", bg=BG, fg="#6b7280")
+        self.search_status.pack(side="left", padx=10)
         
         # tree
         cols = ("id","vehicle_number","amount","paid_at","duration_hours","payment_method","generated_by")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=16)
+        table = tk.Frame(self, bg=BG); table.pack(fill="both", expand=True, padx=20, pady=10)
+        self.tree = ttk.Treeview(table, columns=cols, show="headings", height=16)
         for c in cols:
             self.tree.heading(c, text=c.replace("_", " ").title())
             self.tree.column(c, width=120, anchor="center")
-        self.tree.pack(fill="both", expand=True, padx=20, pady=10)
+        scroll = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        # rows are loaded a page at a time as the table is scrolled
+        self.pager = PagedTree(self.tree, scroll, row_values=lambda row: row[:7])  # Exclude receipt path column
+        # results update as the operator types; queries run off the Tk thread
+        self.live_search = LiveSearch(self.search_entry, self.pager, lambda *a, **kw: self.app.db.search_payments(*a, **kw),
+                                      on_empty=self.show_all, on_status=lambda text: self.search_status.config(text=text))
         ctrl = tk.Frame(self, bg=BG); ctrl.pack(fill="x", padx=20)
         tk.Button(ctrl, text="Generate Receipt for Vehicle", command=self.prompt_and_generate).pack(side="left", padx=5)
+        self.bulk_button = tk.Button(ctrl, text="Bulk Receipts for a Day", command=self.bulk_generate)
+        self.bulk_button.pack(side="left", padx=5)
         tk.Button(ctrl, text="Refresh", command=self.refresh).pack(side="right", padx=5)
 
     def refresh(self):
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        for row in self.app.db.list_payments():
-            self.tree.insert("", "end", values=row[:7])  # Exclude receipt path column
+        # keep showing the current search, re-run against the latest data
+        if self.search_entry.get().strip():
+            self.live_search.run()
+        else:
+            self.show_all()
+
+    def show_all(self):
+        self.pager.reset(self.app.db.list_payments_page)
     
     def search(self):
-        search_term = self.search_entry.get().strip()
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        results = self.app.db.search_payments(search_term)
-        for row in results:
-            self.tree.insert("", "end", values=row[:7])
-        toast(self.app, f"Found {len(results)} results", bg=SUCCESS)
+        self.live_search.run()
     
     def clear_search(self):
         self.search_entry.delete(0, tk.END)
-        self.refresh()
+        self.live_search.cancel()
+        self.show_all()
 
     def prompt_and_generate(self):
         number = simpledialog.askstring("Receipt", "Enter vehicle number:")
         if not number: return
         self.generate_receipt_for(number)
 
-    def generate_receipt_for(self, number):
-        # find latest vehicle record
-        v = self.app.db.get_last_vehicle_record(number)
-        if not v:
-            toast(self.app, "Vehicle not found", bg=ERROR); return
-        # if still parked (exit_time is null), ask to exit first
-        if not v[6]:  # exit_time is None
-            if not messagebox.askyesno("Not exited", f"Vehicle {number} has not exited. Record exit now?"):
-                return
-            exit_time = now_str()
-            self.app.db.exit_vehicle(number, exit_time)
-            v = self.app.db.get_last_vehicle_record(number)
-        
-        # Get payment method from vehicle record (stored during parking)
-        payment_method = v[7] if len(v) > 7 and v[7] else "cash"
-        
-        # compute duration and fee
-        entry_time = v[5]
-        exit_time = v[6]
-        duration = hours_between(entry_time, exit_time)
-        duration_rounded = math.ceil(duration * 100) / 100.0  # round up to 2 decimals
+    def bulk_generate(self):
+        """Generate receipts for every unpaid exit on one day"""
+        day = simpledialog.askstring("Bulk Receipts", "Exit date (YYYY-MM-DD):",
+                                     initialvalue=datetime.date.today().isoformat())
+        if not day: return
+        try:
+            datetime.datetime.strptime(day, "%Y-%m-%d")
+        except ValueError:
+            toast(self.app, "Date must be YYYY-MM-DD", bg=ERROR); return
+        vehicles = self.app.db.list_unpaid_exits(day, day + " 23:59:59")
+        if not vehicles:
+            toast(self.app, f"No unpaid exits on {day}", bg=ERROR); return
+        if not messagebox.askyesno("Bulk Receipts", f"Generate receipts and record payments for {len(vehicles)} vehicles?"):
+            return
         
-        # Get slot-specific rate if available
-        slot_data = self.app.db.get_slot_by_id(v[4]) if v[4] else None
-        if slot_data and slot_data[4] > 0:  # slot has custom rate
-            rate = slot_data[4]
-        else:
-            # Use default rates
-            rate = HOURLY_RATE_CAR if v[2].lower().startswith("c") else HOURLY_RATE_MOTOR
+        # render on a worker thread (which fans out to a process pool), poll for the result
+        self.bulk_button.config(state="disabled")
+        toast(self.app, f"Generating {len(vehicles)} receipts...", bg=ACCENT)
+        results = queue.Queue()
+        user = self.app.current_user
         
-        # Calculate amount with minimum charge of 1000 UGX for 1 hour or less
-        if duration <= 1.0:
-            amount = 1000.0  # Flat rate for 1 hour or less
-        else:
-            amount = max(0, duration * rate)
-        amount = round(amount, 2)
+        def work():
+            try:
+                from utils.receipts import bulk_receipts
+                results.put(bulk_receipts(self.app.db, vehicles, user))
+            except Exception as e:
+                results.put(e)
         
-        # Generate PDF receipt in receipts directory
-        # Create receipts directory if it doesn't exist
-        if getattr(sys, 'frozen', False):
-            # Running as executable - go up from dist/SmartParkingSystem/
-            receipts_dir = os.path.join(os.path.dirname(os.path.dirname(sys.executable)), 'receipts')
+        threading.Thread(target=work, daemon=True).start()
+        self.after(200, self._poll_bulk, results)
+    
+    def _poll_bulk(self, results):
+        try:
+            stats = results.get_nowait()
+        except queue.Empty:
+            self.after(200, self._poll_bulk, results)
+            return
+        self.bulk_button.config(state="normal")
+        if isinstance(stats, Exception):
+            toast(self.app, f"Error generating receipts: {stats}", bg=ERROR)
+            return
+        message = (f"Generated {stats['receipts']} receipts in {stats['seconds']:.1f} s "
+                   f"({stats['per_second']:.0f}/s on {stats['workers']} workers)")
+        if stats['failed']:
+            messagebox.showwarning("Bulk Receipts", message + f"\n\n{len(stats['failed'])} failed, e.g. "
+                                   f"{stats['failed'][0][0]}: {stats['failed'][0][1]}")
         else:
-            # Running from source
-            receipts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'receipts')
-        
-        os.makedirs(receipts_dir, exist_ok=True)
-        
-        fname = f"receipt_{v[1]}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath = os.path.join(receipts_dir, fname)
-        
+            toast(self.app, message, bg=SUCCESS)
+        self.refresh()
+
+    def generate_receipt_for(self, number, allow_exit=False):
+        # exit (if confirmed), fee and payment are committed together in one
+        # transaction; the PDF and email follow in the background
         try:
-            generate_pdf_receipt(v, amount, duration_rounded, payment_method, 
-                               self.app.current_user, filepath)
-            
-            # record payment
-            self.app.db.record_payment(v[1], amount, duration_rounded, self.app.current_user, 
-                                      filepath, payment_method)
-            
-            toast(self.app, f"PDF Receipt saved: {fname}", bg=SUCCESS)
-            
-            # Automatically send email to user (vehicle owner)
-            user_data = self.app.db.get_user(v[3])  # Get vehicle owner's details
-            # user_data = (username, full_name, role, email)
-            if user_data and len(user_data) > 3 and user_data[3]:  # Has email (index 3)
-                user_email = user_data[3]
-                user_fullname = user_data[1] if len(user_data) > 1 else v[3]
-                
-                # Send email automatically
-                success, msg = send_email_with_attachment(
-                    user_email,
-                    f"Parking Receipt - {v[1]}",
-                    f"Dear {user_fullname},\n\n"
-                    f"Thank you for using our parking service.\n\n"
-                    f"Receipt Details:\n"
-                    f"Vehicle Number: {v[1]}\n"
-                    f"Vehicle Type: {v[2]}\n"
-                    f"Entry Time: {entry_time}\n"
-                    f"Exit Time: {exit_time}\n"
-                    f"Duration: {duration_rounded:.2f} hours\n"
-                    f"Amount Paid: {amount} {CURRENCY}\n"
-                    f"Payment Method: {payment_method.upper()}\n\n"
-                    f"Please find your detailed receipt attached.\n\n"
-                    f"Best regards,\n"
-                    f"Smart Parking Management System",
-                    filepath
-                )
-                if success:
-                    messagebox.showinfo("Receipt Sent", 
-                                       f"Receipt generated successfully!\n\n"
-                                       f"Saved as: {fname}\n"
-                                       f"Email sent to: {user_email}")
-                else:
-                    messagebox.showwarning("Email Failed", 
-                                          f"Receipt saved as: {fname}\n\n"
-                                          f"Could not send email to {user_email}:\n{msg}\n\n"
-                                          f"Please check email settings in Admin > Settings.")
-            else:
-                # No email on file
-                messagebox.showinfo("Receipt Generated", 
-                                   f"Receipt saved as: {fname}\n\n"
-                                   f"User has no email address on file.\n"
-                                   f"Email cannot be sent.")
-            
-            self.refresh()
+            result = self.app.checkouts.checkout(number, self.app.current_user, allow_exit=allow_exit,
+                                                 on_receipt=self._receipt_done, on_email=self._email_done)
+        except StillParked:
+            # if still parked, ask to exit first
+            if messagebox.askyesno("Not exited", f"Vehicle {number} has not exited. Record exit now?"):
+                self.generate_receipt_for(number, allow_exit=True)
+            return
         except Exception as e:
-            toast(self.app, f"Error generating receipt: {str(e)}", bg=ERROR)
+            toast(self.app, f"Error recording payment: {str(e)}", bg=ERROR); return
+        if result is None:
+            toast(self.app, "Vehicle not found", bg=ERROR); return
+        exited = f" - exit recorded at {result['visit'][6]}" if result["exited"] else ""
+        toast(self.app, f"{result['visit'][1]} paid {result['amount']} {CURRENCY}{exited} - generating receipt...", bg=SUCCESS)
+        self.refresh()
+
+    def _receipt_done(self, result, error):
+        fname = os.path.basename(result["receipt_path"])
+        if error:
+            messagebox.showwarning("Receipt Failed",
+                                   f"Payment for {result['visit'][1]} was recorded, but the receipt "
+                                   f"could not be generated:\n{error}")
+        elif result["email"]:
+            toast(self.app, f"PDF Receipt saved: {fname} - emailing to {result['email']}", bg=SUCCESS)
+        else:
+            toast(self.app, f"PDF Receipt saved: {fname} (no email address on file)", bg=SUCCESS)
+
+    def _email_done(self, success, msg):
+        if success:
+            toast(self.app, "Receipt emailed", bg=SUCCESS)
+        else:
+            messagebox.showwarning("Email Failed",
+                                   f"Could not send the receipt email:\n{msg}\n\n"
+                                   f"Please check email settings in Admin > Settings.")
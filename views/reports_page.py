@@ -7,27 +7,18 @@ from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
 import datetime
 import math
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
+import queue
+import threading
 
 from views.base_page import Page
 from utils.config import *
 from utils.helpers import now_str, hours_between, toast
-from utils.pdf_generator import generate_pdf_receipt
-from utils.email_sender import send_email_with_attachment, EMAIL_SETTINGS
-from utils.excel_exporter import export_to_excel
 
 
 class ReportsPage(Page):
     def __init__(self, parent, app):
         super().__init__(parent, app)
+        self.chart = None  # ChartPanel, created on the first refresh
         self.build()
     
     def _check_admin(self):
@@ -94,9 +85,19 @@ class ReportsPage(Page):
         self.date_to.pack(anchor="w", pady=2)
         self.date_to.insert(0, "YYYY-MM-DD")
         
-        tk.Button(right, text="Export to PDF", bg=ACCENT, fg="white", command=self.export_pdf, width=20).pack(pady=(20, 5))
-        tk.Button(right, text="Export to Excel", bg="#10b981", fg="white", command=self.export_excel, width=20).pack(pady=5)
+        self.pdf_button = tk.Button(right, text="Export to PDF", bg=ACCENT, fg="white", command=self.export_pdf, width=20)
+        self.pdf_button.pack(pady=(20, 5))
+        self.excel_button = tk.Button(right, text="Export to Excel", bg="#10b981", fg="white", command=self.export_excel, width=20)
+        self.excel_button.pack(pady=5)
         tk.Button(right, text="Refresh Data", bg="#6b7280", fg="white", command=self.refresh, width=20).pack(pady=5)
+        self.what_if_button = tk.Button(right, text="Tariff What-If", bg="#8b5cf6", fg="white", command=self.tariff_what_if, width=20)
+        self.what_if_button.pack(pady=5)
+        
+        # PDF and Excel export progress
+        self.progress = ttk.Progressbar(right, length=180, mode="determinate", maximum=100)
+        self.progress.pack(pady=(15, 2))
+        self.progress_label = tk.Label(right, text="", bg=CARD, font=("Segoe UI", 9))
+        self.progress_label.pack()
     
     def refresh(self):
         # Check admin access
@@ -106,8 +107,8 @@ class ReportsPage(Page):
         # Update statistics
         occupancy = self.app.db.get_occupancy_stats()
         revenue_stats = self.app.db.get_revenue_stats()
-        payments = self.app.db.list_payments()
-        vehicles = self.app.db.list_parked()
+        vehicle_records = self.app.db.count_vehicle_records()
+        active_vehicles = self.app.db.count_active_vehicles()
         
         stats_text = f"""
 Total Slots: {occupancy['total']}
@@ -119,138 +120,243 @@ Total Revenue: {revenue_stats['total']:.2f} {CURRENCY}
 Total Payments: {revenue_stats['count']}
 Average Payment: {(revenue_stats['total']/revenue_stats['count']) if revenue_stats['count'] > 0 else 0:.2f} {CURRENCY}
 
-Total Vehicle Records: {len(vehicles)}
-Active Vehicles: {len([v for v in vehicles if v[6] is None])}
+Total Vehicle Records: {vehicle_records}
+Active Vehicles: {active_vehicles}
         """
         
         self.stats_text.delete(1.0, tk.END)
         self.stats_text.insert(1.0, stats_text.strip())
         
         # Update charts
-        self.update_charts()
+        self.update_charts(occupancy)
     
-    def update_charts(self):
-        # Clear previous chart
-        for widget in self.chart_canvas_frame.winfo_children():
-            widget.destroy()
-        
-        # Get data
-        daily_revenue = self.app.db.get_daily_revenue(30)
-        occupancy = self.app.db.get_occupancy_stats()
-        
-        if not daily_revenue:
-            tk.Label(self.chart_canvas_frame, text="No data available", bg=CARD, fg="gray").pack(expand=True)
+    def update_charts(self, occupancy=None):
+        """Update the revenue trend and occupancy pie in place (only the parts whose data changed)"""
+        db = self.app.db
+        revenue_version = (db.data_version("revenue"), datetime.date.today())
+        occupancy_version = db.data_version("occupancy")
+        version = (revenue_version, occupancy_version)
+        if self.chart is not None and not self.chart.stale(version):
             return
         
-        # Create figure with subplots
-        fig = Figure(figsize=(8, 6), dpi=80, facecolor=CARD)
-        
-        # Revenue trend
-        ax1 = fig.add_subplot(211)
-        dates = [d[0] for d in daily_revenue[-14:]]  # Last 14 days
-        revenues = [d[1] for d in daily_revenue[-14:]]
-        ax1.plot(dates, revenues, marker='o', color=ACCENT, linewidth=2)
-        ax1.fill_between(dates, revenues, alpha=0.3, color=ACCENT)
-        ax1.set_title('Revenue Trend (Last 14 Days)', fontsize=10, fontweight='bold')
-        ax1.set_ylabel(f'Revenue ({CURRENCY})', fontsize=9)
-        ax1.tick_params(axis='x', rotation=45, labelsize=7)
-        ax1.grid(True, alpha=0.3)
-        ax1.set_facecolor(CARD)
-        
-        # Occupancy pie chart
-        ax2 = fig.add_subplot(212)
-        if occupancy['total'] > 0:
-            sizes = [occupancy['occupied'], occupancy['free']]
-            labels = ['Occupied', 'Free']
-            colors = [ERROR, SUCCESS]
-            ax2.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+        if self.chart is None:
+            # One figure and canvas for the page's lifetime (matplotlib is loaded on first use)
+            from utils.charts import ChartPanel, TrendPlot, SharePie
+            self.chart = ChartPanel(self.chart_canvas_frame, figsize=(8, 6), facecolor=CARD)
+            
+            # Revenue trend
+            ax1 = self.chart.figure.add_subplot(211)
+            ax1.set_title('Revenue Trend (Last 14 Days)', fontsize=10, fontweight='bold')
+            ax1.set_ylabel(f'Revenue ({CURRENCY})', fontsize=9)
+            ax1.tick_params(axis='x', rotation=45, labelsize=7)
+            ax1.grid(True, alpha=0.3)
+            ax1.set_facecolor(CARD)
+            self.trend = TrendPlot(ax1, ACCENT)
+            
+            # Occupancy pie chart
+            ax2 = self.chart.figure.add_subplot(212)
             ax2.set_title('Current Slot Occupancy', fontsize=10, fontweight='bold')
-        ax2.set_facecolor(CARD)
-        
-        fig.tight_layout()
+            ax2.set_facecolor(CARD)
+            self.pie = SharePie(ax2, ['Occupied', 'Free'], [ERROR, SUCCESS])
         
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_canvas_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        last_revenue, last_occupancy = self.chart.version or (None, None)
+        if revenue_version != last_revenue:
+            daily_revenue = db.get_daily_revenue(30)[-14:]  # Last 14 days
+            self.trend.update([d[0] for d in daily_revenue], [d[1] for d in daily_revenue])
+        if occupancy_version != last_occupancy:
+            if occupancy is None:
+                occupancy = db.get_occupancy_stats()
+            self.pie.update([occupancy['occupied'], occupancy['free']])
+        self.chart.draw(version)
+    
+    def _date_range(self):
+        """Return (date_from, date_to, label) from the date fields; raises ValueError if malformed"""
+        bounds = []
+        for entry in (self.date_from, self.date_to):
+            value = entry.get().strip()
+            if value in ("", "YYYY-MM-DD"):
+                value = ""
+            else:
+                datetime.datetime.strptime(value, "%Y-%m-%d")
+            bounds.append(value)
+        date_from, date_to = bounds
+        if date_from and date_to:
+            label = f"{date_from} to {date_to}"
+        elif date_from or date_to:
+            label = f"From {date_from}" if date_from else f"Up to {date_to}"
+        else:
+            label = "All dates"
+        # the To date is inclusive: cover the whole day
+        return date_from, (date_to + " 23:59:59" if date_to else ""), label
     
     def export_pdf(self):
         report_type = self.report_type.get()
         filename = f"{report_type}_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        try:
+            date_from, date_to, period = self._date_range()
+        except ValueError:
+            toast(self.app, "Dates must be YYYY-MM-DD", bg=ERROR)
+            return
+        
+        # Large reports take a while: build on a worker thread, report progress via after()
+        self.pdf_button.config(state="disabled")
+        self.progress.config(value=0)
+        self.progress_label.config(text="Preparing report...")
+        updates = queue.Queue()
+        
+        def work():
+            try:
+                from utils.report_generator import build_report
+                rows, pages = build_report(self.app.db, report_type, filename, date_from, date_to, period,
+                                           progress=lambda done, pages, total: updates.put(("progress", done, pages, total)))
+                updates.put(("done", rows, pages))
+            except Exception as e:
+                updates.put(("error", str(e)))
         
+        threading.Thread(target=work, daemon=True).start()
+        self.after(100, self._poll_pdf, updates, filename)
+    
+    def _poll_pdf(self, updates, filename):
+        while True:
+            try:
+                update = updates.get_nowait()
+            except queue.Empty:
+                break
+            if update[0] == "progress":
+                _, done, pages, total = update
+                self.progress.config(value=100.0 * done / total if total else 100)
+                self.progress_label.config(text=f"{done}/{total} rows, {pages} pages")
+            else:
+                self.pdf_button.config(state="normal")
+                if update[0] == "done":
+                    self.progress.config(value=100)
+                    self.progress_label.config(text=f"{update[1]} rows, {update[2]} pages")
+                    toast(self.app, f"PDF report saved: {filename}", bg=SUCCESS)
+                else:
+                    self.progress_label.config(text="")
+                    toast(self.app, f"Error generating PDF: {update[1]}", bg=ERROR)
+                return
+        self.after(100, self._poll_pdf, updates, filename)
+    
+    def tariff_what_if(self):
+        """Re-price past stays in the date range under proposed rates and project the next 30 days"""
+        from utils import config
+        car_rate = simpledialog.askfloat("Tariff What-If", f"Proposed car rate per hour ({CURRENCY}):",
+                                         initialvalue=config.HOURLY_RATE_CAR, minvalue=0)
+        if car_rate is None:
+            return
+        motor_rate = simpledialog.askfloat("Tariff What-If", f"Proposed motorcycle rate per hour ({CURRENCY}):",
+                                           initialvalue=config.HOURLY_RATE_MOTOR, minvalue=0)
+        if motor_rate is None:
+            return
         try:
-            doc = SimpleDocTemplate(filename, pagesize=letter)
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title = Paragraph(f"<b>{report_type.upper()} REPORT</b>", styles['Title'])
-            elements.append(title)
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Generated date
-            date_para = Paragraph(f"Generated: {now_str()}", styles['Normal'])
-            elements.append(date_para)
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Get data based on report type
-            if report_type == "revenue":
-                data = [['Date', 'Vehicle', 'Amount', 'Payment Method']]
-                for p in self.app.db.list_payments()[:50]:
-                    data.append([p[3][:10], p[1], f"{p[2]:.2f}", p[7] if len(p) > 7 else 'N/A'])
-            elif report_type == "vehicles":
-                data = [['Number', 'Type', 'User', 'Entry', 'Exit']]
-                for v in self.app.db.list_parked()[:50]:
-                    data.append([v[1], v[2], v[3], v[5][:16], v[6][:16] if v[6] else 'Active'])
-            elif report_type == "payments":
-                data = [['Vehicle', 'Amount', 'Duration (hrs)', 'Paid At']]
-                for p in self.app.db.list_payments()[:50]:
-                    data.append([p[1], f"{p[2]:.2f}", f"{p[4]:.2f}", p[3][:16]])
-            else:  # slots
-                data = [['Name', 'Type', 'Status', 'Rate']]
-                for s in self.app.db.list_slots():
-                    data.append([s[1], s[2], s[3], f"{s[4]:.2f}"])
-            
-            # Create table
-            table = Table(data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elements.append(table)
-            doc.build(elements)
-            
-            toast(self.app, f"PDF report saved: {filename}", bg=SUCCESS)
-        except Exception as e:
-            toast(self.app, f"Error generating PDF: {str(e)}", bg=ERROR)
+            date_from, date_to, period = self._date_range()
+        except ValueError:
+            toast(self.app, "Dates must be YYYY-MM-DD", bg=ERROR)
+            return
+        
+        self.what_if_button.config(state="disabled")
+        results = queue.Queue()
+        
+        def work():
+            try:
+                from utils.pricing import tariff_what_if, project_revenue
+                history = tariff_what_if(self.app.db, date_from, date_to, car_rate=car_rate, motor_rate=motor_rate)
+                current = project_revenue(self.app.db)
+                proposed = project_revenue(self.app.db, car_rate=car_rate, motor_rate=motor_rate)
+                results.put(("done", history, current, proposed))
+            except Exception as e:
+                results.put(("error", str(e)))
+        
+        threading.Thread(target=work, daemon=True).start()
+        self.after(100, self._poll_what_if, results, period, car_rate, motor_rate)
+    
+    def _poll_what_if(self, results, period, car_rate, motor_rate):
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            self.after(100, self._poll_what_if, results, period, car_rate, motor_rate)
+            return
+        self.what_if_button.config(state="normal")
+        if result[0] == "error":
+            toast(self.app, f"Error running what-if: {result[1]}", bg=ERROR)
+            return
+        _, history, current, proposed = result
+        messagebox.showinfo("Tariff What-If", f"""Proposed: {car_rate:.0f} {CURRENCY}/h cars, {motor_rate:.0f} {CURRENCY}/h motorcycles
+
+{period}: {history['stays']} stays
+Current fees: {history['current']:,.2f} {CURRENCY}
+Proposed fees: {history['proposed']:,.2f} {CURRENCY}
+Change: {history['change']:+,.2f} {CURRENCY} ({history['change_pct']:+.1f}%)
+
+Next 30 days (from the last 30 days' stays):
+Current tariff: {current['projected']:,.2f} {CURRENCY}
+Proposed tariff: {proposed['projected']:,.2f} {CURRENCY}""")
     
     def export_excel(self):
         report_type = self.report_type.get()
         filename = f"{report_type}_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
         try:
-            # Get data based on report type
-            if report_type == "revenue":
-                headers = ['ID', 'Vehicle', 'Amount', 'Paid At', 'Duration (hrs)', 'Generated By', 'Payment Method']
-                data = [[p[0], p[1], p[2], p[3], p[4], p[5], p[7] if len(p) > 7 else 'N/A'] for p in self.app.db.list_payments()]
-            elif report_type == "vehicles":
-                headers = ['ID', 'Number', 'Type', 'User', 'Slot ID', 'Entry Time', 'Exit Time']
-                data = list(self.app.db.list_parked())
-            elif report_type == "payments":
-                headers = ['ID', 'Vehicle', 'Amount', 'Paid At', 'Duration (hrs)', 'Generated By']
-                data = [[p[0], p[1], p[2], p[3], p[4], p[5]] for p in self.app.db.list_payments()]
-            else:  # slots
-                headers = ['ID', 'Name', 'Type Allowed', 'Status', 'Hourly Rate']
-                data = list(self.app.db.list_slots())
-            
-            export_to_excel(data, headers, filename)
-            toast(self.app, f"Excel report saved: {filename}", bg=SUCCESS)
-        except Exception as e:
-            toast(self.app, f"Error generating Excel: {str(e)}", bg=ERROR)
+            date_from, date_to, _ = self._date_range()
+        except ValueError:
+            toast(self.app, "Dates must be YYYY-MM-DD", bg=ERROR)
+            return
+        
+        # Like the PDF export: write on a worker thread, report progress via after()
+        self.excel_button.config(state="disabled")
+        self.progress.config(value=0)
+        self.progress_label.config(text="Preparing export...")
+        updates = queue.Queue()
+        
+        def work():
+            try:
+                db = self.app.db
+                # Get data based on report type (streamed from the DB, never held in memory)
+                if report_type == "revenue":
+                    headers = ['ID', 'Vehicle', 'Amount', 'Paid At', 'Duration (hrs)', 'Generated By', 'Payment Method']
+                    data = ((p[0], p[1], p[2], p[3], p[4], p[5], p[7] if len(p) > 7 else 'N/A') for p in db.iter_payments(date_from, date_to))
+                    total = db.count_payments(date_from, date_to)
+                elif report_type == "vehicles":
+                    headers = ['ID', 'Number', 'Type', 'User', 'Slot ID', 'Entry Time', 'Exit Time']
+                    data = db.iter_vehicles(date_from, date_to)
+                    total = db.count_vehicle_records(date_from, date_to)
+                elif report_type == "payments":
+                    headers = ['ID', 'Vehicle', 'Amount', 'Paid At', 'Duration (hrs)', 'Generated By']
+                    data = (p[:6] for p in db.iter_payments(date_from, date_to))
+                    total = db.count_payments(date_from, date_to)
+                else:  # slots
+                    headers = ['ID', 'Name', 'Type Allowed', 'Status', 'Hourly Rate']
+                    data = db.list_slots()
+                    total = len(data)
+                
+                from utils.excel_exporter import export_rows_to_excel
+                rows = export_rows_to_excel(data, headers, filename, total=total,
+                                            progress=lambda done, total: updates.put(("progress", done, total)))
+                updates.put(("done", rows))
+            except Exception as e:
+                updates.put(("error", str(e)))
+        
+        threading.Thread(target=work, daemon=True).start()
+        self.after(100, self._poll_excel, updates, filename)
+    
+    def _poll_excel(self, updates, filename):
+        while True:
+            try:
+                update = updates.get_nowait()
+            except queue.Empty:
+                break
+            if update[0] == "progress":
+                _, done, total = update
+                self.progress.config(value=100.0 * done / total if total else 100)
+                self.progress_label.config(text=f"{done}/{total} rows")
+            else:
+                self.excel_button.config(state="normal")
+                if update[0] == "done":
+                    self.progress.config(value=100)
+                    self.progress_label.config(text=f"{update[1]} rows")
+                    toast(self.app, f"Excel report saved: {filename}", bg=SUCCESS)
+                else:
+                    self.progress_label.config(text="")
+                    toast(self.app, f"Error generating Excel: {update[1]}", bg=ERROR)
+                return
+        self.after(100, self._poll_excel, updates, filename)
@@ -7,29 +7,21 @@ from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
 import datetime
 import math
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
 
 from views.base_page import Page
 from utils.config import *
 from utils.helpers import now_str, hours_between, toast
-from utils.pdf_generator import generate_pdf_receipt
-from utils.email_sender import send_email_with_attachment, EMAIL_SETTINGS
-from utils.excel_exporter import export_to_excel
+from utils.plates import is_valid_plate
+from models.database import AlreadyParked
 
 
 class UserDashboardPage(Page):
     """Simplified dashboard for regular users"""
     def __init__(self, parent, app):
         super().__init__(parent, app)
+        self.total_paid = 0
         self.build()
+        app.db.events.subscribe_ui(("vehicle_parked", "vehicle_exited", "payment_recorded"), self.on_changes)
 
     def build(self):
         top = tk.Frame(self, bg=BG)
@@ -122,8 +114,7 @@ class UserDashboardPage(Page):
         self.welcome_lbl.config(text=f"Welcome, {u}")
         
         # Get user's active vehicles
-        all_vehicles = self.app.db.list_parked()
-        user_vehicles = [v for v in all_vehicles if v[3] == u and v[6] is None]  # user's active vehicles
+        user_vehicles = self.app.db.list_active_vehicles(user=u)
         
         # Clear and populate tree
         for r in self.tree.get_children():
@@ -133,13 +124,13 @@ class UserDashboardPage(Page):
             self.tree.insert("", "end", values=(v[1], v[2], v[5][:16], v[4]))
         
         # Get user's payment summary
-        all_payments = self.app.db.list_payments()
-        user_payments = [p for p in all_payments if p[5] == u]  # payments generated by this user
+        summary = self.app.db.get_user_payment_summary(u)  # payments generated by this user
         
-        if user_payments:
-            total_paid = sum(p[2] for p in user_payments)
-            last_payment = user_payments[0][2] if user_payments else 0
-            last_date = user_payments[0][3][:16] if user_payments else "N/A"
+        self.total_paid = summary['total']
+        if summary['last']:
+            total_paid = summary['total']
+            last_payment = summary['last'][0]
+            last_date = summary['last'][1][:16]
             
             self.lbl_total_paid.config(text=f"Total Paid: {total_paid:.2f} {CURRENCY}")
             self.lbl_last_payment.config(text=f"Last Payment: {last_payment:.2f} {CURRENCY} on {last_date}")
@@ -147,12 +138,35 @@ class UserDashboardPage(Page):
             self.lbl_total_paid.config(text="Total Paid: 0 UGX")
             self.lbl_last_payment.config(text="Last Payment: N/A")
     
+    def on_changes(self, events):
+        """Apply this user's parks, exits and payments without a full refresh"""
+        u = self.app.current_user
+        if self.app.current_page != "UserDashboardPage" or not u:
+            return  # show_page() refreshes the page when it comes back
+        last = None
+        for topic, event in events:
+            if topic == "vehicle_parked" and event['user'] == u:
+                self.tree.insert("", 0, values=(event['number'], event['type'], event['entry_time'][:16], event['slot_id']))
+            elif topic == "vehicle_exited":
+                for iid in self.tree.get_children():
+                    if self.tree.set(iid, "number") == event['number']:
+                        self.tree.delete(iid)
+            elif topic == "payment_recorded" and event['generated_by'] == u:
+                self.total_paid += event['amount'] or 0
+                last = event
+        if last:
+            self.lbl_total_paid.config(text=f"Total Paid: {self.total_paid:.2f} {CURRENCY}")
+            self.lbl_last_payment.config(text=f"Last Payment: {last['amount']:.2f} {CURRENCY} on {last['paid_at'][:16]}")
+    
     def quick_park(self):
         number = simpledialog.askstring("Vehicle Number", "Enter vehicle number:")
         vtype = simpledialog.askstring("Vehicle Type", "Car or Motorcycle:")
         if not number or not vtype:
             toast(self.app, "Cancelled", bg=ERROR)
             return
+        if not is_valid_plate(number) and not messagebox.askyesno(
+                "Vehicle Number", f"{number} does not look like a {PLATE_COUNTRY} plate. Park it anyway?"):
+            return
         
         # Ask for payment method upfront
         payment_method = simpledialog.askstring("Payment Method", 
@@ -162,18 +176,18 @@ class UserDashboardPage(Page):
             toast(self.app, "Payment method required", bg=ERROR)
             return
         
-        # Find free slot
-        slot = self.app.db.get_free_slot_for_type(vtype)
+        # Find a free slot and park (another gate may take it first; then another slot is tried)
+        entry_time = now_str()
+        user = self.app.current_user or "unknown"
+        try:
+            slot = self.app.db.park_in_free_slot(number, vtype, user, entry_time, payment_method)
+        except AlreadyParked as e:
+            toast(self.app, str(e), bg=ERROR)
+            return
         if not slot:
             toast(self.app, "No free slot available for this vehicle type", bg=ERROR)
             return
-        
-        slot_id = slot[0]
-        entry_time = now_str()
-        user = self.app.current_user or "unknown"
-        self.app.db.park_vehicle(number, vtype, user, slot_id, entry_time, payment_method)
         toast(self.app, f"Parked {number} at slot {slot[1]} - Payment: {payment_method.upper()}", bg=SUCCESS)
-        self.refresh()
     
     def exit_vehicle_prompt(self):
         sel = self.tree.selection()
@@ -194,7 +208,6 @@ class UserDashboardPage(Page):
                 # Prompt to generate receipt
                 if messagebox.askyesno("Generate Receipt", "Would you like to generate a receipt now?"):
                     self.generate_receipt_for(number)
-            self.refresh()
     
     def generate_receipt_prompt(self):
         number = simpledialog.askstring("Receipt", "Enter vehicle number:")
@@ -204,6 +217,5 @@ class UserDashboardPage(Page):
     
     def generate_receipt_for(self, number):
         # Call the payment page's receipt generation method
-        pp = self.app.pages["PaymentsPage"]
+        pp = self.app.get_page("PaymentsPage")
         pp.generate_receipt_for(number)
-        self.refresh()
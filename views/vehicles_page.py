@@ -7,22 +7,12 @@ from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
 import datetime
 import math
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
 
 from views.base_page import Page
+from views.paged_tree import PagedTree
+from views.live_search import LiveSearch
 from utils.config import *
 from utils.helpers import now_str, hours_between, toast
-from utils.pdf_generator import generate_pdf_receipt
-from utils.email_sender import send_email_with_attachment, EMAIL_SETTINGS
-from utils.excel_exporter import export_to_excel
 
 
 class VehiclesPage(Page):
@@ -43,36 +33,45 @@ class VehiclesPage(Page):
         self.search_entry.pack(side="left", padx=5)
         tk.Button(search_frame, text="Search", command=self.search, bg=ACCENT, fg="white").pack(side="left", padx=5)
         tk.Button(search_frame, text="Clear", command=self.clear_search, bg="#6b7280", fg="white").pack(side="left", padx=5)
+        self.search_status = tk.Label(search_frame, text="", bg=BG, fg="#6b7280")
+        self.search_status.pack(side="left", padx=10)
         
         # tree
         cols = ("id","number","type","user","slot_id","entry_time","exit_time","payment_method")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=16)
+        table = tk.Frame(self, bg=BG); table.pack(fill="both", expand=True, padx=20, pady=10)
+        self.tree = ttk.Treeview(table, columns=cols, show="headings", height=16)
         for c in cols:
             self.tree.heading(c, text=c)
             self.tree.column(c, width=120, anchor="center")
-        self.tree.pack(fill="both", expand=True, padx=20, pady=10)
+        scroll = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        # rows are loaded a page at a time as the table is scrolled
+        self.pager = PagedTree(self.tree, scroll)
+        # results update as the operator types; queries run off the Tk thread
+        self.live_search = LiveSearch(self.search_entry, self.pager, lambda *a, **kw: self.app.db.search_vehicles(*a, **kw),
+                                      on_empty=self.show_all, on_status=lambda text: self.search_status.config(text=text))
         ctrl = tk.Frame(self, bg=BG); ctrl.pack(fill="x", padx=20)
         tk.Button(ctrl, text="Exit Vehicle (record exit)", command=self.exit_vehicle).pack(side="left", padx=5)
         tk.Button(ctrl, text="Refresh", command=self.refresh).pack(side="right", padx=5)
 
     def refresh(self):
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        for row in self.app.db.list_parked():
-            self.tree.insert("", "end", values=row)
+        # keep showing the current search, re-run against the latest data
+        if self.search_entry.get().strip():
+            self.live_search.run()
+        else:
+            self.show_all()
+
+    def show_all(self):
+        self.pager.reset(self.app.db.list_vehicles_page)
     
     def search(self):
-        search_term = self.search_entry.get().strip()
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        results = self.app.db.search_vehicles(search_term)
-        for row in results:
-            self.tree.insert("", "end", values=row)
-        toast(self.app, f"Found {len(results)} results", bg=SUCCESS)
+        self.live_search.run()
     
     def clear_search(self):
         self.search_entry.delete(0, tk.END)
-        self.refresh()
+        self.live_search.cancel()
+        self.show_all()
 
     def exit_vehicle(self):
         sel = self.tree.selection()